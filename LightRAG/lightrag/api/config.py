@@ -231,6 +231,7 @@ def parse_args() -> argparse.Namespace:
     args.kv_storage = get_env_value(
         "LIGHTRAG_KV_STORAGE", DefaultRAGStorageConfig.KV_STORAGE
     )
+    args.llm_cache_storage = get_env_value("LIGHTRAG_LLM_CACHE_STORAGE", None)
     args.doc_status_storage = get_env_value(
         "LIGHTRAG_DOC_STATUS_STORAGE", DefaultRAGStorageConfig.DOC_STATUS_STORAGE
     )
@@ -244,6 +245,12 @@ def parse_args() -> argparse.Namespace:
     # Get MAX_PARALLEL_INSERT from environment
     args.max_parallel_insert = get_env_value("MAX_PARALLEL_INSERT", 2, int)
 
+    # Worker processes parsing uploaded files off the event loop (0 = thread pool)
+    args.document_parsing_workers = get_env_value("DOCUMENT_PARSING_WORKERS", 2, int)
+
+    # Worker processes chunking documents off the event loop (0 = on the event loop)
+    args.chunking_max_workers = get_env_value("CHUNKING_MAX_WORKERS", 2, int)
+
     # Handle openai-ollama special case
     if args.llm_binding == "openai-ollama":
         args.llm_binding = "openai"
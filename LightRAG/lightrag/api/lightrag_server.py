@@ -42,6 +42,7 @@ from lightrag.api.routers.document_routes import (
     DocumentManager,
     create_document_routes,
     run_scanning_process,
+    shutdown_document_parsing_executor,
 )
 from lightrag.api.routers.query_routes import create_query_routes
 from lightrag.api.routers.graph_routes import create_graph_routes
@@ -151,6 +152,7 @@ def create_app(args):
         finally:
             # Clean up database connections
             await rag.finalize_storages()
+            shutdown_document_parsing_executor()
 
     # Initialize FastAPI
     app_kwargs = {
@@ -315,6 +317,7 @@ def create_app(args):
             else {},
             embedding_func=embedding_func,
             kv_storage=args.kv_storage,
+            llm_cache_storage=args.llm_cache_storage,
             graph_storage=args.graph_storage,
             vector_storage=args.vector_storage,
             doc_status_storage=args.doc_status_storage,
@@ -325,6 +328,7 @@ def create_app(args):
             enable_llm_cache=args.enable_llm_cache,
             auto_manage_storages_states=False,
             max_parallel_insert=args.max_parallel_insert,
+            chunking_max_workers=args.chunking_max_workers,
             addon_params={"language": args.summary_language},
         )
     else:  # azure_openai
@@ -341,6 +345,7 @@ def create_app(args):
             llm_model_max_token_size=args.max_tokens,
             embedding_func=embedding_func,
             kv_storage=args.kv_storage,
+            llm_cache_storage=args.llm_cache_storage,
             graph_storage=args.graph_storage,
             vector_storage=args.vector_storage,
             doc_status_storage=args.doc_status_storage,
@@ -351,6 +356,7 @@ def create_app(args):
             enable_llm_cache=args.enable_llm_cache,
             auto_manage_storages_states=False,
             max_parallel_insert=args.max_parallel_insert,
+            chunking_max_workers=args.chunking_max_workers,
             addon_params={"language": args.summary_language},
         )
 
@@ -4,11 +4,12 @@ This module contains all document-related routes for the LightRAG API.
 
 import asyncio
 from pyuca import Collator
-from lightrag.utils import logger
+from lightrag.utils import clean_text, logger
 import aiofiles
 import shutil
 import traceback
 import pipmaster as pm
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Literal
@@ -418,6 +419,206 @@ class DocumentManager:
         return any(filename.lower().endswith(ext) for ext in self.supported_extensions)
 
 
+_document_parsing_executor: ProcessPoolExecutor | None = None
+
+
+def get_document_parsing_executor() -> ProcessPoolExecutor | None:
+    """Process pool parsing uploaded files, None to parse in the default thread pool
+
+    Sized by DOCUMENT_PARSING_WORKERS and created on first use.
+    """
+    global _document_parsing_executor
+    if global_args.document_parsing_workers <= 0:
+        return None
+    if _document_parsing_executor is None:
+        _document_parsing_executor = ProcessPoolExecutor(
+            max_workers=global_args.document_parsing_workers
+        )
+    return _document_parsing_executor
+
+
+def shutdown_document_parsing_executor() -> None:
+    """Stop the document parsing process pool, called on server shutdown"""
+    global _document_parsing_executor
+    if _document_parsing_executor is not None:
+        _document_parsing_executor.shutdown(wait=True, cancel_futures=True)
+        _document_parsing_executor = None
+
+
+def extract_file_content(
+    file: bytes, file_path: Path, document_loading_engine: str | None = None
+) -> str:
+    """Extract the text content of an uploaded file
+
+    Runs in the document parsing process pool (see pipeline_enqueue_file), so it
+    must only depend on its arguments.
+
+    Args:
+        file: Raw file content
+        file_path: Path to the saved file
+        document_loading_engine: "DOCLING" to parse office documents with docling
+
+    Returns:
+        str: The extracted text, cleaned with clean_text, empty if nothing could be extracted
+
+    Raises:
+        ValueError: If the file type is unsupported or its content is invalid
+    """
+    content = ""
+    ext = file_path.suffix.lower()
+
+    # Process based on file type
+    match ext:
+        case (
+            ".txt"
+            | ".md"
+            | ".html"
+            | ".htm"
+            | ".tex"
+            | ".json"
+            | ".xml"
+            | ".yaml"
+            | ".yml"
+            | ".rtf"
+            | ".odt"
+            | ".epub"
+            | ".csv"
+            | ".log"
+            | ".conf"
+            | ".ini"
+            | ".properties"
+            | ".sql"
+            | ".bat"
+            | ".sh"
+            | ".c"
+            | ".cpp"
+            | ".py"
+            | ".java"
+            | ".js"
+            | ".ts"
+            | ".swift"
+            | ".go"
+            | ".rb"
+            | ".php"
+            | ".css"
+            | ".scss"
+            | ".less"
+        ):
+            try:
+                # Try to decode as UTF-8
+                content = file.decode("utf-8")
+
+                # Validate content
+                if not content or len(content.strip()) == 0:
+                    raise ValueError(f"Empty content in file: {file_path.name}")
+
+                # Check if content looks like binary data string representation
+                if content.startswith("b'") or content.startswith('b"'):
+                    raise ValueError(
+                        f"File {file_path.name} appears to contain binary data representation instead of text"
+                    )
+
+            except UnicodeDecodeError as e:
+                raise ValueError(
+                    f"File {file_path.name} is not valid UTF-8 encoded text. Please convert it to UTF-8 before processing."
+                ) from e
+        case ".pdf":
+            if document_loading_engine == "DOCLING":
+                if not pm.is_installed("docling"):  # type: ignore
+                    pm.install("docling")
+                from docling.document_converter import DocumentConverter  # type: ignore
+
+                converter = DocumentConverter()
+                result = converter.convert(file_path)
+                content = result.document.export_to_markdown()
+            else:
+                if not pm.is_installed("pypdf2"):  # type: ignore
+                    pm.install("pypdf2")
+                from PyPDF2 import PdfReader  # type: ignore
+                from io import BytesIO
+
+                pdf_file = BytesIO(file)
+                reader = PdfReader(pdf_file)
+                for page in reader.pages:
+                    content += page.extract_text() + "\n"
+        case ".docx":
+            if document_loading_engine == "DOCLING":
+                if not pm.is_installed("docling"):  # type: ignore
+                    pm.install("docling")
+                from docling.document_converter import DocumentConverter  # type: ignore
+
+                converter = DocumentConverter()
+                result = converter.convert(file_path)
+                content = result.document.export_to_markdown()
+            else:
+                if not pm.is_installed("python-docx"):  # type: ignore
+                    try:
+                        pm.install("python-docx")
+                    except Exception:
+                        pm.install("docx")
+                from docx import Document  # type: ignore
+                from io import BytesIO
+
+                docx_file = BytesIO(file)
+                doc = Document(docx_file)
+                content = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+        case ".pptx":
+            if document_loading_engine == "DOCLING":
+                if not pm.is_installed("docling"):  # type: ignore
+                    pm.install("docling")
+                from docling.document_converter import DocumentConverter  # type: ignore
+
+                converter = DocumentConverter()
+                result = converter.convert(file_path)
+                content = result.document.export_to_markdown()
+            else:
+                if not pm.is_installed("python-pptx"):  # type: ignore
+                    pm.install("pptx")
+                from pptx import Presentation  # type: ignore
+                from io import BytesIO
+
+                pptx_file = BytesIO(file)
+                prs = Presentation(pptx_file)
+                for slide in prs.slides:
+                    for shape in slide.shapes:
+                        if hasattr(shape, "text"):
+                            content += shape.text + "\n"
+        case ".xlsx":
+            if document_loading_engine == "DOCLING":
+                if not pm.is_installed("docling"):  # type: ignore
+                    pm.install("docling")
+                from docling.document_converter import DocumentConverter  # type: ignore
+
+                converter = DocumentConverter()
+                result = converter.convert(file_path)
+                content = result.document.export_to_markdown()
+            else:
+                if not pm.is_installed("openpyxl"):  # type: ignore
+                    pm.install("openpyxl")
+                from openpyxl import load_workbook  # type: ignore
+                from io import BytesIO
+
+                xlsx_file = BytesIO(file)
+                wb = load_workbook(xlsx_file)
+                for sheet in wb:
+                    content += f"Sheet: {sheet.title}\n"
+                    for row in sheet.iter_rows(values_only=True):
+                        content += (
+                            "\t".join(
+                                str(cell) if cell is not None else "" for cell in row
+                            )
+                            + "\n"
+                        )
+                    content += "\n"
+        case _:
+            raise ValueError(
+                f"Unsupported file type: {file_path.name} (extension {ext})"
+            )
+
+    # Cleaned here too, so that a large document is not copied on the event loop
+    return clean_text(content)
+
+
 async def pipeline_enqueue_file(rag: LightRAG, file_path: Path) -> bool:
     """Add a file to the queue for processing
 
@@ -429,167 +630,22 @@ async def pipeline_enqueue_file(rag: LightRAG, file_path: Path) -> bool:
     """
 
     try:
-        content = ""
-        ext = file_path.suffix.lower()
-
         file = None
         async with aiofiles.open(file_path, "rb") as f:
             file = await f.read()
 
-        # Process based on file type
-        match ext:
-            case (
-                ".txt"
-                | ".md"
-                | ".html"
-                | ".htm"
-                | ".tex"
-                | ".json"
-                | ".xml"
-                | ".yaml"
-                | ".yml"
-                | ".rtf"
-                | ".odt"
-                | ".epub"
-                | ".csv"
-                | ".log"
-                | ".conf"
-                | ".ini"
-                | ".properties"
-                | ".sql"
-                | ".bat"
-                | ".sh"
-                | ".c"
-                | ".cpp"
-                | ".py"
-                | ".java"
-                | ".js"
-                | ".ts"
-                | ".swift"
-                | ".go"
-                | ".rb"
-                | ".php"
-                | ".css"
-                | ".scss"
-                | ".less"
-            ):
-                try:
-                    # Try to decode as UTF-8
-                    content = file.decode("utf-8")
-
-                    # Validate content
-                    if not content or len(content.strip()) == 0:
-                        logger.error(f"Empty content in file: {file_path.name}")
-                        return False
-
-                    # Check if content looks like binary data string representation
-                    if content.startswith("b'") or content.startswith('b"'):
-                        logger.error(
-                            f"File {file_path.name} appears to contain binary data representation instead of text"
-                        )
-                        return False
-
-                except UnicodeDecodeError:
-                    logger.error(
-                        f"File {file_path.name} is not valid UTF-8 encoded text. Please convert it to UTF-8 before processing."
-                    )
-                    return False
-            case ".pdf":
-                if global_args.document_loading_engine == "DOCLING":
-                    if not pm.is_installed("docling"):  # type: ignore
-                        pm.install("docling")
-                    from docling.document_converter import DocumentConverter  # type: ignore
-
-                    converter = DocumentConverter()
-                    result = converter.convert(file_path)
-                    content = result.document.export_to_markdown()
-                else:
-                    if not pm.is_installed("pypdf2"):  # type: ignore
-                        pm.install("pypdf2")
-                    from PyPDF2 import PdfReader  # type: ignore
-                    from io import BytesIO
-
-                    pdf_file = BytesIO(file)
-                    reader = PdfReader(pdf_file)
-                    for page in reader.pages:
-                        content += page.extract_text() + "\n"
-            case ".docx":
-                if global_args.document_loading_engine == "DOCLING":
-                    if not pm.is_installed("docling"):  # type: ignore
-                        pm.install("docling")
-                    from docling.document_converter import DocumentConverter  # type: ignore
-
-                    converter = DocumentConverter()
-                    result = converter.convert(file_path)
-                    content = result.document.export_to_markdown()
-                else:
-                    if not pm.is_installed("python-docx"):  # type: ignore
-                        try:
-                            pm.install("python-docx")
-                        except Exception:
-                            pm.install("docx")
-                    from docx import Document  # type: ignore
-                    from io import BytesIO
-
-                    docx_file = BytesIO(file)
-                    doc = Document(docx_file)
-                    content = "\n".join(
-                        [paragraph.text for paragraph in doc.paragraphs]
-                    )
-            case ".pptx":
-                if global_args.document_loading_engine == "DOCLING":
-                    if not pm.is_installed("docling"):  # type: ignore
-                        pm.install("docling")
-                    from docling.document_converter import DocumentConverter  # type: ignore
-
-                    converter = DocumentConverter()
-                    result = converter.convert(file_path)
-                    content = result.document.export_to_markdown()
-                else:
-                    if not pm.is_installed("python-pptx"):  # type: ignore
-                        pm.install("pptx")
-                    from pptx import Presentation  # type: ignore
-                    from io import BytesIO
-
-                    pptx_file = BytesIO(file)
-                    prs = Presentation(pptx_file)
-                    for slide in prs.slides:
-                        for shape in slide.shapes:
-                            if hasattr(shape, "text"):
-                                content += shape.text + "\n"
-            case ".xlsx":
-                if global_args.document_loading_engine == "DOCLING":
-                    if not pm.is_installed("docling"):  # type: ignore
-                        pm.install("docling")
-                    from docling.document_converter import DocumentConverter  # type: ignore
-
-                    converter = DocumentConverter()
-                    result = converter.convert(file_path)
-                    content = result.document.export_to_markdown()
-                else:
-                    if not pm.is_installed("openpyxl"):  # type: ignore
-                        pm.install("openpyxl")
-                    from openpyxl import load_workbook  # type: ignore
-                    from io import BytesIO
-
-                    xlsx_file = BytesIO(file)
-                    wb = load_workbook(xlsx_file)
-                    for sheet in wb:
-                        content += f"Sheet: {sheet.title}\n"
-                        for row in sheet.iter_rows(values_only=True):
-                            content += (
-                                "\t".join(
-                                    str(cell) if cell is not None else ""
-                                    for cell in row
-                                )
-                                + "\n"
-                            )
-                        content += "\n"
-            case _:
-                logger.error(
-                    f"Unsupported file type: {file_path.name} (extension {ext})"
-                )
-                return False
+        # Parse the file in the document parsing process pool, off the event loop
+        try:
+            content = await asyncio.get_running_loop().run_in_executor(
+                get_document_parsing_executor(),
+                extract_file_content,
+                file,
+                file_path,
+                global_args.document_loading_engine,
+            )
+        except ValueError as e:
+            logger.error(str(e))
+            return False
 
         # Insert into the RAG queue
         if content:
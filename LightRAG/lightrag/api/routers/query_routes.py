@@ -67,6 +67,22 @@ class QueryRequest(BaseModel):
         description="Maximum number of tokens allocated for entity descriptions in local retrieval.",
     )
 
+    max_total_tokens: Optional[int] = Field(
+        ge=0,
+        default=None,
+        description="Total token budget shared by entities, relationships and chunks, packed jointly. 0 applies the three limits above separately instead.",
+    )
+
+    context_format: Optional[Literal["json", "csv", "tsv"]] = Field(
+        default=None,
+        description="Format of the entities, relationships and chunks in the prompt: JSON objects, or CSV/TSV tables with the keys in one header line.",
+    )
+
+    context_fields: Optional[List[str]] = Field(
+        default=None,
+        description="Context fields to keep, e.g. ['entity', 'type', 'description', 'entity1', 'entity2', 'keywords', 'content']. All fields are kept by default.",
+    )
+
     conversation_history: Optional[List[Dict[str, Any]]] = Field(
         default=None,
         description="Stores past conversation history to maintain context. Format: [{'role': 'user/assistant', 'content': 'message'}].",
@@ -83,6 +99,16 @@ class QueryRequest(BaseModel):
         description="User-provided prompt for the query. If provided, this will be used instead of the default value from prompt template.",
     )
 
+    time_from: Optional[int | str] = Field(
+        default=None,
+        description="Lower bound of the time window, as epoch seconds or an ISO 8601 date/datetime. Only entities, relations and chunks at or after this time are retrieved.",
+    )
+
+    time_to: Optional[int | str] = Field(
+        default=None,
+        description="Upper bound of the time window, as epoch seconds or an ISO 8601 date/datetime. A date-only value includes the whole day.",
+    )
+
     @field_validator("query", mode="after")
     @classmethod
     def query_strip_after(cls, query: str) -> str:
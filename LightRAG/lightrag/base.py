@@ -7,13 +7,22 @@ from dotenv import load_dotenv
 from dataclasses import dataclass, field
 from typing import (
     Any,
+    ClassVar,
     Literal,
     TypedDict,
     TypeVar,
     Callable,
 )
-from .utils import EmbeddingFunc
+from .utils import EmbeddingFunc, LRUCache
 from .types import KnowledgeGraph
+from .temporal import (
+    any_in_time_range,
+    decode_observations,
+    element_timestamps,
+    in_time_range,
+    record_publication_times,
+    to_epoch,
+)
 
 # use the .env that is inside the current folder
 # allows to use different .env file for each lightrag instance
@@ -21,7 +30,16 @@ from .types import KnowledgeGraph
 load_dotenv(dotenv_path=".env", override=False)
 
 
-class TextChunkSchema(TypedDict):
+class TextChunkMetadata(TypedDict, total=False):
+    """Optional document metadata copied onto every chunk of the document"""
+
+    published_at: int
+    """Publication time of the source document in epoch seconds"""
+    source: str
+    url: str
+
+
+class TextChunkSchema(TextChunkMetadata):
     tokens: int
     content: str
     full_doc_id: str
@@ -70,6 +88,15 @@ class QueryParam:
     max_token_for_local_context: int = int(os.getenv("MAX_TOKEN_ENTITY_DESC", "4000"))
     """Maximum number of tokens allocated for entity descriptions in local retrieval."""
 
+    max_total_tokens: int = int(os.getenv("MAX_TOTAL_TOKENS", "0"))
+    """Total token budget shared by entities, relationships and chunks, packed jointly. 0 applies the three limits above separately instead."""
+
+    context_format: Literal["json", "csv", "tsv"] = os.getenv("CONTEXT_FORMAT", "json")
+    """Format of the entities, relationships and chunks in the prompt: JSON objects, or CSV/TSV tables with the keys in one header line."""
+
+    context_fields: list[str] | None = None
+    """Context fields to keep, e.g. ["entity", "type", "description", "entity1", "entity2", "keywords", "content"]. None keeps all fields."""
+
     hl_keywords: list[str] = field(default_factory=list)
     """List of high-level keywords to prioritize in retrieval."""
 
@@ -87,6 +114,36 @@ class QueryParam:
     ids: list[str] | None = None
     """List of ids to filter the results."""
 
+    time_from: int | str | None = None
+    """Lower bound of the time window (epoch seconds or ISO 8601 date/datetime).
+    When set, entity, relation and chunk lookups are restricted to records whose
+    `published_at` is not earlier than this value. Records without a publication
+    date are left out of bounded windows.
+    """
+
+    time_to: int | str | None = None
+    """Upper bound of the time window (epoch seconds or ISO 8601 date/datetime).
+    A date-only value includes the whole day.
+    """
+
+    temporal_planning: bool = False
+    """If True, queries referring to two or more dates (e.g. "between the report of
+    December 1, 2023 and the one of December 21, 2023") are answered from one
+    retrieval per date window, run concurrently and merged with time labels.
+    Only useful on corpora ingested with `published_at` metadata; when no window
+    matches anything the query falls back to a single unwindowed retrieval.
+    Ignored when time_from or time_to is set.
+    """
+
+    temporal_window_days: int = 1
+    """Number of days added on both sides of each planned date window."""
+
+    recency_half_life_days: float = float(os.getenv("RECENCY_HALF_LIFE_DAYS", "0"))
+    """Half-life in days of the recency decay applied when ranking entities, relations
+    and chunks before token truncation. An item this much older than the newest
+    candidate counts half as much as it would otherwise. 0 disables the decay.
+    """
+
     model_func: Callable[..., object] | None = None
     """Optional override for the LLM model function to use for this specific query.
     If provided, this will be used instead of the global model function.
@@ -155,6 +212,34 @@ class BaseVectorStorage(StorageNameSpace, ABC):
     ) -> list[dict[str, Any]]:
         """Query the vector storage and retrieve top_k results."""
 
+    async def query_in_time_range(
+        self,
+        query: str,
+        top_k: int,
+        time_from: int | None = None,
+        time_to: int | None = None,
+        ids: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Query the vector storage restricted to records inside a time window.
+
+        Records match when one of their publication times (`published_ats` for
+        entities and relations, `published_at` otherwise) lies in the window;
+        undated records never match a bounded window. Bounds are inclusive epoch seconds; None means unbounded.
+
+        Default implementation over-fetches with query() and filters the hits.
+        Override this method for better performance in storage backends
+        that can restrict the search space before scoring.
+        """
+        if time_from is None and time_to is None:
+            return await self.query(query, top_k=top_k, ids=ids)
+
+        results = await self.query(query, top_k=top_k * 4, ids=ids)
+        return [
+            r
+            for r in results
+            if any_in_time_range(record_publication_times(r), time_from, time_to)
+        ][:top_k]
+
     @abstractmethod
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
         """Insert or update vectors in the storage.
@@ -227,13 +312,53 @@ class BaseVectorStorage(StorageNameSpace, ABC):
 class BaseKVStorage(StorageNameSpace, ABC):
     embedding_func: EmbeddingFunc
 
+    read_cache: LRUCache | None = field(default=None, init=False, repr=False)
+    """Optional LRU of hot records consulted by get_by_ids_cached"""
+
+    semantic_cache_indexes: dict[str, Any] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    """Per-mode embedding indexes of the LLM cache, used by get_best_cached_response"""
+
+    max_ids_per_request: ClassVar[int] = 1000
+    """Max ids per get_by_ids call made by get_by_ids_cached"""
+
     @abstractmethod
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
         """Get value by id"""
 
     @abstractmethod
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
-        """Get values by ids"""
+        """Get values by ids, in the order of ids with None for missing ids"""
+
+    async def get_by_ids_cached(self, ids: list[str]) -> dict[str, dict[str, Any]]:
+        """Get values by ids through the read cache, keyed by id
+
+        Ids missing from the read cache are fetched with get_by_ids in requests
+        of at most max_ids_per_request ids. Missing ids are left out.
+        """
+        ids = list(dict.fromkeys(ids))
+        found = self.read_cache.get_many(ids) if self.read_cache is not None else {}
+        missing = [id for id in ids if id not in found]
+        fetched = {}
+        for i in range(0, len(missing), self.max_ids_per_request):
+            batch = missing[i : i + self.max_ids_per_request]
+            for id, value in zip(batch, await self.get_by_ids(batch)):
+                if value is not None:
+                    fetched[id] = value
+        if self.read_cache is not None:
+            self.read_cache.put_many(fetched)
+        return {**found, **fetched}
+
+    async def get_all(self) -> dict[str, Any]:
+        """Get all records of the namespace, keyed by id
+
+        Default implementation raises NotImplementedError. Override this method
+        in storage backends that can enumerate their records.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support get_all ({self.namespace})"
+        )
 
     @abstractmethod
     async def filter_keys(self, keys: set[str]) -> set[str]:
@@ -441,6 +566,26 @@ class BaseGraphStorage(StorageNameSpace, ABC):
             result[node_id] = edges if edges is not None else []
         return result
 
+    def window(
+        self, time_from: int | str | None = None, time_to: int | str | None = None
+    ) -> GraphTimeWindow:
+        """Read-only view of the graph restricted to edges observed in [time_from, time_to]
+
+        An edge belongs to the window when at least one of its (timestamp, chunk_id)
+        observations falls inside it. Bounds accept epoch seconds or ISO 8601 dates.
+
+        Default implementation filters the results of the regular graph queries.
+        Override this method for better performance in storage backends
+        that can evaluate the window inside the graph engine.
+        """
+        return GraphTimeWindow(
+            self, to_epoch(time_from), to_epoch(time_to, end_of_day=True)
+        )
+
+    def snapshot(self, at: int | str) -> GraphTimeWindow:
+        """Read-only view of the graph as known at time `at`"""
+        return self.window(None, at)
+
     @abstractmethod
     async def upsert_node(self, node_id: str, node_data: dict[str, str]) -> None:
         """Insert a new node or update an existing node in the graph.
@@ -472,6 +617,28 @@ class BaseGraphStorage(StorageNameSpace, ABC):
             edge_data: A dictionary of edge properties
         """
 
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
+        """Insert or update several nodes, given as {node_id: node_data}
+
+        Default implementation upserts nodes one by one.
+        Override this method for better performance in storage backends
+        that support batch operations.
+        """
+        for node_id, node_data in nodes.items():
+            await self.upsert_node(node_id, node_data)
+
+    async def upsert_edges_batch(
+        self, edges: list[tuple[str, str, dict[str, str]]]
+    ) -> None:
+        """Insert or update several edges, given as (source_id, target_id, edge_data)
+
+        Both end nodes must exist. Default implementation upserts edges one by one.
+        Override this method for better performance in storage backends
+        that support batch operations.
+        """
+        for source_node_id, target_node_id, edge_data in edges:
+            await self.upsert_edge(source_node_id, target_node_id, edge_data)
+
     @abstractmethod
     async def delete_node(self, node_id: str) -> None:
         """Delete a node from the graph.
@@ -537,6 +704,89 @@ class BaseGraphStorage(StorageNameSpace, ABC):
         """
 
 
+class GraphTimeWindow:
+    """Time-sliced view over a graph storage
+
+    Answers neighbor and degree queries using only the edges that were observed
+    inside [time_from, time_to]. The underlying graph is never copied; edges are
+    filtered while answering each query.
+    """
+
+    def __init__(
+        self,
+        storage: BaseGraphStorage,
+        time_from: int | None = None,
+        time_to: int | None = None,
+    ):
+        self.storage = storage
+        self.time_from = time_from
+        self.time_to = time_to
+
+    def edge_in_window(self, edge: dict[str, Any] | None) -> bool:
+        """Check whether edge properties have an observation inside the window"""
+        if edge is None:
+            return False
+        return any_in_time_range(element_timestamps(edge), self.time_from, self.time_to)
+
+    async def has_edge(self, source_node_id: str, target_node_id: str) -> bool:
+        return self.edge_in_window(
+            await self.storage.get_edge(source_node_id, target_node_id)
+        )
+
+    async def get_edge(
+        self, source_node_id: str, target_node_id: str
+    ) -> dict[str, str] | None:
+        edge = await self.storage.get_edge(source_node_id, target_node_id)
+        return edge if self.edge_in_window(edge) else None
+
+    async def get_edge_observations(
+        self, source_node_id: str, target_node_id: str
+    ) -> list[tuple[int, str]]:
+        """(timestamp, chunk_id) observations of an edge that fall inside the window"""
+        edge = await self.storage.get_edge(source_node_id, target_node_id)
+        if edge is None:
+            return []
+        return [
+            (ts, chunk_id)
+            for ts, chunk_id in decode_observations(edge.get("observations"))
+            if in_time_range(ts, self.time_from, self.time_to)
+        ]
+
+    async def get_node_edges(self, source_node_id: str) -> list[tuple[str, str]] | None:
+        if not await self.storage.has_node(source_node_id):
+            return None
+        batch = await self.get_nodes_edges_batch([source_node_id])
+        return batch[source_node_id]
+
+    async def get_nodes_edges_batch(
+        self, node_ids: list[str]
+    ) -> dict[str, list[tuple[str, str]]]:
+        all_edges = await self.storage.get_nodes_edges_batch(node_ids)
+        pairs = {(src, tgt) for edges in all_edges.values() for src, tgt in edges or []}
+        edge_props = await self.storage.get_edges_batch(
+            [{"src": src, "tgt": tgt} for src, tgt in pairs]
+        )
+        return {
+            node_id: [
+                pair
+                for pair in edges or []
+                if self.edge_in_window(edge_props.get(pair))
+            ]
+            for node_id, edges in all_edges.items()
+        }
+
+    async def node_degree(self, node_id: str) -> int:
+        return (await self.node_degrees_batch([node_id]))[node_id]
+
+    async def node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
+        batch = await self.get_nodes_edges_batch(node_ids)
+        return {node_id: len(batch.get(node_id, [])) for node_id in node_ids}
+
+    async def edge_degree(self, src_id: str, tgt_id: str) -> int:
+        degrees = await self.node_degrees_batch([src_id, tgt_id])
+        return degrees[src_id] + degrees[tgt_id]
+
+
 class DocStatus(str, Enum):
     """Document processing status"""
 
@@ -570,6 +820,8 @@ class DocProcessingStatus:
     """Error message if failed"""
     metadata: dict[str, Any] = field(default_factory=dict)
     """Additional metadata"""
+    chunk_extractions: dict[str, dict] | None = None
+    """Extraction results of the chunks already extracted, kept for failed documents so a retry only extracts the remaining chunks"""
 
 
 @dataclass
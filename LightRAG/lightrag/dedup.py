@@ -0,0 +1,114 @@
+"""
+Near-duplicate detection for text chunks.
+
+Chunk ids hash the exact chunk content, so syndicated articles that only differ
+by a byline or a trailing sentence get distinct ids and are extracted again.
+SimHash fingerprints over word shingles of such chunks differ in a few bits
+only, and a banded index finds them without comparing against every chunk.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+
+import numpy as np
+
+FINGERPRINT_BITS = 64
+
+# Chunks with fewer shingles get no fingerprint, their SimHash is too noisy
+MIN_SHINGLES = 8
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def simhash(text: str, shingle_size: int = 3) -> int | None:
+    """64-bit SimHash of the word shingles of text
+
+    Returns:
+        The fingerprint, or None if the text is too short to be fingerprinted
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    shingles = {
+        " ".join(words[i : i + shingle_size])
+        for i in range(len(words) - shingle_size + 1)
+    }
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    hashes = np.array(
+        [
+            int.from_bytes(
+                hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little"
+            )
+            for shingle in shingles
+        ],
+        dtype=np.uint64,
+    )
+    bits = (
+        hashes[:, None] >> np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+    ) & np.uint64(1)
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return sum(1 << int(i) for i in np.flatnonzero(majority))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class SimHashIndex:
+    """Index of fingerprints answering "closest fingerprint within k bits"
+
+    Fingerprints are split into `bands` blocks; two fingerprints differing in
+    fewer bits than there are bands share at least one identical block, so only
+    keys sharing a block are compared. max_distance must be below `bands`.
+    """
+
+    def __init__(self, bands: int = 4):
+        self.bands = bands
+        self._band_bits = FINGERPRINT_BITS // bands
+        self._buckets: list[dict[int, set[str]]] = [{} for _ in range(bands)]
+        self._fingerprints: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def fingerprints(self) -> dict[str, int]:
+        """Fingerprint of every key, e.g. to persist the index"""
+        return dict(self._fingerprints)
+
+    def _band_values(self, fingerprint: int) -> list[int]:
+        mask = (1 << self._band_bits) - 1
+        return [
+            (fingerprint >> (band * self._band_bits)) & mask
+            for band in range(self.bands)
+        ]
+
+    def add(self, key: str, fingerprint: int) -> None:
+        self.remove(key)
+        self._fingerprints[key] = fingerprint
+        for bucket, value in zip(self._buckets, self._band_values(fingerprint)):
+            bucket.setdefault(value, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        fingerprint = self._fingerprints.pop(key, None)
+        if fingerprint is None:
+            return
+        for bucket, value in zip(self._buckets, self._band_values(fingerprint)):
+            keys = bucket[value]
+            keys.discard(key)
+            if not keys:
+                del bucket[value]
+
+    def find(
+        self, fingerprint: int, max_distance: int, exclude: set[str] | None = None
+    ) -> str | None:
+        """Key of the closest fingerprint within max_distance bits, if any"""
+        best_key, best_distance = None, max_distance + 1
+        for bucket, value in zip(self._buckets, self._band_values(fingerprint)):
+            for key in bucket.get(value, ()):
+                if exclude and key in exclude:
+                    continue
+                distance = hamming_distance(fingerprint, self._fingerprints[key])
+                if distance < best_distance:
+                    best_key, best_distance = key, distance
+        return best_key
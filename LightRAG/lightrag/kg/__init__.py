@@ -24,6 +24,7 @@ STORAGE_IMPLEMENTATIONS = {
     "VECTOR_STORAGE": {
         "implementations": [
             "NanoVectorDBStorage",
+            "MemmapVectorDBStorage",
             "MilvusVectorDBStorage",
             "ChromaVectorDBStorage",
             "PGVectorStorage",
@@ -34,6 +35,16 @@ STORAGE_IMPLEMENTATIONS = {
         ],
         "required_methods": ["query", "upsert"],
     },
+    "LLM_CACHE_STORAGE": {
+        "implementations": [
+            "JsonKVStorage",
+            "RedisKVStorage",
+            "PGKVStorage",
+            "MongoKVStorage",
+            "SQLiteCacheStorage",
+        ],
+        "required_methods": ["get_by_id", "upsert"],
+    },
     "DOC_STATUS_STORAGE": {
         "implementations": [
             "JsonDocStatusStorage",
@@ -52,6 +63,7 @@ STORAGE_ENV_REQUIREMENTS: dict[str, list[str]] = {
     "RedisKVStorage": ["REDIS_URI"],
     # "TiDBKVStorage": ["TIDB_USER", "TIDB_PASSWORD", "TIDB_DATABASE"],
     "PGKVStorage": ["POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_DATABASE"],
+    "SQLiteCacheStorage": [],
     # Graph Storage Implementations
     "NetworkXStorage": [],
     "Neo4JStorage": ["NEO4J_URI", "NEO4J_USERNAME", "NEO4J_PASSWORD"],
@@ -70,6 +82,7 @@ STORAGE_ENV_REQUIREMENTS: dict[str, list[str]] = {
     ],
     # Vector Storage Implementations
     "NanoVectorDBStorage": [],
+    "MemmapVectorDBStorage": [],
     "MilvusVectorDBStorage": [],
     "ChromaVectorDBStorage": [],
     # "TiDBVectorDBStorage": ["TIDB_USER", "TIDB_PASSWORD", "TIDB_DATABASE"],
@@ -88,6 +101,7 @@ STORAGES = {
     "NetworkXStorage": ".kg.networkx_impl",
     "JsonKVStorage": ".kg.json_kv_impl",
     "NanoVectorDBStorage": ".kg.nano_vector_db_impl",
+    "MemmapVectorDBStorage": ".kg.memmap_vector_db_impl",
     "JsonDocStatusStorage": ".kg.json_doc_status_impl",
     "Neo4JStorage": ".kg.neo4j_impl",
     "MilvusVectorDBStorage": ".kg.milvus_impl",
@@ -108,6 +122,7 @@ STORAGES = {
     "PGDocStatusStorage": ".kg.postgres_impl",
     "FaissVectorDBStorage": ".kg.faiss_impl",
     "QdrantVectorDBStorage": ".kg.qdrant_impl",
+    "SQLiteCacheStorage": ".kg.sqlite_cache_impl",
 }
 
 
@@ -10,6 +10,7 @@ import pipmaster as pm
 
 from lightrag.utils import logger, compute_mdhash_id
 from lightrag.base import BaseVectorStorage
+from lightrag.temporal import TemporalIndex, record_publication_times
 
 from .shared_storage import (
     get_storage_lock,
@@ -57,13 +58,26 @@ class FaissVectorDBStorage(BaseVectorStorage):
         # Create an empty Faiss index for inner product (useful for normalized vectors = cosine similarity).
         # If you have a large number of vectors, you might want IVF or other indexes.
         # For demonstration, we use a simple IndexFlatIP.
-        self._index = faiss.IndexFlatIP(self._dim)
+        self._index = self._new_index()
         # Keep a local store for metadata, IDs, etc.
         # Maps <int faiss_id> → metadata (including your original ID).
         self._id_to_meta = {}
+        # Reverse map <custom id> → <int faiss_id> for O(1) upserts and lookups
+        self._custom_id_to_fid = {}
+        # Faiss ids are stable (IndexIDMap2), new vectors get increasing ids
+        self._next_fid = 0
+        # Sorted <timestamp, faiss_id> index for time-window queries
+        self._temporal_index = TemporalIndex()
 
         self._load_faiss_index()
 
+    def _new_index(self):
+        """
+        Empty inner product index addressed by stable Faiss ids, so removals do
+        not renumber the remaining vectors.
+        """
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(self._dim))
+
     async def initialize(self):
         """Initialize storage data"""
         # Get the update flag for cross-process update notification
@@ -81,8 +95,6 @@ class FaissVectorDBStorage(BaseVectorStorage):
                     f"Process {os.getpid()} FAISS reloading {self.namespace} due to update by another process"
                 )
                 # Reload data
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
                 self._load_faiss_index()
                 self.storage_updated.value = False
             return self._index
@@ -146,7 +158,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
         # 2. Remove them
         # 3. Add the new vectors
         existing_ids_to_remove = []
-        for meta, emb in zip(list_data, embeddings):
+        for meta in list_data:
             faiss_internal_id = self._find_faiss_id_by_custom_id(meta["__id__"])
             if faiss_internal_id is not None:
                 existing_ids_to_remove.append(faiss_internal_id)
@@ -154,17 +166,19 @@ class FaissVectorDBStorage(BaseVectorStorage):
         if existing_ids_to_remove:
             await self._remove_faiss_ids(existing_ids_to_remove)
 
-        # Step 2: Add new vectors
+        # Step 2: Add new vectors under fresh ids
         index = await self._get_index()
-        start_idx = index.ntotal
-        index.add(embeddings)
+        fids = np.arange(
+            self._next_fid, self._next_fid + len(list_data), dtype=np.int64
+        )
+        self._next_fid += len(list_data)
+        index.add_with_ids(embeddings, fids)
 
-        # Step 3: Store metadata + vector for each new ID
-        for i, meta in enumerate(list_data):
-            fid = start_idx + i
-            # Store the raw vector so we can rebuild if something is removed
-            meta["__vector__"] = embeddings[i].tolist()
-            self._id_to_meta.update({fid: meta})
+        # Step 3: Store metadata for each new ID (the vector itself lives in the index)
+        for fid, meta in zip(fids.tolist(), list_data):
+            self._id_to_meta[fid] = meta
+            self._custom_id_to_fid[meta["__id__"]] = fid
+            self._temporal_index.add(fid, record_publication_times(meta))
 
         logger.info(f"Upserted {len(list_data)} vectors into Faiss index.")
         return [m["__id__"] for m in list_data]
@@ -189,7 +203,43 @@ class FaissVectorDBStorage(BaseVectorStorage):
         # Perform the similarity search
         index = await self._get_index()
         distances, indices = index.search(embedding, top_k)
+        return self._format_search_results(distances, indices)
+
+    async def query_in_time_range(
+        self,
+        query: str,
+        top_k: int,
+        time_from: int | None = None,
+        time_to: int | None = None,
+        ids: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Search restricted to vectors inside [time_from, time_to].
+        The window is resolved to Faiss ids first and passed to the index as an
+        IDSelector, so vectors outside the window are never scored.
+        """
+        if time_from is None and time_to is None:
+            return await self.query(query, top_k=top_k, ids=ids)
 
+        embedding = await self.embedding_func(
+            [query], _priority=5
+        )  # higher priority for query
+        embedding = np.array(embedding, dtype=np.float32)
+        faiss.normalize_L2(embedding)
+
+        index = await self._get_index()
+        window_fids = self._temporal_index.window(time_from, time_to)
+        if not window_fids:
+            return []
+        selector = faiss.IDSelectorBatch(np.array(window_fids, dtype=np.int64))
+        distances, indices = index.search(
+            embedding,
+            min(top_k, len(window_fids)),
+            params=faiss.SearchParameters(sel=selector),
+        )
+        return self._format_search_results(distances, indices)
+
+    def _format_search_results(self, distances, indices) -> list[dict[str, Any]]:
         distances = distances[0]
         indices = indices[0]
 
@@ -203,7 +253,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
             if dist < self.cosine_better_than_threshold:
                 continue
 
-            meta = self._id_to_meta.get(idx, {})
+            meta = self._id_to_meta.get(int(idx), {})
             results.append(
                 {
                     **meta,
@@ -216,8 +266,9 @@ class FaissVectorDBStorage(BaseVectorStorage):
         return results
 
     @property
-    def client_storage(self):
+    async def client_storage(self):
         # Return whatever structure LightRAG might need for debugging
+        await self._get_index()
         return {"data": list(self._id_to_meta.values())}
 
     async def delete(self, ids: list[str]):
@@ -279,35 +330,32 @@ class FaissVectorDBStorage(BaseVectorStorage):
         """
         Return the Faiss internal ID for a given custom ID, or None if not found.
         """
-        for fid, meta in self._id_to_meta.items():
-            if meta.get("__id__") == custom_id:
-                return fid
-        return None
+        return self._custom_id_to_fid.get(custom_id)
 
     async def _remove_faiss_ids(self, fid_list):
         """
         Remove a list of internal Faiss IDs from the index.
-        Because IndexFlatIP doesn't support 'removals',
-        we rebuild the index excluding those vectors.
+        The remaining vectors keep their ids, so only the removed entries are
+        dropped from the metadata and time index.
         """
-        keep_fids = [fid for fid in self._id_to_meta if fid not in fid_list]
-
-        # Rebuild the index
-        vectors_to_keep = []
-        new_id_to_meta = {}
-        for new_fid, old_fid in enumerate(keep_fids):
-            vec_meta = self._id_to_meta[old_fid]
-            vectors_to_keep.append(vec_meta["__vector__"])  # stored as list
-            new_id_to_meta[new_fid] = vec_meta
-
         async with self._storage_lock:
-            # Re-init index
-            self._index = faiss.IndexFlatIP(self._dim)
-            if vectors_to_keep:
-                arr = np.array(vectors_to_keep, dtype=np.float32)
-                self._index.add(arr)
+            self._index.remove_ids(
+                faiss.IDSelectorBatch(np.array(fid_list, dtype=np.int64))
+            )
+            for fid in fid_list:
+                meta = self._id_to_meta.pop(fid, None)
+                if meta is not None:
+                    self._custom_id_to_fid.pop(meta["__id__"], None)
+                self._temporal_index.remove(fid)
 
-            self._id_to_meta = new_id_to_meta
+    def _rebuild_temporal_index(self):
+        """
+        Rebuild the time index from the metadata after a (re)load.
+        """
+        self._temporal_index.rebuild(
+            (fid, record_publication_times(meta))
+            for fid, meta in self._id_to_meta.items()
+        )
 
     def _save_faiss_index(self):
         """
@@ -315,37 +363,70 @@ class FaissVectorDBStorage(BaseVectorStorage):
         """
         faiss.write_index(self._index, self._faiss_index_file)
 
-        # Save metadata dict to JSON. Convert all keys to strings for JSON storage.
-        # _id_to_meta is { int: { '__id__': doc_id, '__vector__': [float,...], ... } }
-        # We'll keep the int -> dict, but JSON requires string keys.
-        serializable_dict = {}
-        for fid, meta in self._id_to_meta.items():
-            serializable_dict[str(fid)] = meta
-
+        # Save metadata column by column: one list per field instead of one
+        # dict per vector, so field names are not repeated for every entry.
+        # _id_to_meta is { int: { '__id__': doc_id, ... } }
+        fids = list(self._id_to_meta.keys())
+        metas = list(self._id_to_meta.values())
+        fields = sorted({field for meta in metas for field in meta})
+        columnar = {
+            "fids": fids,
+            "columns": {field: [meta.get(field) for meta in metas] for field in fields},
+        }
         with open(self._meta_file, "w", encoding="utf-8") as f:
-            json.dump(serializable_dict, f)
+            json.dump(columnar, f)
+
+    def _read_meta_file(self) -> dict[int, dict[str, Any]]:
+        """
+        Read the metadata file, either columnar or the older {fid: meta} layout.
+        """
+        with open(self._meta_file, "r", encoding="utf-8") as f:
+            stored_dict = json.load(f)
+
+        if "columns" in stored_dict:
+            columns = stored_dict["columns"]
+            id_to_meta = {}
+            for i, fid in enumerate(stored_dict["fids"]):
+                id_to_meta[fid] = {
+                    field: values[i]
+                    for field, values in columns.items()
+                    if values[i] is not None
+                }
+            return id_to_meta
+
+        # Convert string keys back to int
+        id_to_meta = {}
+        for fid_str, meta in stored_dict.items():
+            # Vectors stored in the metadata by older versions are not needed
+            meta.pop("__vector__", None)
+            id_to_meta[int(fid_str)] = meta
+        return id_to_meta
 
     def _load_faiss_index(self):
         """
         Load the Faiss index + metadata from disk if it exists,
         and rebuild in-memory structures so we can query.
         """
+        self._index = self._new_index()
+        self._id_to_meta = {}
         if not os.path.exists(self._faiss_index_file):
             logger.warning("No existing Faiss index file found. Starting fresh.")
+            self._rebuild_id_maps()
             return
 
         try:
             # Load the Faiss index
-            self._index = faiss.read_index(self._faiss_index_file)
-            # Load metadata
-            with open(self._meta_file, "r", encoding="utf-8") as f:
-                stored_dict = json.load(f)
+            index = faiss.read_index(self._faiss_index_file)
+            if not isinstance(index, faiss.IndexIDMap2):
+                # Index written before stable ids: faiss ids are the positions
+                self._index.add_with_ids(
+                    index.reconstruct_n(0, index.ntotal),
+                    np.arange(index.ntotal, dtype=np.int64),
+                )
+            else:
+                self._index = index
 
-            # Convert string keys back to int
-            self._id_to_meta = {}
-            for fid_str, meta in stored_dict.items():
-                fid = int(fid_str)
-                self._id_to_meta[fid] = meta
+            self._id_to_meta = self._read_meta_file()
 
             logger.info(
                 f"Faiss index loaded with {self._index.ntotal} vectors from {self._faiss_index_file}"
@@ -353,9 +434,21 @@ class FaissVectorDBStorage(BaseVectorStorage):
         except Exception as e:
             logger.error(f"Failed to load Faiss index or metadata: {e}")
             logger.warning("Starting with an empty Faiss index.")
-            self._index = faiss.IndexFlatIP(self._dim)
+            self._index = self._new_index()
             self._id_to_meta = {}
 
+        self._rebuild_id_maps()
+
+    def _rebuild_id_maps(self):
+        """
+        Rebuild the reverse id map, id counter and time index from the metadata.
+        """
+        self._custom_id_to_fid = {
+            meta["__id__"]: fid for fid, meta in self._id_to_meta.items()
+        }
+        self._next_fid = max(self._id_to_meta, default=-1) + 1
+        self._rebuild_temporal_index()
+
     async def index_done_callback(self) -> None:
         async with self._storage_lock:
             # Check if storage was updated by another process
@@ -364,8 +457,6 @@ class FaissVectorDBStorage(BaseVectorStorage):
                 logger.warning(
                     f"Storage for FAISS {self.namespace} was updated by another process, reloading..."
                 )
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
                 self._load_faiss_index()
                 self.storage_updated.value = False
                 return False  # Return error
@@ -456,17 +547,12 @@ class FaissVectorDBStorage(BaseVectorStorage):
         """
         try:
             async with self._storage_lock:
-                # Reset the index
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
-
                 # Remove storage files if they exist
-                if os.path.exists(self._faiss_index_file):
-                    os.remove(self._faiss_index_file)
-                if os.path.exists(self._meta_file):
-                    os.remove(self._meta_file)
+                for file_name in (self._faiss_index_file, self._meta_file):
+                    if os.path.exists(file_name):
+                        os.remove(file_name)
 
-                self._id_to_meta = {}
+                # Reset the index
                 self._load_faiss_index()
 
                 # Notify other processes
@@ -0,0 +1,548 @@
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, final
+
+import numpy as np
+
+from lightrag.utils import (
+    logger,
+    compute_mdhash_id,
+)
+from lightrag.base import BaseVectorStorage
+from lightrag.temporal import TemporalIndex, record_publication_times
+
+from .shared_storage import (
+    get_storage_lock,
+    get_update_flag,
+    set_all_update_flags,
+)
+
+
+@final
+@dataclass
+class MemmapVectorDBStorage(BaseVectorStorage):
+    """
+    Vector storage keeping the vectors in a raw float32 file mapped with np.memmap.
+
+    All worker processes map the same file, so the operating system page cache
+    holds a single copy of the vectors whatever the number of workers. Vectors
+    are appended to the end of the file and never rewritten in place; updated
+    or deleted rows are tombstoned in the metadata side-table and reclaimed by
+    compaction once they make up a large share of the file.
+
+    Files (in working_dir):
+    - vdb_<namespace>.vectors.f32: normalized vectors, one row per record
+      (vdb_<namespace>.vectors.<generation>.f32 once compacted)
+    - vdb_<namespace>.meta.json: row-aligned metadata, null for tombstones,
+      and the generation of the vector file the rows belong to
+
+    The metadata file is the commit point: rows appended after the last
+    index_done_callback are ignored by other processes until it is written.
+    Compaction writes a new vector file generation and only switches to it
+    when the metadata naming it is committed, so a crash at any point leaves
+    a metadata file that matches its vector file.
+    """
+
+    def __post_init__(self):
+        # Initialize basic attributes
+        self._storage_lock = None
+        self.storage_updated = None
+
+        # Use global config value if specified, otherwise use default
+        kwargs = self.global_config.get("vector_db_storage_cls_kwargs", {})
+        cosine_threshold = kwargs.get("cosine_better_than_threshold")
+        if cosine_threshold is None:
+            raise ValueError(
+                "cosine_better_than_threshold must be specified in vector_db_storage_cls_kwargs"
+            )
+        self.cosine_better_than_threshold = cosine_threshold
+        # Share of tombstoned rows above which the vector file is compacted on save
+        self._compact_ratio = kwargs.get("memmap_compact_ratio", 0.25)
+
+        self._working_dir = self.global_config["working_dir"]
+        self._meta_file_name = os.path.join(
+            self._working_dir, f"vdb_{self.namespace}.meta.json"
+        )
+        self._max_batch_size = self.global_config["embedding_batch_num"]
+        self._dim = self.embedding_func.embedding_dim
+
+        # Time index over stored records for time-window queries
+        self._temporal_index = TemporalIndex()
+        self._load()
+
+    # --------------------------------------------------------------------------------
+    # Internal helper methods
+    # --------------------------------------------------------------------------------
+
+    def _vector_file(self, generation: int) -> str:
+        suffix = f".{generation}" if generation else ""
+        return os.path.join(
+            self._working_dir, f"vdb_{self.namespace}.vectors{suffix}.f32"
+        )
+
+    def _remove_stale_vector_files(self):
+        """Remove vector files of other generations (left over by compaction)"""
+        pattern = re.compile(
+            rf"vdb_{re.escape(self.namespace)}\.vectors(\.\d+)?\.f32(\.tmp)?"
+        )
+        current = os.path.basename(self._vector_file_name)
+        for file_name in os.listdir(self._working_dir):
+            if file_name != current and pattern.fullmatch(file_name):
+                try:
+                    os.remove(os.path.join(self._working_dir, file_name))
+                except OSError as e:
+                    # Still mapped by another process on some platforms
+                    logger.debug(f"Could not remove {file_name}: {e}")
+
+    def _load(self):
+        """Map the vector file and read the metadata side-table"""
+        self._rows: list[dict[str, Any] | None] = []
+        self._generation = 0
+        if os.path.exists(self._meta_file_name):
+            with open(self._meta_file_name, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get("embedding_dim", self._dim) != self._dim:
+                raise ValueError(
+                    f"Embedding dim mismatch for {self.namespace}: "
+                    f"stored {stored['embedding_dim']}, expected {self._dim}"
+                )
+            self._rows = stored["rows"]
+            self._generation = stored.get("generation", 0)
+        self._check_vector_file()
+        self._id_to_row = {
+            meta["__id__"]: row
+            for row, meta in enumerate(self._rows)
+            if meta is not None
+        }
+        self._alive = np.array([meta is not None for meta in self._rows], dtype=bool)
+        self._dirty = False
+        self._remap()
+        self._temporal_index.rebuild(
+            (meta["__id__"], record_publication_times(meta))
+            for meta in self._rows
+            if meta is not None
+        )
+        logger.info(
+            f"Process {os.getpid()} memmap vdb {self.namespace} loaded {len(self._id_to_row)} records"
+        )
+
+    @property
+    def _vector_file_name(self) -> str:
+        return self._vector_file(self._generation)
+
+    def _check_vector_file(self):
+        """Make sure the vector file holds every committed row
+
+        Rows appended after the last commit may follow them, but a file shorter
+        than the metadata means the two are out of step.
+        """
+        if not self._rows:
+            return
+        expected = len(self._rows) * self._dim * 4
+        size = (
+            os.path.getsize(self._vector_file_name)
+            if os.path.exists(self._vector_file_name)
+            else 0
+        )
+        if size < expected:
+            raise ValueError(
+                f"Vector file {self._vector_file_name} of {self.namespace} has "
+                f"{size // (self._dim * 4)} rows, metadata expects {len(self._rows)}"
+            )
+
+    def _remap(self):
+        """(Re)map the first len(self._rows) vectors of the file"""
+        if not self._rows:
+            self._vectors = np.empty((0, self._dim), dtype=np.float32)
+            return
+        self._vectors = np.memmap(
+            self._vector_file_name,
+            dtype=np.float32,
+            mode="r",
+            shape=(len(self._rows), self._dim),
+        )
+
+    def _append(self, metas: list[dict[str, Any]], embeddings: np.ndarray):
+        """Append normalized vectors after the committed rows and tombstone old rows"""
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = (embeddings / np.where(norms == 0, 1, norms)).astype(np.float32)
+
+        mode = "r+b" if os.path.exists(self._vector_file_name) else "w+b"
+        with open(self._vector_file_name, mode) as f:
+            f.seek(len(self._rows) * self._dim * 4)
+            f.write(embeddings.tobytes())
+
+        for meta in metas:
+            old_row = self._id_to_row.get(meta["__id__"])
+            if old_row is not None:
+                self._rows[old_row] = None
+                self._alive[old_row] = False
+            self._id_to_row[meta["__id__"]] = len(self._rows)
+            self._rows.append(meta)
+            self._temporal_index.add(meta["__id__"], record_publication_times(meta))
+        self._alive = np.concatenate([self._alive, np.ones(len(metas), dtype=bool)])
+        self._dirty = True
+        self._remap()
+
+    def _tombstone(self, ids: list[str]) -> int:
+        deleted = 0
+        for id in ids:
+            row = self._id_to_row.pop(id, None)
+            if row is None:
+                continue
+            self._rows[row] = None
+            self._alive[row] = False
+            self._temporal_index.remove(id)
+            deleted += 1
+        if deleted:
+            self._dirty = True
+        return deleted
+
+    def _compact(self):
+        """Write the live rows to the vector file of the next generation
+
+        The new file is only used by anyone once _save commits the metadata
+        naming its generation; until then the current file stays untouched.
+        """
+        keep = np.flatnonzero(self._alive)
+        new_file_name = self._vector_file(self._generation + 1)
+        with open(new_file_name, "wb") as f:
+            # Copy in slices to keep memory bounded for large files
+            for start in range(0, len(keep), 65536):
+                f.write(
+                    np.ascontiguousarray(
+                        self._vectors[keep[start : start + 65536]]
+                    ).tobytes()
+                )
+            f.flush()
+            os.fsync(f.fileno())
+        # Other processes keep their mapping of the old file until they reload
+        self._generation += 1
+        self._rows = [self._rows[row] for row in keep]
+        self._id_to_row = {meta["__id__"]: row for row, meta in enumerate(self._rows)}
+        self._alive = np.ones(len(self._rows), dtype=bool)
+        self._remap()
+        logger.info(f"Compacted memmap vdb {self.namespace} to {len(self._rows)} rows")
+
+    def _save(self):
+        tombstones = len(self._rows) - len(self._id_to_row)
+        compacted = tombstones and tombstones >= self._compact_ratio * len(self._rows)
+        if compacted:
+            self._compact()
+        tmp_file_name = self._meta_file_name + ".tmp"
+        with open(tmp_file_name, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "embedding_dim": self._dim,
+                    "generation": self._generation,
+                    "rows": self._rows,
+                },
+                f,
+            )
+        os.replace(tmp_file_name, self._meta_file_name)
+        if compacted:
+            self._remove_stale_vector_files()
+        self._dirty = False
+
+    def _search(
+        self, embedding: np.ndarray, top_k: int, rows: np.ndarray | None = None
+    ) -> list[dict[str, Any]]:
+        """Cosine top-k over all live rows, or over the given candidate rows"""
+        if rows is None:
+            rows = np.flatnonzero(self._alive)
+        if not len(rows) or top_k <= 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        query = query / (np.linalg.norm(query) or 1)
+        if 2 * len(rows) > len(self._rows):
+            # Scoring the whole mapping avoids copying most rows out of it
+            scores = (self._vectors @ query)[rows]
+        else:
+            scores = self._vectors[rows] @ query
+
+        k = min(top_k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for i in top:
+            score = float(scores[i])
+            if score < self.cosine_better_than_threshold:
+                break
+            meta = self._rows[rows[i]]
+            results.append(
+                {
+                    **meta,
+                    "id": meta["__id__"],
+                    "distance": score,
+                    "created_at": meta.get("__created_at__"),
+                }
+            )
+        return results
+
+    # --------------------------------------------------------------------------------
+
+    async def initialize(self):
+        """Initialize storage data"""
+        # Get the update flag for cross-process update notification
+        self.storage_updated = await get_update_flag(self.namespace)
+        # Get the storage lock for use in other methods
+        self._storage_lock = get_storage_lock(enable_logging=False)
+
+    async def _check_reload(self):
+        """Reload the side-table and remap the vectors if another process saved"""
+        async with self._storage_lock:
+            if self.storage_updated.value:
+                logger.info(
+                    f"Process {os.getpid()} reloading {self.namespace} due to update by another process"
+                )
+                self._load()
+                self.storage_updated.value = False
+
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
+        """
+        Importance notes:
+        1. Vectors are appended immediately, the metadata is committed during the
+           next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        logger.debug(f"Inserting {len(data)} to {self.namespace}")
+        if not data:
+            return
+
+        current_time = int(time.time())
+        list_data = [
+            {
+                "__id__": k,
+                "__created_at__": current_time,
+                **{k1: v1 for k1, v1 in v.items() if k1 in self.meta_fields},
+            }
+            for k, v in data.items()
+        ]
+        contents = [v["content"] for v in data.values()]
+        batches = [
+            contents[i : i + self._max_batch_size]
+            for i in range(0, len(contents), self._max_batch_size)
+        ]
+
+        # Execute embedding outside of lock to avoid long lock times
+        embedding_tasks = [self.embedding_func(batch) for batch in batches]
+        embeddings_list = await asyncio.gather(*embedding_tasks)
+
+        embeddings = np.concatenate(embeddings_list)
+        if len(embeddings) != len(list_data):
+            # sometimes the embedding is not returned correctly. just log it.
+            logger.error(
+                f"embedding is not 1-1 with data, {len(embeddings)} != {len(list_data)}"
+            )
+            return
+
+        await self._check_reload()
+        async with self._storage_lock:
+            self._append(list_data, embeddings)
+        return [d["__id__"] for d in list_data]
+
+    async def query(
+        self, query: str, top_k: int, ids: list[str] | None = None
+    ) -> list[dict[str, Any]]:
+        # Execute embedding outside of lock to avoid improve cocurrent
+        embedding = await self.embedding_func(
+            [query], _priority=5
+        )  # higher priority for query
+        await self._check_reload()
+        return self._search(embedding[0], top_k)
+
+    async def query_in_time_range(
+        self,
+        query: str,
+        top_k: int,
+        time_from: int | None = None,
+        time_to: int | None = None,
+        ids: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Cosine search restricted to the records inside [time_from, time_to]
+
+        Only the rows of the time window are scored.
+        """
+        if time_from is None and time_to is None:
+            return await self.query(query, top_k=top_k, ids=ids)
+
+        embedding = await self.embedding_func(
+            [query], _priority=5
+        )  # higher priority for query
+        await self._check_reload()
+        rows = np.array(
+            [
+                self._id_to_row[id]
+                for id in self._temporal_index.window(time_from, time_to)
+                if id in self._id_to_row
+            ],
+            dtype=np.int64,
+        )
+        return self._search(embedding[0], top_k, rows=rows)
+
+    @property
+    async def client_storage(self):
+        await self._check_reload()
+        return {"data": [meta for meta in self._rows if meta is not None]}
+
+    async def delete(self, ids: list[str]):
+        """Delete vectors with specified IDs
+
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+
+        Args:
+            ids: List of vector IDs to be deleted
+        """
+        await self._check_reload()
+        async with self._storage_lock:
+            deleted = self._tombstone(ids)
+        logger.debug(f"Successfully deleted {deleted} vectors from {self.namespace}")
+
+    async def delete_entity(self, entity_name: str) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        entity_id = compute_mdhash_id(entity_name, prefix="ent-")
+        logger.debug(f"Attempting to delete entity {entity_name} with ID {entity_id}")
+        await self.delete([entity_id])
+
+    async def delete_entity_relation(self, entity_name: str) -> None:
+        """
+        Importance notes:
+        1. Changes will be persisted to disk during the next index_done_callback
+        2. Only one process should updating the storage at a time before index_done_callback,
+           KG-storage-log should be used to avoid data corruption
+        """
+        await self._check_reload()
+        ids_to_delete = [
+            meta["__id__"]
+            for meta in self._rows
+            if meta is not None
+            and (meta.get("src_id") == entity_name or meta.get("tgt_id") == entity_name)
+        ]
+        logger.debug(f"Found {len(ids_to_delete)} relations for entity {entity_name}")
+        if ids_to_delete:
+            await self.delete(ids_to_delete)
+
+    async def index_done_callback(self) -> bool:
+        """Commit the metadata side-table (vectors are already on disk)"""
+        async with self._storage_lock:
+            # Check if storage was updated by another process
+            if self.storage_updated.value:
+                # Storage was updated by another process, reload data instead of saving
+                logger.warning(
+                    f"Storage for {self.namespace} was updated by another process, reloading..."
+                )
+                self._load()
+                # Reset update flag
+                self.storage_updated.value = False
+                return False  # Return error
+
+        # Acquire lock and perform persistence
+        async with self._storage_lock:
+            if not self._dirty:
+                return True
+            try:
+                self._save()
+                # Notify other processes that data has been updated
+                await set_all_update_flags(self.namespace)
+                # Reset own update flag to avoid self-reloading
+                self.storage_updated.value = False
+                return True  # Return success
+            except Exception as e:
+                logger.error(f"Error saving data for {self.namespace}: {e}")
+                return False  # Return error
+
+    async def get_by_id(self, id: str) -> dict[str, Any] | None:
+        """Get vector data by its ID
+
+        Args:
+            id: The unique identifier of the vector
+
+        Returns:
+            The vector data if found, or None if not found
+        """
+        await self._check_reload()
+        row = self._id_to_row.get(id)
+        if row is None:
+            return None
+        meta = self._rows[row]
+        return {
+            **meta,
+            "id": meta["__id__"],
+            "created_at": meta.get("__created_at__"),
+        }
+
+    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
+        """Get multiple vector data by their IDs
+
+        Args:
+            ids: List of unique identifiers
+
+        Returns:
+            List of vector data objects that were found
+        """
+        if not ids:
+            return []
+
+        await self._check_reload()
+        results = []
+        for id in ids:
+            row = self._id_to_row.get(id)
+            if row is not None:
+                meta = self._rows[row]
+                results.append(
+                    {
+                        **meta,
+                        "id": meta["__id__"],
+                        "created_at": meta.get("__created_at__"),
+                    }
+                )
+        return results
+
+    async def drop(self) -> dict[str, str]:
+        """Drop all vector data from storage and clean up resources
+
+        This method will:
+        1. Remove the vector and metadata files if they exist
+        2. Reset the in-memory state
+        3. Update flags to notify other processes
+        4. Changes is persisted to disk immediately
+
+        Returns:
+            dict[str, str]: Operation status and message
+            - On success: {"status": "success", "message": "data dropped"}
+            - On failure: {"status": "error", "message": "<error details>"}
+        """
+        try:
+            async with self._storage_lock:
+                if os.path.exists(self._meta_file_name):
+                    os.remove(self._meta_file_name)
+                self._load()
+                if os.path.exists(self._vector_file_name):
+                    os.remove(self._vector_file_name)
+                self._remove_stale_vector_files()
+
+                # Notify other processes that data has been updated
+                await set_all_update_flags(self.namespace)
+                # Reset own update flag to avoid self-reloading
+                self.storage_updated.value = False
+
+                logger.info(
+                    f"Process {os.getpid()} drop {self.namespace}(file:{self._vector_file_name})"
+                )
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"Error dropping {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
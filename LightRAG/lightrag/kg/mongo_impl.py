@@ -100,7 +100,11 @@ class MongoKVStorage(BaseKVStorage):
 
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
         cursor = self._data.find({"_id": {"$in": ids}})
-        return await cursor.to_list()
+        docs_by_id = {doc["_id"]: doc for doc in await cursor.to_list()}
+        return [docs_by_id.get(id) for id in ids]
+
+    async def get_all(self) -> dict[str, Any]:
+        return {doc["_id"]: doc async for doc in self._data.find({})}
 
     async def filter_keys(self, keys: set[str]) -> set[str]:
         cursor = self._data.find({"_id": {"$in": list(keys)}}, {"_id": 1})
@@ -237,7 +241,8 @@ class MongoDocStatusStorage(DocStatusStorage):
 
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
         cursor = self._data.find({"_id": {"$in": ids}})
-        return await cursor.to_list()
+        docs_by_id = {doc["_id"]: doc for doc in await cursor.to_list()}
+        return [docs_by_id.get(id) for id in ids]
 
     async def filter_keys(self, data: set[str]) -> set[str]:
         cursor = self._data.find({"_id": {"$in": list(data)}}, {"_id": 1})
@@ -251,9 +256,21 @@ class MongoDocStatusStorage(DocStatusStorage):
         update_tasks: list[Any] = []
         for k, v in data.items():
             data[k]["_id"] = k
-            update_tasks.append(
-                self._data.update_one({"_id": k}, {"$set": v}, upsert=True)
-            )
+            update = {"$set": v}
+            # $set keeps fields missing from v, drop the chunk checkpoints
+            # once the document no longer needs them
+            if v.get("status") == DocStatus.PROCESSED or (
+                "chunk_extractions" in v and v["chunk_extractions"] is None
+            ):
+                update = {
+                    "$set": {
+                        key: value
+                        for key, value in v.items()
+                        if key != "chunk_extractions"
+                    },
+                    "$unset": {"chunk_extractions": ""},
+                }
+            update_tasks.append(self._data.update_one({"_id": k}, update, upsert=True))
         await asyncio.gather(*update_tasks)
 
     async def get_status_counts(self) -> dict[str, int]:
@@ -282,6 +299,8 @@ class MongoDocStatusStorage(DocStatusStorage):
                 updated_at=doc.get("updated_at"),
                 chunks_count=doc.get("chunks_count", -1),
                 file_path=doc.get("file_path", doc["_id"]),
+                metadata=doc.get("metadata", {}),
+                chunk_extractions=doc.get("chunk_extractions"),
             )
             for doc in result
         }
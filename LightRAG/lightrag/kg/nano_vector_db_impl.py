@@ -11,6 +11,7 @@ from lightrag.utils import (
 )
 import pipmaster as pm
 from lightrag.base import BaseVectorStorage
+from lightrag.temporal import TemporalIndex, record_publication_times
 
 if not pm.is_installed("nano-vectordb"):
     pm.install("nano-vectordb")
@@ -50,6 +51,36 @@ class NanoVectorDBStorage(BaseVectorStorage):
             self.embedding_func.embedding_dim,
             storage_file=self._client_file_name,
         )
+        # Time index over stored records for time-window queries
+        self._temporal_index = TemporalIndex()
+        # Row position of every id, built on demand and dropped on every write
+        self._id_to_row: dict[str, int] | None = None
+        self._rebuild_temporal_index()
+
+    def _rebuild_temporal_index(self):
+        """Rebuild the time index from the records held by the current client"""
+        storage = getattr(self._client, "_NanoVectorDB__storage")
+        self._temporal_index.rebuild(
+            (dp["__id__"], record_publication_times(dp)) for dp in storage["data"]
+        )
+        self._id_to_row = None
+
+    def _window_rows(
+        self, storage: dict[str, Any], time_from: int | None, time_to: int | None
+    ) -> np.ndarray:
+        """Matrix rows of the records inside [time_from, time_to]
+
+        Ids the time index still holds but the client no longer stores are skipped.
+        """
+        if self._id_to_row is None:
+            self._id_to_row = {
+                dp["__id__"]: row for row, dp in enumerate(storage["data"])
+            }
+        rows = [
+            self._id_to_row.get(id)
+            for id in self._temporal_index.window(time_from, time_to)
+        ]
+        return np.array([row for row in rows if row is not None], dtype=np.intp)
 
     async def initialize(self):
         """Initialize storage data"""
@@ -72,6 +103,7 @@ class NanoVectorDBStorage(BaseVectorStorage):
                     self.embedding_func.embedding_dim,
                     storage_file=self._client_file_name,
                 )
+                self._rebuild_temporal_index()
                 # Reset update flag
                 self.storage_updated.value = False
 
@@ -114,6 +146,9 @@ class NanoVectorDBStorage(BaseVectorStorage):
                 d["__vector__"] = embeddings[i]
             client = await self._get_client()
             results = client.upsert(datas=list_data)
+            self._id_to_row = None
+            for d in list_data:
+                self._temporal_index.add(d["__id__"], record_publication_times(d))
             return results
         else:
             # sometimes the embedding is not returned correctly. just log it.
@@ -136,6 +171,54 @@ class NanoVectorDBStorage(BaseVectorStorage):
             top_k=top_k,
             better_than_threshold=self.cosine_better_than_threshold,
         )
+        return self._format_query_results(results)
+
+    async def query_in_time_range(
+        self,
+        query: str,
+        top_k: int,
+        time_from: int | None = None,
+        time_to: int | None = None,
+        ids: list[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Cosine search restricted to the records inside [time_from, time_to]
+
+        Candidate rows come from the time index, so records outside the window
+        are never scored and top_k is filled from the window only.
+        """
+        if time_from is None and time_to is None:
+            return await self.query(query, top_k=top_k, ids=ids)
+
+        # Execute embedding outside of lock to avoid improve cocurrent
+        embedding = await self.embedding_func(
+            [query], _priority=5
+        )  # higher priority for query
+        embedding = embedding[0]
+
+        client = await self._get_client()
+        storage = getattr(client, "_NanoVectorDB__storage")
+        rows = self._window_rows(storage, time_from, time_to)
+        if not len(rows) or top_k <= 0:
+            return []
+
+        # Stored vectors are normalized by the client, only the query needs it
+        query_vector = np.asarray(embedding, dtype=np.float32).ravel()
+        query_vector = query_vector / (np.linalg.norm(query_vector) or 1)
+        scores = storage["matrix"][rows] @ query_vector
+        k = min(top_k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for i in top:
+            if scores[i] < self.cosine_better_than_threshold:
+                break
+            results.append(
+                {**storage["data"][rows[i]], "__metrics__": float(scores[i])}
+            )
+        return self._format_query_results(results)
+
+    @staticmethod
+    def _format_query_results(results: list[dict[str, Any]]) -> list[dict[str, Any]]:
         results = [
             {
                 **dp,
@@ -166,6 +249,9 @@ class NanoVectorDBStorage(BaseVectorStorage):
         try:
             client = await self._get_client()
             client.delete(ids)
+            self._id_to_row = None
+            for id in ids:
+                self._temporal_index.remove(id)
             logger.debug(
                 f"Successfully deleted {len(ids)} vectors from {self.namespace}"
             )
@@ -190,6 +276,8 @@ class NanoVectorDBStorage(BaseVectorStorage):
             client = await self._get_client()
             if client.get([entity_id]):
                 client.delete([entity_id])
+                self._id_to_row = None
+                self._temporal_index.remove(entity_id)
                 logger.debug(f"Successfully deleted entity {entity_name}")
             else:
                 logger.debug(f"Entity {entity_name} not found in storage")
@@ -218,6 +306,9 @@ class NanoVectorDBStorage(BaseVectorStorage):
             if ids_to_delete:
                 client = await self._get_client()
                 client.delete(ids_to_delete)
+                self._id_to_row = None
+                for id in ids_to_delete:
+                    self._temporal_index.remove(id)
                 logger.debug(
                     f"Deleted {len(ids_to_delete)} relations for {entity_name}"
                 )
@@ -239,6 +330,7 @@ class NanoVectorDBStorage(BaseVectorStorage):
                     self.embedding_func.embedding_dim,
                     storage_file=self._client_file_name,
                 )
+                self._rebuild_temporal_index()
                 # Reset update flag
                 self.storage_updated.value = False
                 return False  # Return error
@@ -328,6 +420,7 @@ class NanoVectorDBStorage(BaseVectorStorage):
                     self.embedding_func.embedding_dim,
                     storage_file=self._client_file_name,
                 )
+                self._rebuild_temporal_index()
 
                 # Notify other processes that data has been updated
                 await set_all_update_flags(self.namespace)
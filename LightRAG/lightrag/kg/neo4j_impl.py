@@ -1,6 +1,7 @@
 import inspect
 import os
 import re
+from collections import defaultdict
 from dataclasses import dataclass
 from typing import final
 import configparser
@@ -838,6 +839,110 @@ class Neo4JStorage(BaseGraphStorage):
             logger.error(f"Error during edge upsert: {str(e)}")
             raise
 
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type(
+            (
+                neo4jExceptions.ServiceUnavailable,
+                neo4jExceptions.TransientError,
+                neo4jExceptions.WriteServiceUnavailable,
+                neo4jExceptions.ClientError,
+            )
+        ),
+    )
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
+        """
+        Upsert several nodes in a single transaction using UNWIND.
+
+        Labels cannot be parameterized, so one statement is run per entity type.
+
+        Args:
+            nodes: Dictionary of node_id -> node properties
+        """
+        if not nodes:
+            return
+        nodes_by_type = defaultdict(list)
+        for node_id, properties in nodes.items():
+            if "entity_id" not in properties:
+                raise ValueError(
+                    "Neo4j: node properties must contain an 'entity_id' field"
+                )
+            nodes_by_type[properties["entity_type"]].append(
+                {"entity_id": node_id, "properties": properties}
+            )
+
+        try:
+            async with self._driver.session(database=self._DATABASE) as session:
+
+                async def execute_upsert(tx: AsyncManagedTransaction):
+                    for entity_type, batch in nodes_by_type.items():
+                        query = (
+                            """
+                        UNWIND $batch AS item
+                        MERGE (n:base {entity_id: item.entity_id})
+                        SET n += item.properties
+                        SET n:`%s`
+                        """
+                            % entity_type
+                        )
+                        result = await tx.run(query, batch=batch)
+                        await result.consume()  # Ensure result is fully consumed
+                    logger.debug(f"Upserted {len(nodes)} nodes")
+
+                await session.execute_write(execute_upsert)
+        except Exception as e:
+            logger.error(f"Error during batch upsert: {str(e)}")
+            raise
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type(
+            (
+                neo4jExceptions.ServiceUnavailable,
+                neo4jExceptions.TransientError,
+                neo4jExceptions.WriteServiceUnavailable,
+                neo4jExceptions.ClientError,
+            )
+        ),
+    )
+    async def upsert_edges_batch(
+        self, edges: list[tuple[str, str, dict[str, str]]]
+    ) -> None:
+        """
+        Upsert several edges in a single transaction using UNWIND.
+
+        Args:
+            edges: List of (source_node_id, target_node_id, edge properties)
+        """
+        if not edges:
+            return
+        batch = [
+            {"src": source_node_id, "tgt": target_node_id, "properties": properties}
+            for source_node_id, target_node_id, properties in edges
+        ]
+        try:
+            async with self._driver.session(database=self._DATABASE) as session:
+
+                async def execute_upsert(tx: AsyncManagedTransaction):
+                    query = """
+                    UNWIND $batch AS item
+                    MATCH (source:base {entity_id: item.src})
+                    WITH source, item
+                    MATCH (target:base {entity_id: item.tgt})
+                    MERGE (source)-[r:DIRECTED]-(target)
+                    SET r += item.properties
+                    """
+                    result = await tx.run(query, batch=batch)
+                    await result.consume()  # Ensure result is fully consumed
+                    logger.debug(f"Upserted {len(batch)} edges")
+
+                await session.execute_write(execute_upsert)
+        except Exception as e:
+            logger.error(f"Error during batch edge upsert: {str(e)}")
+            raise
+
     async def get_knowledge_graph(
         self,
         node_label: str,
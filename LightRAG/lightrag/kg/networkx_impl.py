@@ -4,7 +4,8 @@ from typing import final
 
 from lightrag.types import KnowledgeGraph, KnowledgeGraphNode, KnowledgeGraphEdge
 from lightrag.utils import logger
-from lightrag.base import BaseGraphStorage
+from lightrag.base import BaseGraphStorage, GraphTimeWindow
+from lightrag.temporal import to_epoch
 
 import pipmaster as pm
 
@@ -31,6 +32,58 @@ load_dotenv(dotenv_path=".env", override=False)
 MAX_GRAPH_NODES = int(os.getenv("MAX_GRAPH_NODES", 1000))
 
 
+class NetworkXTimeWindow(GraphTimeWindow):
+    """Time window evaluated through a networkx subgraph view
+
+    nx.subgraph_view filters edges lazily while iterating adjacency, so the
+    window costs nothing to create and never copies nodes or edges.
+    """
+
+    async def _get_view(self) -> nx.Graph:
+        graph = await self.storage._get_graph()
+        return nx.subgraph_view(
+            graph,
+            filter_edge=lambda u, v: self.edge_in_window(graph.edges[u, v]),
+        )
+
+    async def has_edge(self, source_node_id: str, target_node_id: str) -> bool:
+        view = await self._get_view()
+        return view.has_edge(source_node_id, target_node_id)
+
+    async def get_edge(
+        self, source_node_id: str, target_node_id: str
+    ) -> dict[str, str] | None:
+        view = await self._get_view()
+        return view.edges.get((source_node_id, target_node_id))
+
+    async def get_node_edges(self, source_node_id: str) -> list[tuple[str, str]] | None:
+        view = await self._get_view()
+        if view.has_node(source_node_id):
+            return list(view.edges(source_node_id))
+        return None
+
+    async def get_nodes_edges_batch(
+        self, node_ids: list[str]
+    ) -> dict[str, list[tuple[str, str]]]:
+        view = await self._get_view()
+        return {
+            node_id: list(view.edges(node_id)) if view.has_node(node_id) else []
+            for node_id in node_ids
+        }
+
+    async def node_degree(self, node_id: str) -> int:
+        view = await self._get_view()
+        return view.degree(node_id)
+
+    async def node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
+        view = await self._get_view()
+        return {node_id: view.degree(node_id) for node_id in node_ids}
+
+    async def edge_degree(self, src_id: str, tgt_id: str) -> int:
+        view = await self._get_view()
+        return view.degree(src_id) + view.degree(tgt_id)
+
+
 @final
 @dataclass
 class NetworkXStorage(BaseGraphStorage):
@@ -122,6 +175,13 @@ class NetworkXStorage(BaseGraphStorage):
             return list(graph.edges(source_node_id))
         return None
 
+    def window(
+        self, time_from: int | str | None = None, time_to: int | str | None = None
+    ) -> GraphTimeWindow:
+        return NetworkXTimeWindow(
+            self, to_epoch(time_from), to_epoch(time_to, end_of_day=True)
+        )
+
     async def upsert_node(self, node_id: str, node_data: dict[str, str]) -> None:
         """
         Importance notes:
@@ -159,6 +159,20 @@ class PostgreSQLDB:
                     # Log error but don't interrupt the process
                     logger.warning(f"Failed to migrate {table_name}.{column_name}: {e}")
 
+    async def _migrate_added_columns(self):
+        """Add the columns introduced after the tables were first created"""
+        for table_name, columns in TABLE_ADDED_COLUMNS.items():
+            for column_name, column_type in columns.items():
+                try:
+                    await self.execute(
+                        f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS {column_name} {column_type}"
+                    )
+                except Exception as e:
+                    # Log error but don't interrupt the process
+                    logger.warning(
+                        f"Failed to add column {table_name}.{column_name}: {e}"
+                    )
+
     async def check_tables(self):
         # First create all tables
         for k, v in TABLES.items():
@@ -203,6 +217,11 @@ class PostgreSQLDB:
             logger.error(f"PostgreSQL, Failed to migrate timestamp columns: {e}")
             # Don't throw an exception, allow the initialization process to continue
 
+        try:
+            await self._migrate_added_columns()
+        except Exception as e:
+            logger.error(f"PostgreSQL, Failed to add new columns: {e}")
+
     async def query(
         self,
         sql: str,
@@ -279,6 +298,29 @@ class PostgreSQLDB:
             logger.error(f"PostgreSQL database,\nsql:{sql},\ndata:{data},\nerror:{e}")
             raise
 
+    async def execute_batch(
+        self,
+        sqls: list[str],
+        with_age: bool = False,
+        graph_name: str | None = None,
+    ):
+        """Execute several statements on one connection in a single transaction"""
+        try:
+            async with self.pool.acquire() as connection:  # type: ignore
+                if with_age and graph_name:
+                    await self.configure_age(connection, graph_name)  # type: ignore
+                elif with_age and not graph_name:
+                    raise ValueError("Graph name is required when with_age is True")
+
+                async with connection.transaction():
+                    for sql in sqls:
+                        await connection.execute(sql)  # type: ignore
+        except Exception as e:
+            logger.error(
+                f"PostgreSQL database, batch of {len(sqls)} statements,\nerror:{e}"
+            )
+            raise
+
 
 class ClientManager:
     _instances: dict[str, Any] = {"db": None, "ref_count": 0}
@@ -362,6 +404,13 @@ class PGKVStorage(BaseKVStorage):
             await ClientManager.release_client(self.db)
             self.db = None
 
+    @staticmethod
+    def _decode_row(row: dict[str, Any]) -> dict[str, Any]:
+        """Parse the JSONB columns returned as text by asyncpg"""
+        if isinstance(row.get("extracted"), str):
+            row["extracted"] = json.loads(row["extracted"])
+        return row
+
     ################ QUERY METHODS ################
     async def get_all(self) -> dict[str, Any]:
         """Get all data from storage
@@ -389,7 +438,7 @@ class PGKVStorage(BaseKVStorage):
                     result_dict[mode][row["id"]] = row
                 return result_dict
             else:
-                return {row["id"]: row for row in results}
+                return {row["id"]: self._decode_row(row) for row in results}
         except Exception as e:
             logger.error(f"Error retrieving all data from {self.namespace}: {e}")
             return {}
@@ -406,7 +455,7 @@ class PGKVStorage(BaseKVStorage):
             return res if res else None
         else:
             response = await self.db.query(sql, params)
-            return response if response else None
+            return self._decode_row(response) if response else None
 
     async def get_by_mode_and_id(self, mode: str, id: str) -> Union[dict, None]:
         """Specifically for llm_response_cache."""
@@ -441,7 +490,9 @@ class PGKVStorage(BaseKVStorage):
                 dict_res[row["mode"]][row["id"]] = row
             return [{k: v} for k, v in dict_res.items()]
         else:
-            return await self.db.query(sql, params, multirows=True)
+            rows = await self.db.query(sql, params, multirows=True) or []
+            rows_by_id = {row["id"]: self._decode_row(row) for row in rows}
+            return [rows_by_id.get(id) for id in ids]
 
     async def get_by_status(self, status: str) -> Union[list[dict[str, Any]], None]:
         """Specifically for llm_response_cache."""
@@ -477,7 +528,21 @@ class PGKVStorage(BaseKVStorage):
             return
 
         if is_namespace(self.namespace, NameSpace.KV_STORE_TEXT_CHUNKS):
-            pass
+            # Chunk rows are written by the chunks vector storage, only the
+            # near-duplicate detection fields are stored from here
+            for k, v in data.items():
+                if v.get("simhash") is None:
+                    continue
+                upsert_sql = SQL_TEMPLATES["upsert_chunk_dedup"]
+                _data = {
+                    "workspace": self.db.workspace,
+                    "id": k,
+                    "simhash": v["simhash"],
+                    "extracted": json.dumps(v["extracted"])
+                    if v.get("extracted") is not None
+                    else None,
+                }
+                await self.db.execute(upsert_sql, _data)
         elif is_namespace(self.namespace, NameSpace.KV_STORE_FULL_DOCS):
             for k, v in data.items():
                 upsert_sql = SQL_TEMPLATES["upsert_doc_full"]
@@ -914,6 +979,13 @@ class PGDocStatusStorage(DocStatusStorage):
             )
             raise
 
+    @staticmethod
+    def _decode_json(value: Any, default: Any = None) -> Any:
+        """Parse a JSONB column returned as text by asyncpg"""
+        if value is None:
+            return default
+        return json.loads(value) if isinstance(value, str) else value
+
     async def get_by_id(self, id: str) -> Union[dict[str, Any], None]:
         sql = "select * from LIGHTRAG_DOC_STATUS where workspace=$1 and id=$2"
         params = {"workspace": self.db.workspace, "id": id}
@@ -930,6 +1002,8 @@ class PGDocStatusStorage(DocStatusStorage):
                 created_at=result[0]["created_at"],
                 updated_at=result[0]["updated_at"],
                 file_path=result[0]["file_path"],
+                metadata=self._decode_json(result[0]["metadata"], {}),
+                chunk_extractions=self._decode_json(result[0]["chunk_extractions"]),
             )
 
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
@@ -942,8 +1016,7 @@ class PGDocStatusStorage(DocStatusStorage):
 
         results = await self.db.query(sql, params, True)
 
-        if not results:
-            return []
+        rows_by_id = {row["id"]: row for row in results or []}
         return [
             {
                 "content": row["content"],
@@ -954,8 +1027,12 @@ class PGDocStatusStorage(DocStatusStorage):
                 "created_at": row["created_at"],
                 "updated_at": row["updated_at"],
                 "file_path": row["file_path"],
+                "metadata": self._decode_json(row["metadata"], {}),
+                "chunk_extractions": self._decode_json(row["chunk_extractions"]),
             }
-            for row in results
+            if (row := rows_by_id.get(id)) is not None
+            else None
+            for id in ids
         ]
 
     async def get_status_counts(self) -> dict[str, int]:
@@ -987,6 +1064,8 @@ class PGDocStatusStorage(DocStatusStorage):
                 updated_at=element["updated_at"],
                 chunks_count=element["chunks_count"],
                 file_path=element["file_path"],
+                metadata=self._decode_json(element["metadata"], {}),
+                chunk_extractions=self._decode_json(element["chunk_extractions"]),
             )
             for element in result
         }
@@ -1055,8 +1134,8 @@ class PGDocStatusStorage(DocStatusStorage):
 
         # Modified SQL to include created_at and updated_at in both INSERT and UPDATE operations
         # Both fields are updated from the input data in both INSERT and UPDATE cases
-        sql = """insert into LIGHTRAG_DOC_STATUS(workspace,id,content,content_summary,content_length,chunks_count,status,file_path,created_at,updated_at)
-                 values($1,$2,$3,$4,$5,$6,$7,$8,$9,$10)
+        sql = """insert into LIGHTRAG_DOC_STATUS(workspace,id,content,content_summary,content_length,chunks_count,status,file_path,metadata,chunk_extractions,created_at,updated_at)
+                 values($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,$12)
                   on conflict(id,workspace) do update set
                   content = EXCLUDED.content,
                   content_summary = EXCLUDED.content_summary,
@@ -1064,6 +1143,9 @@ class PGDocStatusStorage(DocStatusStorage):
                   chunks_count = EXCLUDED.chunks_count,
                   status = EXCLUDED.status,
                   file_path = EXCLUDED.file_path,
+                  metadata = EXCLUDED.metadata,
+                  chunk_extractions = CASE WHEN EXCLUDED.status = 'processed' THEN NULL
+                      ELSE COALESCE(EXCLUDED.chunk_extractions, LIGHTRAG_DOC_STATUS.chunk_extractions) END,
                   created_at = EXCLUDED.created_at,
                   updated_at = EXCLUDED.updated_at"""
         for k, v in data.items():
@@ -1083,6 +1165,11 @@ class PGDocStatusStorage(DocStatusStorage):
                     "chunks_count": v["chunks_count"] if "chunks_count" in v else -1,
                     "status": v["status"],
                     "file_path": v["file_path"],
+                    "metadata": json.dumps(v.get("metadata") or {}),
+                    # Checkpoints are kept until the document is processed
+                    "chunk_extractions": json.dumps(v["chunk_extractions"])
+                    if v.get("chunk_extractions") is not None
+                    else None,
                     "created_at": created_at,  # Use the converted datetime object
                     "updated_at": updated_at,  # Use the converted datetime object
                 },
@@ -1131,6 +1218,8 @@ class PGGraphStorage(BaseGraphStorage):
     def __post_init__(self):
         self.graph_name = self.namespace or os.environ.get("AGE_GRAPH_NAME", "lightrag")
         self.db: PostgreSQLDB | None = None
+        # Max upserts committed in one transaction by the batch methods
+        self._upsert_batch_size = 500
 
     @staticmethod
     def _normalize_node_id(node_id: str) -> str:
@@ -1485,6 +1574,16 @@ class PGGraphStorage(BaseGraphStorage):
             node_id: The unique identifier for the node (used as label)
             node_data: Dictionary of node properties
         """
+        query = self._upsert_node_query(node_id, node_data)
+
+        try:
+            await self._query(query, readonly=False, upsert=True)
+
+        except Exception:
+            logger.error(f"POSTGRES, upsert_node error on node_id: `{node_id}`")
+            raise
+
+    def _upsert_node_query(self, node_id: str, node_data: dict[str, str]) -> str:
         if "entity_id" not in node_data:
             raise ValueError(
                 "PostgreSQL: node properties must contain an 'entity_id' field"
@@ -1493,7 +1592,7 @@ class PGGraphStorage(BaseGraphStorage):
         label = self._normalize_node_id(node_id)
         properties = self._format_properties(node_data)
 
-        query = """SELECT * FROM cypher('%s', $$
+        return """SELECT * FROM cypher('%s', $$
                      MERGE (n:base {entity_id: "%s"})
                      SET n += %s
                      RETURN n
@@ -1503,12 +1602,43 @@ class PGGraphStorage(BaseGraphStorage):
             properties,
         )
 
-        try:
-            await self._query(query, readonly=False, upsert=True)
+    async def _execute_batch(self, queries: list[str]) -> None:
+        """Run graph queries in one transaction per _upsert_batch_size queries"""
+        for i in range(0, len(queries), self._upsert_batch_size):
+            try:
+                await self.db.execute_batch(
+                    queries[i : i + self._upsert_batch_size],
+                    with_age=True,
+                    graph_name=self.graph_name,
+                )
+            except Exception as e:
+                raise PGGraphQueryException(
+                    {
+                        "message": "Error executing graph query batch",
+                        "wrapped": queries[i],
+                        "detail": str(e),
+                    }
+                ) from e
 
-        except Exception:
-            logger.error(f"POSTGRES, upsert_node error on node_id: `{node_id}`")
-            raise
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type((PGGraphQueryException,)),
+    )
+    async def upsert_nodes_batch(self, nodes: dict[str, dict[str, str]]) -> None:
+        """
+        Upsert several nodes on one connection and in one transaction per
+        batch, instead of one connection and AGE setup per node.
+
+        Args:
+            nodes: Node properties keyed by node id
+        """
+        await self._execute_batch(
+            [
+                self._upsert_node_query(node_id, node_data)
+                for node_id, node_data in nodes.items()
+            ]
+        )
 
     @retry(
         stop=stop_after_attempt(3),
@@ -1526,11 +1656,25 @@ class PGGraphStorage(BaseGraphStorage):
             target_node_id (str): Label of the target node (used as identifier)
             edge_data (dict): dictionary of properties to set on the edge
         """
+        query = self._upsert_edge_query(source_node_id, target_node_id, edge_data)
+
+        try:
+            await self._query(query, readonly=False, upsert=True)
+
+        except Exception:
+            logger.error(
+                f"POSTGRES, upsert_edge error on edge: `{source_node_id}`-`{target_node_id}`"
+            )
+            raise
+
+    def _upsert_edge_query(
+        self, source_node_id: str, target_node_id: str, edge_data: dict[str, str]
+    ) -> str:
         src_label = self._normalize_node_id(source_node_id)
         tgt_label = self._normalize_node_id(target_node_id)
         edge_properties = self._format_properties(edge_data)
 
-        query = """SELECT * FROM cypher('%s', $$
+        return """SELECT * FROM cypher('%s', $$
                      MATCH (source:base {entity_id: "%s"})
                      WITH source
                      MATCH (target:base {entity_id: "%s"})
@@ -1546,14 +1690,27 @@ class PGGraphStorage(BaseGraphStorage):
             edge_properties,  # https://github.com/HKUDS/LightRAG/issues/1438#issuecomment-2826000195
         )
 
-        try:
-            await self._query(query, readonly=False, upsert=True)
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type((PGGraphQueryException,)),
+    )
+    async def upsert_edges_batch(
+        self, edges: list[tuple[str, str, dict[str, str]]]
+    ) -> None:
+        """
+        Upsert several edges on one connection and in one transaction per
+        batch, instead of one connection and AGE setup per edge.
 
-        except Exception:
-            logger.error(
-                f"POSTGRES, upsert_edge error on edge: `{source_node_id}`-`{target_node_id}`"
-            )
-            raise
+        Args:
+            edges: (source_id, target_id, edge_data) tuples, end nodes must exist
+        """
+        await self._execute_batch(
+            [
+                self._upsert_edge_query(source_node_id, target_node_id, edge_data)
+                for source_node_id, target_node_id, edge_data in edges
+            ]
+        )
 
     async def delete_node(self, node_id: str) -> None:
         """
@@ -2316,6 +2473,8 @@ TABLES = {
                     content TEXT,
                     content_vector VECTOR,
                     file_path VARCHAR(256),
+                    simhash VARCHAR(16) NULL,
+                    extracted JSONB NULL,
                     create_time TIMESTAMP(0) WITH TIME ZONE,
                     update_time TIMESTAMP(0) WITH TIME ZONE,
 	                CONSTRAINT LIGHTRAG_DOC_CHUNKS_PK PRIMARY KEY (workspace, id)
@@ -2372,6 +2531,8 @@ TABLES = {
 	               chunks_count int4 NULL,
 	               status varchar(64) NULL,
 	               file_path TEXT NULL,
+	               metadata JSONB NULL,
+	               chunk_extractions JSONB NULL,
 	               created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NULL,
 	               updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NULL,
 	               CONSTRAINT LIGHTRAG_DOC_STATUS_PK PRIMARY KEY (workspace, id)
@@ -2379,6 +2540,18 @@ TABLES = {
     },
 }
 
+# Columns added after release, created on existing tables by check_tables
+TABLE_ADDED_COLUMNS = {
+    "LIGHTRAG_DOC_CHUNKS": {
+        "simhash": "VARCHAR(16) NULL",
+        "extracted": "JSONB NULL",
+    },
+    "LIGHTRAG_DOC_STATUS": {
+        "metadata": "JSONB NULL",
+        "chunk_extractions": "JSONB NULL",
+    },
+}
+
 
 SQL_TEMPLATES = {
     # SQL for KVStorage
@@ -2386,7 +2559,7 @@ SQL_TEMPLATES = {
                                 FROM LIGHTRAG_DOC_FULL WHERE workspace=$1 AND id=$2
                             """,
     "get_by_id_text_chunks": """SELECT id, tokens, COALESCE(content, '') as content,
-                                chunk_order_index, full_doc_id, file_path
+                                chunk_order_index, full_doc_id, file_path, simhash, extracted
                                 FROM LIGHTRAG_DOC_CHUNKS WHERE workspace=$1 AND id=$2
                             """,
     "get_by_id_llm_response_cache": """SELECT id, original_prompt, COALESCE(return_value, '') as "return", mode
@@ -2399,7 +2572,7 @@ SQL_TEMPLATES = {
                                  FROM LIGHTRAG_DOC_FULL WHERE workspace=$1 AND id IN ({ids})
                             """,
     "get_by_ids_text_chunks": """SELECT id, tokens, COALESCE(content, '') as content,
-                                  chunk_order_index, full_doc_id, file_path
+                                  chunk_order_index, full_doc_id, file_path, simhash, extracted
                                    FROM LIGHTRAG_DOC_CHUNKS WHERE workspace=$1 AND id IN ({ids})
                                 """,
     "get_by_ids_llm_response_cache": """SELECT id, original_prompt, COALESCE(return_value, '') as "return", mode
@@ -2432,6 +2605,13 @@ SQL_TEMPLATES = {
                       file_path=EXCLUDED.file_path,
                       update_time = EXCLUDED.update_time
                      """,
+    "upsert_chunk_dedup": """INSERT INTO LIGHTRAG_DOC_CHUNKS (workspace, id, simhash, extracted)
+                      VALUES ($1, $2, $3, $4::jsonb)
+                      ON CONFLICT (workspace,id) DO UPDATE
+                      SET simhash=EXCLUDED.simhash,
+                      extracted=COALESCE(EXCLUDED.extracted, LIGHTRAG_DOC_CHUNKS.extracted),
+                      update_time = CURRENT_TIMESTAMP
+                     """,
     # SQL for VectorStorage
     "upsert_entity": """INSERT INTO LIGHTRAG_VDB_ENTITY (workspace, id, entity_name, content,
                       content_vector, chunk_ids, file_path, create_time, update_time)
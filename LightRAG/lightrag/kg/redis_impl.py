@@ -99,6 +99,22 @@ class RedisKVStorage(BaseKVStorage):
                 logger.error(f"JSON decode error in batch get: {e}")
                 return [None] * len(ids)
 
+    async def get_all(self) -> dict[str, Any]:
+        async with self._get_redis_connection() as redis:
+            prefix = f"{self.namespace}:"
+            keys = [key async for key in redis.scan_iter(match=f"{prefix}*")]
+            if not keys:
+                return {}
+            pipe = redis.pipeline()
+            for key in keys:
+                pipe.get(key)
+            results = await pipe.execute()
+            return {
+                key[len(prefix) :]: json.loads(result)
+                for key, result in zip(keys, results)
+                if result
+            }
+
     async def filter_keys(self, keys: set[str]) -> set[str]:
         async with self._get_redis_connection() as redis:
             pipe = redis.pipeline()
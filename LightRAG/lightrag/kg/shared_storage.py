@@ -1,9 +1,12 @@
 import os
 import sys
 import asyncio
+from contextlib import asynccontextmanager
 from multiprocessing.synchronize import Lock as ProcessLock
 from multiprocessing import Manager
-from typing import Any, Dict, Optional, Union, TypeVar, Generic
+from typing import Any, AsyncIterator, Dict, Optional, Union, TypeVar, Generic
+
+from lightrag.utils import KeyedLock
 
 
 # Define a direct print function for critical logs that must be visible in all processes
@@ -44,6 +47,16 @@ _data_init_lock: Optional[LockType] = None
 # async locks for coroutine synchronization in multiprocess mode
 _async_locks: Optional[Dict[str, asyncio.Lock]] = None
 
+# per-key graph locks: coroutines of a process are serialized by the keyed
+# asyncio lock, processes by one shared lock per key (multiprocess mode only)
+_graph_key_async_lock = KeyedLock()
+_graph_key_locks: Optional[Dict[str, Any]] = None  # key -> process lock
+_graph_key_refs: Optional[Dict[str, int]] = None  # key -> number of holders
+_graph_key_guard: Optional[LockType] = None
+
+# polling interval while waiting for a graph key held by another process
+_GRAPH_KEY_POLL_INTERVAL = 0.01
+
 
 class UnifiedLock(Generic[T]):
     """Provide a unified lock interface type for asyncio.Lock and multiprocessing.Lock"""
@@ -271,6 +284,71 @@ def get_data_init_lock(enable_logging: bool = False) -> UnifiedLock:
     )
 
 
+def graph_node_lock_key(entity_name: str) -> str:
+    """return the graph key lock name of a node"""
+    return f"node:{entity_name}"
+
+
+def graph_edge_lock_key(src_id: str, tgt_id: str) -> str:
+    """return the graph key lock name of an (undirected) edge"""
+    src_id, tgt_id = sorted((src_id, tgt_id))
+    return f"edge:{src_id}\t{tgt_id}"
+
+
+def _ref_graph_key_locks(keys: list[str]) -> list:
+    """Get the process locks of keys, creating missing ones"""
+    with _graph_key_guard:
+        locks = []
+        for key in keys:
+            if key not in _graph_key_locks:
+                _graph_key_locks[key] = _manager.Lock()
+                _graph_key_refs[key] = 0
+            _graph_key_refs[key] += 1
+            locks.append(_graph_key_locks[key])
+        return locks
+
+
+def _unref_graph_key_locks(keys: list[str]) -> None:
+    """Drop the process locks of keys no longer held or awaited by anyone"""
+    with _graph_key_guard:
+        for key in keys:
+            _graph_key_refs[key] -= 1
+            if not _graph_key_refs[key]:
+                del _graph_key_refs[key]
+                del _graph_key_locks[key]
+
+
+@asynccontextmanager
+async def get_graph_key_lock(*keys: str) -> AsyncIterator[None]:
+    """
+    Lock graph elements by key (see graph_node_lock_key / graph_edge_lock_key)
+    across all coroutines and worker processes.
+
+    Unlike the graph db lock, writers touching disjoint nodes and edges do not
+    wait for each other. Keys are acquired in sorted order so that overlapping
+    key sets cannot deadlock.
+    """
+    keys = sorted(set(keys))
+    async with _graph_key_async_lock(*keys):
+        if not _is_multiprocess:
+            yield
+            return
+
+        locks = _ref_graph_key_locks(keys)
+        acquired = []
+        try:
+            for lock in locks:
+                # Poll instead of blocking so the event loop keeps running
+                while not lock.acquire(blocking=False):
+                    await asyncio.sleep(_GRAPH_KEY_POLL_INTERVAL)
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+            _unref_graph_key_locks(keys)
+
+
 def initialize_share_data(workers: int = 1):
     """
     Initialize shared storage data for single or multi-process mode.
@@ -302,7 +380,10 @@ def initialize_share_data(workers: int = 1):
         _init_flags, \
         _initialized, \
         _update_flags, \
-        _async_locks
+        _async_locks, \
+        _graph_key_locks, \
+        _graph_key_refs, \
+        _graph_key_guard
 
     # Check if already initialized
     if _initialized:
@@ -324,6 +405,9 @@ def initialize_share_data(workers: int = 1):
         _shared_dicts = _manager.dict()
         _init_flags = _manager.dict()
         _update_flags = _manager.dict()
+        _graph_key_locks = _manager.dict()
+        _graph_key_refs = _manager.dict()
+        _graph_key_guard = _manager.Lock()
 
         # Initialize async locks for multiprocess mode
         _async_locks = {
@@ -535,7 +619,10 @@ def finalize_share_data():
         _init_flags, \
         _initialized, \
         _update_flags, \
-        _async_locks
+        _async_locks, \
+        _graph_key_locks, \
+        _graph_key_refs, \
+        _graph_key_guard
 
     # Check if already initialized
     if not _initialized:
@@ -601,5 +688,8 @@ def finalize_share_data():
     _data_init_lock = None
     _update_flags = None
     _async_locks = None
+    _graph_key_locks = None
+    _graph_key_refs = None
+    _graph_key_guard = None
 
     direct_log(f"Process {os.getpid()} storage data finalization complete")
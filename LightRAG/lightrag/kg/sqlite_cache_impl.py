@@ -0,0 +1,299 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+from dataclasses import dataclass
+from typing import Any, final
+
+from lightrag.base import BaseKVStorage
+from lightrag.utils import logger
+
+
+@final
+@dataclass
+class SQLiteCacheStorage(BaseKVStorage):
+    """
+    SQLite-backed storage for the LLM response cache.
+
+    Entries are stored one row per (mode, args_hash) instead of one JSON blob per
+    mode, so a cache write touches a single row and nothing has to be rewritten
+    on index_done_callback. The cache is bounded by optional entry count, byte
+    and TTL limits, evicting the least recently used entries first:
+
+    - LLM_CACHE_MAX_ENTRIES: maximum number of cached responses (0 = unlimited)
+    - LLM_CACHE_MAX_BYTES: maximum total size of the cached records (0 = unlimited)
+    - LLM_CACHE_TTL: seconds an entry stays valid after its last use (0 = forever)
+    - LLM_CACHE_MODE_READ_LIMIT: most entries returned when a whole mode is read
+
+    The storage keeps the mode-keyed interface of JsonKVStorage: ids passed to
+    get_by_id, get_by_ids, filter_keys and delete are cache modes. Reading a mode
+    returns its most recently used entries only; single entries are looked up
+    with get_by_mode_and_id. All sqlite3 calls run in the default executor so
+    that disk I/O never blocks the event loop.
+    """
+
+    def __post_init__(self):
+        working_dir = self.global_config["working_dir"]
+        self._db_file = os.path.join(working_dir, f"kv_store_{self.namespace}.sqlite")
+        self._max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "0"))
+        self._max_bytes = int(os.getenv("LLM_CACHE_MAX_BYTES", "0"))
+        self._ttl = int(os.getenv("LLM_CACHE_TTL", "0"))
+        self._mode_read_limit = int(os.getenv("LLM_CACHE_MODE_READ_LIMIT", "1000"))
+        self._conn: sqlite3.Connection | None = None
+        self._lock = asyncio.Lock()
+        # Access times of cache hits, flushed in batches instead of one write per hit
+        self._touched: dict[tuple[str, str], float] = {}
+        self._writes_since_eviction = 0
+
+    async def initialize(self):
+        """Open the database and create the cache table if needed"""
+        async with self._lock:
+            if self._conn is not None:
+                return
+            count = await self._run(self._open)
+            logger.info(
+                f"Process {os.getpid()} SQLite cache load {self.namespace} with {count} records"
+            )
+
+    async def finalize(self):
+        """Flush pending access times and close the database"""
+        async with self._lock:
+            if self._conn is None:
+                return
+            await self._run(self._flush_and_evict)
+            await self._run(self._conn.close)
+            self._conn = None
+
+    async def index_done_callback(self) -> None:
+        async with self._lock:
+            await self._run(self._flush_and_evict)
+
+    async def _run(self, func, *args):
+        """Run a blocking sqlite3 call in the default executor
+
+        Callers hold self._lock, so the connection is never used by two threads
+        at the same time.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    def _open(self) -> int:
+        """Open the database, create the cache table and return its row count"""
+        self._conn = sqlite3.connect(
+            self._db_file, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                mode TEXT NOT NULL,
+                id TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (mode, id)
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)"
+        )
+        return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def _fetchall(self, sql: str, params: tuple = ()) -> list[tuple]:
+        return self._conn.execute(sql, params).fetchall()
+
+    def _fetchone(self, sql: str, params: tuple = ()) -> tuple | None:
+        return self._conn.execute(sql, params).fetchone()
+
+    def _executemany(self, sql: str, rows: list[tuple]) -> None:
+        self._conn.executemany(sql, rows)
+
+    def _is_expired(self, accessed_at: float, now: float) -> bool:
+        return self._ttl > 0 and accessed_at < now - self._ttl
+
+    def _rows_to_mode_dict(self, rows, now: float) -> dict[str, Any]:
+        return {
+            cache_id: json.loads(value)
+            for cache_id, value, accessed_at in rows
+            if not self._is_expired(accessed_at, now)
+        }
+
+    async def get_all(self) -> dict[str, Any]:
+        """Get all cache entries grouped by mode"""
+        now = time.time()
+        async with self._lock:
+            rows = await self._run(
+                self._fetchall, "SELECT mode, id, value, accessed_at FROM llm_cache"
+            )
+        result: dict[str, dict[str, Any]] = {}
+        for mode, cache_id, value, accessed_at in rows:
+            if not self._is_expired(accessed_at, now):
+                result.setdefault(mode, {})[cache_id] = json.loads(value)
+        return result
+
+    async def get_by_id(self, id: str) -> dict[str, Any] | None:
+        """Get the most recently used cache entries of a mode
+
+        At most LLM_CACHE_MODE_READ_LIMIT entries are returned, so reading a mode
+        stays bounded however large the cache grows.
+        """
+        now = time.time()
+        async with self._lock:
+            rows = await self._run(
+                self._fetchall,
+                "SELECT id, value, accessed_at FROM llm_cache WHERE mode = ? "
+                "ORDER BY accessed_at DESC LIMIT ?",
+                (id, self._mode_read_limit),
+            )
+        return self._rows_to_mode_dict(rows, now) or None
+
+    async def get_by_mode_and_id(self, mode: str, id: str) -> dict[str, Any] | None:
+        """Get a single cache entry as {id: entry}, marking it as recently used"""
+        now = time.time()
+        async with self._lock:
+            row = await self._run(
+                self._fetchone,
+                "SELECT value, accessed_at FROM llm_cache WHERE mode = ? AND id = ?",
+                (mode, id),
+            )
+            if row is None or self._is_expired(row[1], now):
+                return None
+            self._touched[(mode, id)] = now
+        return {id: json.loads(row[0])}
+
+    async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
+        return [await self.get_by_id(id) for id in ids]
+
+    async def filter_keys(self, keys: set[str]) -> set[str]:
+        async with self._lock:
+            rows = await self._run(
+                self._fetchall, "SELECT DISTINCT mode FROM llm_cache"
+            )
+        existing = {row[0] for row in rows}
+        return set(keys) - existing
+
+    async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
+        """Insert or replace cache entries, data is {mode: {args_hash: entry}}
+
+        Unlike JsonKVStorage, entries are merged into the mode instead of
+        replacing the whole mode dict.
+        """
+        if not data:
+            return
+        now = time.time()
+        rows = []
+        for mode, entries in data.items():
+            for cache_id, entry in entries.items():
+                value = json.dumps(entry, ensure_ascii=False)
+                rows.append((mode, cache_id, value, len(value), now))
+        logger.debug(f"Inserting {len(rows)} records to {self.namespace}")
+        async with self._lock:
+            await self._run(
+                self._executemany,
+                "INSERT OR REPLACE INTO llm_cache (mode, id, value, size, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._writes_since_eviction += len(rows)
+            # Keep the bounds honoured between index_done_callback calls
+            if self._writes_since_eviction >= 1000:
+                await self._run(self._flush_and_evict)
+
+    async def delete(self, ids: list[str]) -> None:
+        """Delete all cache entries of the given modes"""
+        async with self._lock:
+            await self._run(
+                self._executemany,
+                "DELETE FROM llm_cache WHERE mode = ?",
+                [(mode,) for mode in ids],
+            )
+
+    async def drop_cache_by_modes(self, modes: list[str] | None = None) -> bool:
+        """Delete specific records from storage by cache mode
+
+        Args:
+            modes (list[str]): List of cache modes to be dropped from storage
+
+        Returns:
+             True: if the cache drop successfully
+             False: if the cache drop failed
+        """
+        if not modes:
+            return False
+
+        try:
+            await self.delete(modes)
+            return True
+        except Exception:
+            return False
+
+    async def drop(self) -> dict[str, str]:
+        """Drop all cache entries and reclaim the disk space
+
+        Returns:
+            dict[str, str]: Operation status and message
+            - On success: {"status": "success", "message": "data dropped"}
+            - On failure: {"status": "error", "message": "<error details>"}
+        """
+        try:
+            async with self._lock:
+                self._touched.clear()
+                await self._run(self._clear)
+            logger.info(f"Process {os.getpid()} drop {self.namespace}")
+            return {"status": "success", "message": "data dropped"}
+        except Exception as e:
+            logger.error(f"Error dropping {self.namespace}: {e}")
+            return {"status": "error", "message": str(e)}
+
+    async def compact(self) -> None:
+        """Apply the eviction policy and rebuild the database file"""
+        async with self._lock:
+            await self._run(self._flush_and_evict)
+            await self._run(self._conn.execute, "VACUUM")
+
+    def _clear(self) -> None:
+        self._conn.execute("DELETE FROM llm_cache")
+        self._conn.execute("VACUUM")
+
+    def _flush_and_evict(self) -> None:
+        # Flush access times first so that recently hit entries are not evicted
+        self._flush_touched()
+        self._evict()
+
+    def _flush_touched(self) -> None:
+        if not self._touched:
+            return
+        self._conn.executemany(
+            "UPDATE llm_cache SET accessed_at = ? WHERE mode = ? AND id = ?",
+            [(ts, mode, id) for (mode, id), ts in self._touched.items()],
+        )
+        self._touched.clear()
+
+    def _evict(self) -> int:
+        """Remove expired entries, then least recently used ones above the limits"""
+        self._writes_since_eviction = 0
+        evicted = 0
+        if self._ttl > 0:
+            evicted += self._conn.execute(
+                "DELETE FROM llm_cache WHERE accessed_at < ?",
+                (time.time() - self._ttl,),
+            ).rowcount
+        if self._max_entries > 0:
+            evicted += self._conn.execute(
+                "DELETE FROM llm_cache WHERE rowid IN ("
+                "SELECT rowid FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,),
+            ).rowcount
+        if self._max_bytes > 0:
+            # Keep the most recently used entries whose cumulative size fits the budget
+            evicted += self._conn.execute(
+                "DELETE FROM llm_cache WHERE rowid IN ("
+                "SELECT rowid FROM (SELECT rowid, SUM(size) OVER "
+                "(ORDER BY accessed_at DESC, rowid DESC) AS total FROM llm_cache) "
+                "WHERE total > ?)",
+                (self._max_bytes,),
+            ).rowcount
+        if evicted:
+            logger.info(f"Evicted {evicted} records from {self.namespace}")
+        return evicted
@@ -218,8 +218,13 @@ class TiDBKVStorage(BaseKVStorage):
         Returns:
             Dictionary containing all stored data
         """
-        async with self._storage_lock:
-            return dict(self._data)
+        SQL = SQL_TEMPLATES.get("get_all_" + self.namespace)
+        if SQL is None:
+            raise NotImplementedError(
+                f"TiDBKVStorage does not support get_all ({self.namespace})"
+            )
+        rows = await self.db.query(SQL, multirows=True) or []
+        return {row["id"]: row for row in rows}
 
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
         """Fetch doc_full data by id."""
@@ -234,7 +239,9 @@ class TiDBKVStorage(BaseKVStorage):
         SQL = SQL_TEMPLATES["get_by_ids_" + self.namespace].format(
             ids=",".join([f"'{id}'" for id in ids])
         )
-        return await self.db.query(SQL, multirows=True)
+        rows = await self.db.query(SQL, multirows=True) or []
+        rows_by_id = {row["id"]: row for row in rows}
+        return [rows_by_id.get(id) for id in ids]
 
     async def filter_keys(self, keys: set[str]) -> set[str]:
         SQL = SQL_TEMPLATES["filter_keys"].format(
@@ -1145,6 +1152,8 @@ SQL_TEMPLATES = {
     "get_by_id_text_chunks": "SELECT chunk_id as id, tokens, IFNULL(content, '') AS content, chunk_order_index, full_doc_id FROM LIGHTRAG_DOC_CHUNKS WHERE chunk_id = :id AND workspace = :workspace",
     "get_by_ids_full_docs": "SELECT doc_id as id, IFNULL(content, '') AS content FROM LIGHTRAG_DOC_FULL WHERE doc_id IN ({ids}) AND workspace = :workspace",
     "get_by_ids_text_chunks": "SELECT chunk_id as id, tokens, IFNULL(content, '') AS content, chunk_order_index, full_doc_id FROM LIGHTRAG_DOC_CHUNKS WHERE chunk_id IN ({ids}) AND workspace = :workspace",
+    "get_all_full_docs": "SELECT doc_id as id, IFNULL(content, '') AS content FROM LIGHTRAG_DOC_FULL WHERE workspace = :workspace",
+    "get_all_text_chunks": "SELECT chunk_id as id, tokens, IFNULL(content, '') AS content, chunk_order_index, full_doc_id FROM LIGHTRAG_DOC_CHUNKS WHERE workspace = :workspace",
     "filter_keys": "SELECT {id_field} AS id FROM {table_name} WHERE {id_field} IN ({ids}) AND workspace = :workspace",
     # SQL for Merge operations (TiDB version with INSERT ... ON DUPLICATE KEY UPDATE)
     "upsert_doc_full": """
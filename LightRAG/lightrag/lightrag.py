@@ -1,18 +1,26 @@
 from __future__ import annotations
 
+import time
 import traceback
 import asyncio
 import configparser
 import os
+import pickle
 import warnings
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from functools import partial
 from typing import (
     Any,
+    AsyncIterable,
     AsyncIterator,
+    Awaitable,
     Callable,
+    Iterable,
     Iterator,
+    Sequence,
     cast,
     final,
     Literal,
@@ -34,6 +42,9 @@ from lightrag.kg import (
 from lightrag.kg.shared_storage import (
     get_namespace_data,
     get_pipeline_status_lock,
+    get_storage_lock,
+    get_update_flag,
+    set_all_update_flags,
 )
 
 from .base import (
@@ -51,22 +62,41 @@ from .namespace import NameSpace, make_namespace
 from .operate import (
     chunking_by_token_size,
     extract_entities,
+    extract_entities_batch,
+    GleaningPolicy,
+    init_chunking_worker,
     merge_nodes_and_edges,
+    run_chunking_in_worker,
     kg_query,
     naive_query,
     query_with_keywords,
 )
+from .dedup import SimHashIndex, simhash
 from .prompt import GRAPH_FIELD_SEP
+from .temporal import (
+    DOC_METADATA_FIELDS,
+    element_timestamps,
+    normalize_doc_metadata,
+    prune_observations,
+)
 from .utils import (
     Tokenizer,
     TiktokenTokenizer,
     EmbeddingFunc,
+    LRUCache,
+    MicroBatcher,
+    PipelineStage,
     always_get_an_event_loop,
     compute_mdhash_id,
     convert_response_to_json,
     lazy_external_import,
     priority_limit_async_func_call,
+    use_prefetched_embeddings,
+    run_pipeline_stages,
     get_content_summary,
+    iter_json_records,
+    load_json,
+    write_json,
     clean_text,
     check_storage_env_vars,
     logger,
@@ -112,6 +142,9 @@ class LightRAG:
     doc_status_storage: str = field(default="JsonDocStatusStorage")
     """Storage type for tracking document processing statuses."""
 
+    llm_cache_storage: str | None = field(default=None)
+    """Storage backend for the LLM response cache. Defaults to kv_storage."""
+
     # Logging (Deprecated, use setup_logger in utils.py instead)
     # ---
     log_level: int | None = field(default=None)
@@ -123,6 +156,36 @@ class LightRAG:
     entity_extract_max_gleaning: int = field(default=1)
     """Maximum number of entity extraction attempts for ambiguous content."""
 
+    entity_extract_glean_min_tokens: int = field(
+        default=get_env_value("GLEAN_MIN_TOKENS", 0, int)
+    )
+    """Skip gleaning for chunks shorter than this many tokens. 0 disables the rule."""
+
+    entity_extract_glean_max_density: float = field(
+        default=get_env_value("GLEAN_MAX_ENTITY_DENSITY", 0.0, float)
+    )
+    """Skip gleaning when the first pass found at least this many entities per 100 tokens. 0 disables the rule."""
+
+    entity_extract_glean_min_yield: float = field(
+        default=get_env_value("GLEAN_MIN_YIELD", 0.0, float)
+    )
+    """Skip most gleaning for sources whose gleaning rounds add fewer new entities and relations on average. 0 disables the rule."""
+
+    entity_extract_batch_size: int = field(
+        default=get_env_value("ENTITY_EXTRACT_BATCH_SIZE", 1, int)
+    )
+    """Number of chunks, possibly from different documents, packed into one extraction prompt. 1 disables batching."""
+
+    entity_extract_batch_wait: float = field(
+        default=get_env_value("ENTITY_EXTRACT_BATCH_WAIT", 0.1, float)
+    )
+    """Maximum time in seconds a chunk waits for others to fill its extraction batch."""
+
+    chunk_checkpoint_interval: float = field(
+        default=get_env_value("CHUNK_CHECKPOINT_INTERVAL", 5.0, float)
+    )
+    """Minimum time in seconds between two saves of the chunk extraction results of a document being extracted, so that a restart resumes from them. 0 saves after every finished chunk or extraction batch."""
+
     summary_to_max_tokens: int = field(
         default=get_env_value("MAX_TOKEN_SUMMARY", DEFAULT_MAX_TOKEN_SUMMARY, int)
     )
@@ -184,6 +247,23 @@ class LightRAG:
     Defaults to `chunking_by_token_size` if not specified.
     """
 
+    enable_chunk_dedup: bool = field(
+        default=get_env_value("ENABLE_CHUNK_DEDUP", False, bool)
+    )
+    """If True, chunks that nearly duplicate an already extracted chunk (SimHash over word shingles) reuse its entities and relations instead of being extracted again. The fingerprints are kept in simhash_<namespace>.json in working_dir."""
+
+    chunk_dedup_max_distance: int = field(
+        default=get_env_value("CHUNK_DEDUP_MAX_DISTANCE", 3, int)
+    )
+    """Maximum number of differing SimHash bits (out of 64, at most 3) for two chunks to be near-duplicates."""
+
+    chunking_max_workers: int = field(
+        default=get_env_value("CHUNKING_MAX_WORKERS", 0, int)
+    )
+    """Number of worker processes running chunking_func off the event loop. 0 chunks on the event loop. The tokenizer and chunking_func must be picklable.
+    Opt-in for library use: worker processes are started with the spawn method on macOS and Windows, which re-imports the calling script and fails unless it guards its entry point with `if __name__ == "__main__"`. The API server enables 2 workers by default.
+    """
+
     # Embedding
     # ---
 
@@ -206,7 +286,7 @@ class LightRAG:
         }
     )
     """Configuration for embedding cache.
-    - enabled: If True, enables caching to avoid redundant computations.
+    - enabled: If True, a query missing the LLM cache is answered from the cached response of the most similar earlier query of the same mode.
     - similarity_threshold: Minimum similarity score to use cached embeddings.
     - use_llm_check: If True, validates cached embeddings using an LLM.
     """
@@ -245,12 +325,30 @@ class LightRAG:
     enable_llm_cache_for_entity_extract: bool = field(default=True)
     """If True, enables caching for entity extraction steps to reduce LLM costs."""
 
+    text_chunk_cache_size: int = field(
+        default=get_env_value("TEXT_CHUNK_CACHE_SIZE", 0, int)
+    )
+    """Number of text chunks kept in an LRU cache for query-time chunk lookups. 0 disables the cache."""
+
     # Extensions
     # ---
 
     max_parallel_insert: int = field(default=int(os.getenv("MAX_PARALLEL_INSERT", 2)))
     """Maximum number of parallel insert operations."""
 
+    enable_staged_pipeline: bool = field(
+        default=get_env_value("ENABLE_STAGED_PIPELINE", False, bool)
+    )
+    """If True, documents stream through separate chunking, embedding, extraction, merging and persisting stages instead of being processed end-to-end one by one."""
+
+    pipeline_queue_size: int = field(
+        default=get_env_value("PIPELINE_QUEUE_SIZE", 2, int)
+    )
+    """Maximum number of documents waiting between two stages of the staged pipeline."""
+
+    pipeline_stage_concurrency: dict[str, int] = field(default_factory=dict)
+    """Workers per stage of the staged pipeline, keyed by stage name (chunking, embedding, extraction, merging, persisting). Missing stages use the defaults of _process_documents_staged."""
+
     addon_params: dict[str, Any] = field(
         default_factory=lambda: {
             "language": get_env_value("SUMMARY_LANGUAGE", "English", str)
@@ -312,9 +410,13 @@ class LightRAG:
             logger.info(f"Creating working directory {self.working_dir}")
             os.makedirs(self.working_dir)
 
+        if self.llm_cache_storage is None:
+            self.llm_cache_storage = self.kv_storage
+
         # Verify storage implementation compatibility and environment variables
         storage_configs = [
             ("KV_STORAGE", self.kv_storage),
+            ("LLM_CACHE_STORAGE", self.llm_cache_storage),
             ("VECTOR_STORAGE", self.vector_storage),
             ("GRAPH_STORAGE", self.graph_storage),
             ("DOC_STATUS_STORAGE", self.doc_status_storage),
@@ -346,9 +448,11 @@ class LightRAG:
         logger.debug(f"LightRAG init with param:\n  {_print_config}\n")
 
         # Init Embedding
-        self.embedding_func = priority_limit_async_func_call(
-            self.embedding_func_max_async
-        )(self.embedding_func)
+        self.embedding_func = use_prefetched_embeddings(
+            priority_limit_async_func_call(self.embedding_func_max_async)(
+                self.embedding_func
+            )
+        )
 
         # Initialize all storages
         self.key_string_value_json_storage_cls: type[BaseKVStorage] = (
@@ -373,7 +477,9 @@ class LightRAG:
         # Initialize document status storage
         self.doc_status_storage_cls = self._get_storage_class(self.doc_status_storage)
 
-        self.llm_response_cache: BaseKVStorage = self.key_string_value_json_storage_cls(  # type: ignore
+        self.llm_response_cache: BaseKVStorage = self._get_storage_class(  # type: ignore
+            self.llm_cache_storage
+        )(
             namespace=make_namespace(
                 self.namespace_prefix, NameSpace.KV_STORE_LLM_RESPONSE_CACHE
             ),
@@ -397,6 +503,8 @@ class LightRAG:
             ),
             embedding_func=self.embedding_func,
         )
+        if self.text_chunk_cache_size > 0:
+            self.text_chunks.read_cache = LRUCache(self.text_chunk_cache_size)
         self.chunk_entity_relation_graph: BaseGraphStorage = self.graph_storage_cls(  # type: ignore
             namespace=make_namespace(
                 self.namespace_prefix, NameSpace.GRAPH_STORE_CHUNK_ENTITY_RELATION
@@ -409,21 +517,42 @@ class LightRAG:
                 self.namespace_prefix, NameSpace.VECTOR_STORE_ENTITIES
             ),
             embedding_func=self.embedding_func,
-            meta_fields={"entity_name", "source_id", "content", "file_path"},
+            meta_fields={
+                "entity_name",
+                "source_id",
+                "content",
+                "file_path",
+                "published_at",
+                "published_ats",
+            },
         )
         self.relationships_vdb: BaseVectorStorage = self.vector_db_storage_cls(  # type: ignore
             namespace=make_namespace(
                 self.namespace_prefix, NameSpace.VECTOR_STORE_RELATIONSHIPS
             ),
             embedding_func=self.embedding_func,
-            meta_fields={"src_id", "tgt_id", "source_id", "content", "file_path"},
+            meta_fields={
+                "src_id",
+                "tgt_id",
+                "source_id",
+                "content",
+                "file_path",
+                "published_at",
+                "published_ats",
+            },
         )
         self.chunks_vdb: BaseVectorStorage = self.vector_db_storage_cls(  # type: ignore
             namespace=make_namespace(
                 self.namespace_prefix, NameSpace.VECTOR_STORE_CHUNKS
             ),
             embedding_func=self.embedding_func,
-            meta_fields={"full_doc_id", "content", "file_path"},
+            meta_fields={
+                "full_doc_id",
+                "content",
+                "file_path",
+                "tokens",
+                *DOC_METADATA_FIELDS,
+            },
         )
 
         # Initialize document status storage
@@ -444,6 +573,24 @@ class LightRAG:
             )
         )
 
+        # Created on first use, see _get_chunking_executor
+        self._chunking_executor: ProcessPoolExecutor | None = None
+        # Loaded on first use, see _get_chunk_dedup_index
+        self._chunk_dedup_index: SimHashIndex | None = None
+        self._chunk_dedup_file = os.path.join(
+            self.working_dir, f"simhash_{self.text_chunks.namespace}.json"
+        )
+        self._chunk_dedup_lock = asyncio.Lock()
+        # Set when another process saved new fingerprints
+        self._chunk_dedup_updated = None
+        self._chunk_dedup_dirty = False
+        # Shared by all extractions so that per-source gleaning yields are learned
+        self._gleaning_policy = GleaningPolicy(
+            min_tokens=self.entity_extract_glean_min_tokens,
+            max_density=self.entity_extract_glean_max_density,
+            min_yield=self.entity_extract_glean_min_yield,
+        )
+
         self._storages_status = StoragesStatus.CREATED
 
         if self.auto_manage_storages_states:
@@ -515,6 +662,10 @@ class LightRAG:
 
             await asyncio.gather(*tasks)
 
+            if self._chunking_executor is not None:
+                self._chunking_executor.shutdown(wait=False, cancel_futures=True)
+                self._chunking_executor = None
+
             self._storages_status = StoragesStatus.FINALIZED
             logger.debug("Finalized Storages")
 
@@ -555,6 +706,7 @@ class LightRAG:
         split_by_character_only: bool = False,
         ids: str | list[str] | None = None,
         file_paths: str | list[str] | None = None,
+        metadata: dict[str, Any] | list[dict[str, Any]] | None = None,
     ) -> None:
         """Sync Insert documents with checkpoint support
 
@@ -566,11 +718,17 @@ class LightRAG:
             split_by_character is None, this parameter is ignored.
             ids: single string of the document ID or list of unique document IDs, if not provided, MD5 hash IDs will be generated
             file_paths: single string of the file path or list of file paths, used for citation
+            metadata: single dict or list of dicts of document metadata (published_at, source, url)
         """
         loop = always_get_an_event_loop()
         loop.run_until_complete(
             self.ainsert(
-                input, split_by_character, split_by_character_only, ids, file_paths
+                input,
+                split_by_character,
+                split_by_character_only,
+                ids,
+                file_paths,
+                metadata,
             )
         )
 
@@ -581,6 +739,7 @@ class LightRAG:
         split_by_character_only: bool = False,
         ids: str | list[str] | None = None,
         file_paths: str | list[str] | None = None,
+        metadata: dict[str, Any] | list[dict[str, Any]] | None = None,
     ) -> None:
         """Async Insert documents with checkpoint support
 
@@ -592,12 +751,134 @@ class LightRAG:
             split_by_character is None, this parameter is ignored.
             ids: list of unique document IDs, if not provided, MD5 hash IDs will be generated
             file_paths: list of file paths corresponding to each document, used for citation
+            metadata: list of metadata dicts corresponding to each document. published_at
+            (epoch seconds or ISO 8601) is stored as epoch seconds on chunks, entities and
+            relations; source and url are stored on chunks.
         """
-        await self.apipeline_enqueue_documents(input, ids, file_paths)
+        await self.apipeline_enqueue_documents(input, ids, file_paths, metadata)
         await self.apipeline_process_enqueue_documents(
             split_by_character, split_by_character_only
         )
 
+    def insert_records(
+        self,
+        records: Iterable[dict[str, Any]] | str,
+        text_field: str = "content",
+        metadata_fields: Sequence[str] | dict[str, str] | None = None,
+        id_field: str | None = None,
+        file_path_field: str | None = None,
+        batch_size: int = 100,
+        split_by_character: str | None = None,
+        split_by_character_only: bool = False,
+    ) -> None:
+        """Sync insert a stream of record dicts, see ainsert_records"""
+        loop = always_get_an_event_loop()
+        loop.run_until_complete(
+            self.ainsert_records(
+                records,
+                text_field,
+                metadata_fields,
+                id_field,
+                file_path_field,
+                batch_size,
+                split_by_character,
+                split_by_character_only,
+            )
+        )
+
+    async def ainsert_records(
+        self,
+        records: Iterable[dict[str, Any]] | AsyncIterable[dict[str, Any]] | str,
+        text_field: str = "content",
+        metadata_fields: Sequence[str] | dict[str, str] | None = None,
+        id_field: str | None = None,
+        file_path_field: str | None = None,
+        batch_size: int = 100,
+        split_by_character: str | None = None,
+        split_by_character_only: bool = False,
+    ) -> None:
+        """Async insert a stream of records (e.g. news articles or pre-chunked text)
+
+        Records are consumed lazily and ingested batch_size at a time: each batch
+        is enqueued and processed by the document pipeline, and the storages are
+        persisted once per batch instead of once per document.
+
+        Args:
+            records: Iterable or async iterable of dicts, or the path of a JSON
+            Lines (.jsonl/.ndjson) or JSON array file
+            text_field: Record field holding the document text, records without
+            text are skipped
+            metadata_fields: Record fields stored as document metadata, either a
+            list of field names or a {metadata_name: record_field} mapping.
+            Defaults to the fields in DOC_METADATA_FIELDS (published_at, source, url)
+            id_field: Record field holding the document ID, MD5 hash IDs are
+            generated if not provided
+            file_path_field: Record field used as file path for citation
+            batch_size: Number of records per pipeline run and persist
+            split_by_character: see ainsert
+            split_by_character_only: see ainsert
+        """
+        if isinstance(records, str):
+            records = iter_json_records(records)
+        if metadata_fields is None:
+            metadata_fields = DOC_METADATA_FIELDS
+        if not isinstance(metadata_fields, dict):
+            metadata_fields = {field_name: field_name for field_name in metadata_fields}
+
+        batch: list[dict[str, Any]] = []
+        skipped = 0
+        total = 0
+
+        async def _ingest_batch() -> None:
+            nonlocal total
+            await self.apipeline_enqueue_documents(
+                [record[text_field] for record in batch],
+                ids=[str(record[id_field]) for record in batch] if id_field else None,
+                file_paths=[
+                    str(record.get(file_path_field) or "unknown_source")
+                    for record in batch
+                ]
+                if file_path_field
+                else None,
+                metadata=[
+                    {
+                        name: record[field_name]
+                        for name, field_name in metadata_fields.items()
+                        if record.get(field_name) is not None
+                    }
+                    for record in batch
+                ],
+            )
+            await self.apipeline_process_enqueue_documents(
+                split_by_character,
+                split_by_character_only,
+                persist_per_document=False,
+            )
+            total += len(batch)
+            logger.info(f"Ingested {total} records")
+            batch.clear()
+
+        async def _aiter_records():
+            if isinstance(records, AsyncIterable):
+                async for record in records:
+                    yield record
+            else:
+                for record in records:
+                    yield record
+
+        async for record in _aiter_records():
+            text = record.get(text_field)
+            if not isinstance(text, str) or not text.strip():
+                skipped += 1
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                await _ingest_batch()
+        if batch:
+            await _ingest_batch()
+        if skipped:
+            logger.warning(f"Skipped {skipped} records without {text_field}")
+
     # TODO: deprecated, use insert instead
     def insert_custom_chunks(
         self,
@@ -675,6 +956,7 @@ class LightRAG:
         input: str | list[str],
         ids: list[str] | None = None,
         file_paths: str | list[str] | None = None,
+        metadata: dict[str, Any] | list[dict[str, Any]] | None = None,
     ) -> None:
         """
         Pipeline for Processing Documents
@@ -689,6 +971,7 @@ class LightRAG:
             input: Single document string or list of document strings
             ids: list of unique document IDs, if not provided, MD5 hash IDs will be generated
             file_paths: list of file paths corresponding to each document, used for citation
+            metadata: list of metadata dicts corresponding to each document (published_at, source, url)
         """
         if isinstance(input, str):
             input = [input]
@@ -709,6 +992,18 @@ class LightRAG:
             # If no file paths provided, use placeholder
             file_paths = ["unknown_source"] * len(input)
 
+        # If metadata is provided, ensure it matches the number of documents
+        if isinstance(metadata, dict):
+            metadata = [metadata]
+        if metadata is not None:
+            if len(metadata) != len(input):
+                raise ValueError(
+                    "Number of metadata must match the number of documents"
+                )
+            metadata = [normalize_doc_metadata(meta) for meta in metadata]
+        else:
+            metadata = [{}] * len(input)
+
         # 1. Validate ids if provided or generate MD5 hash IDs
         if ids is not None:
             # Check if the number of IDs matches the number of documents
@@ -721,28 +1016,30 @@ class LightRAG:
 
             # Generate contents dict of IDs provided by user and documents
             contents = {
-                id_: {"content": doc, "file_path": path}
-                for id_, doc, path in zip(ids, input, file_paths)
+                id_: {"content": doc, "file_path": path, "metadata": meta}
+                for id_, doc, path, meta in zip(ids, input, file_paths, metadata)
             }
         else:
             # Clean input text and remove duplicates
             cleaned_input = [
-                (clean_text(doc), path) for doc, path in zip(input, file_paths)
+                (clean_text(doc), path, meta)
+                for doc, path, meta in zip(input, file_paths, metadata)
             ]
             unique_content_with_paths = {}
 
             # Keep track of unique content and their paths
-            for content, path in cleaned_input:
+            for content, path, meta in cleaned_input:
                 if content not in unique_content_with_paths:
-                    unique_content_with_paths[content] = path
+                    unique_content_with_paths[content] = (path, meta)
 
             # Generate contents dict of MD5 hash IDs and documents with paths
             contents = {
                 compute_mdhash_id(content, prefix="doc-"): {
                     "content": content,
                     "file_path": path,
+                    "metadata": meta,
                 }
-                for content, path in unique_content_with_paths.items()
+                for content, (path, meta) in unique_content_with_paths.items()
             }
 
         # 2. Remove duplicate contents
@@ -751,12 +1048,12 @@ class LightRAG:
             content = content_data["content"]
             file_path = content_data["file_path"]
             if content not in unique_contents:
-                unique_contents[content] = (id_, file_path)
+                unique_contents[content] = (id_, file_path, content_data["metadata"])
 
         # Reconstruct contents with unique content
         contents = {
-            id_: {"content": content, "file_path": file_path}
-            for content, (id_, file_path) in unique_contents.items()
+            id_: {"content": content, "file_path": file_path, "metadata": meta}
+            for content, (id_, file_path, meta) in unique_contents.items()
         }
 
         # 3. Generate document initial status
@@ -771,6 +1068,7 @@ class LightRAG:
                 "file_path": content_data[
                     "file_path"
                 ],  # Store file path in document status
+                "metadata": content_data["metadata"],
             }
             for id_, content_data in contents.items()
         }
@@ -811,6 +1109,7 @@ class LightRAG:
         self,
         split_by_character: str | None = None,
         split_by_character_only: bool = False,
+        persist_per_document: bool = True,
     ) -> None:
         """
         Process pending documents by splitting them into chunks, processing
@@ -821,6 +1120,9 @@ class LightRAG:
         2. Split document content into chunks
         3. Process each chunk for entity and relation extraction
         4. Update the document status
+
+        If persist_per_document is False, storages are persisted once after all
+        documents are processed instead of after every document.
         """
 
         # Get pipeline status shared data and lock
@@ -902,6 +1204,20 @@ class LightRAG:
                 processed_count = 0
                 # Create a semaphore to limit the number of concurrent file processing
                 semaphore = asyncio.Semaphore(self.max_parallel_insert)
+                # Shared by all documents so that their chunks can share extraction prompts
+                chunk_batcher = None
+                if self.entity_extract_batch_size > 1:
+                    chunk_batcher = MicroBatcher(
+                        partial(
+                            extract_entities_batch,
+                            global_config=asdict(self),
+                            llm_response_cache=self.llm_response_cache,
+                            gleaning_policy=self._gleaning_policy,
+                        ),
+                        max_batch_size=self.entity_extract_batch_size,
+                        max_wait=self.entity_extract_batch_wait,
+                        max_concurrency=self.llm_model_max_async,
+                    )
 
                 async def process_document(
                     doc_id: str,
@@ -914,15 +1230,17 @@ class LightRAG:
                 ) -> None:
                     """Process single document"""
                     file_extraction_stage_ok = False
+                    # Get file path from status document
+                    file_path = getattr(status_doc, "file_path", "unknown_source")
+                    chunks: dict[str, Any] | None = None
+                    # Extraction results of chunks finished by a previous failed run
+                    chunk_checkpoints: dict[str, dict] = dict(
+                        getattr(status_doc, "chunk_extractions", None) or {}
+                    )
                     async with semaphore:
                         nonlocal processed_count
                         current_file_number = 0
                         try:
-                            # Get file path from status document
-                            file_path = getattr(
-                                status_doc, "file_path", "unknown_source"
-                            )
-
                             async with pipeline_status_lock:
                                 # Update processed file count and save current file number
                                 processed_count += 1
@@ -940,40 +1258,27 @@ class LightRAG:
                                 pipeline_status["history_messages"].append(log_message)
 
                             # Generate chunks from document
-                            chunks: dict[str, Any] = {
-                                compute_mdhash_id(dp["content"], prefix="chunk-"): {
-                                    **dp,
-                                    "full_doc_id": doc_id,
-                                    "file_path": file_path,  # Add file path to each chunk
-                                }
-                                for dp in self.chunking_func(
-                                    self.tokenizer,
-                                    status_doc.content,
-                                    split_by_character,
-                                    split_by_character_only,
-                                    self.chunk_overlap_token_size,
-                                    self.chunk_token_size,
-                                )
-                            }
+                            chunks = await self._chunk_document(
+                                doc_id,
+                                status_doc,
+                                split_by_character,
+                                split_by_character_only,
+                            )
+                            chunk_checkpoints = self._resumable_chunk_extractions(
+                                status_doc, chunks
+                            )
 
                             # Process document (text chunks and full docs) in parallel
                             # Create tasks with references for potential cancellation
                             doc_status_task = asyncio.create_task(
                                 self.doc_status.upsert(
-                                    {
-                                        doc_id: {
-                                            "status": DocStatus.PROCESSING,
-                                            "chunks_count": len(chunks),
-                                            "content": status_doc.content,
-                                            "content_summary": status_doc.content_summary,
-                                            "content_length": status_doc.content_length,
-                                            "created_at": status_doc.created_at,
-                                            "updated_at": datetime.now(
-                                                timezone.utc
-                                            ).isoformat(),
-                                            "file_path": file_path,
-                                        }
-                                    }
+                                    self._doc_status_record(
+                                        doc_id,
+                                        status_doc,
+                                        DocStatus.PROCESSING,
+                                        chunks,
+                                        chunk_extractions=dict(chunk_checkpoints),
+                                    )
                                 )
                             )
                             chunks_vdb_task = asyncio.create_task(
@@ -981,7 +1286,14 @@ class LightRAG:
                             )
                             entity_relation_task = asyncio.create_task(
                                 self._process_entity_relation_graph(
-                                    chunks, pipeline_status, pipeline_status_lock
+                                    chunks,
+                                    pipeline_status,
+                                    pipeline_status_lock,
+                                    chunk_batcher,
+                                    chunk_checkpoints,
+                                    self._chunk_checkpoint_saver(
+                                        doc_id, status_doc, chunks, chunk_checkpoints
+                                    ),
                                 )
                             )
                             full_docs_task = asyncio.create_task(
@@ -1003,50 +1315,28 @@ class LightRAG:
                             file_extraction_stage_ok = True
 
                         except Exception as e:
-                            # Log error and update pipeline status
-                            logger.error(traceback.format_exc())
-                            error_msg = f"Failed to extrat document {current_file_number}/{total_files}: {file_path}"
-                            logger.error(error_msg)
-                            async with pipeline_status_lock:
-                                pipeline_status["latest_message"] = error_msg
-                                pipeline_status["history_messages"].append(
-                                    traceback.format_exc()
-                                )
-                                pipeline_status["history_messages"].append(error_msg)
-
-                                # Cancel other tasks as they are no longer meaningful
-                                for task in [
-                                    chunks_vdb_task,
-                                    entity_relation_task,
-                                    full_docs_task,
-                                    text_chunks_task,
-                                ]:
-                                    if not task.done():
-                                        task.cancel()
-
-                            # Persistent llm cache
-                            if self.llm_response_cache:
-                                await self.llm_response_cache.index_done_callback()
-
-                            # Update document status to failed
-                            await self.doc_status.upsert(
-                                {
-                                    doc_id: {
-                                        "status": DocStatus.FAILED,
-                                        "error": str(e),
-                                        "content": status_doc.content,
-                                        "content_summary": status_doc.content_summary,
-                                        "content_length": status_doc.content_length,
-                                        "created_at": status_doc.created_at,
-                                        "updated_at": datetime.now(
-                                            timezone.utc
-                                        ).isoformat(),
-                                        "file_path": file_path,
-                                    }
-                                }
+                            # Cancel other tasks as they are no longer meaningful
+                            for task in [
+                                chunks_vdb_task,
+                                entity_relation_task,
+                                full_docs_task,
+                                text_chunks_task,
+                            ]:
+                                if not task.done():
+                                    task.cancel()
+
+                            await self._record_document_failure(
+                                doc_id,
+                                status_doc,
+                                e,
+                                f"Failed to extrat document {current_file_number}/{total_files}: {file_path}",
+                                pipeline_status,
+                                pipeline_status_lock,
+                                chunk_checkpoints,
+                                chunks,
                             )
 
-                    # Semphore released, concurrency controlled by graph_db_lock in merge_nodes_and_edges instead
+                    # Semphore released, concurrency controlled by per node/edge locks in merge_nodes_and_edges instead
 
                     if file_extraction_stage_ok:
                         try:
@@ -1067,80 +1357,64 @@ class LightRAG:
                             )
 
                             await self.doc_status.upsert(
-                                {
-                                    doc_id: {
-                                        "status": DocStatus.PROCESSED,
-                                        "chunks_count": len(chunks),
-                                        "content": status_doc.content,
-                                        "content_summary": status_doc.content_summary,
-                                        "content_length": status_doc.content_length,
-                                        "created_at": status_doc.created_at,
-                                        "updated_at": datetime.now(
-                                            timezone.utc
-                                        ).isoformat(),
-                                        "file_path": file_path,
-                                    }
-                                }
+                                self._doc_status_record(
+                                    doc_id, status_doc, DocStatus.PROCESSED, chunks
+                                )
                             )
 
                             # Call _insert_done after processing each file
-                            await self._insert_done()
+                            if persist_per_document:
+                                await self._insert_done()
 
-                            async with pipeline_status_lock:
-                                log_message = f"Completed processing file {current_file_number}/{total_files}: {file_path}"
-                                logger.info(log_message)
-                                pipeline_status["latest_message"] = log_message
-                                pipeline_status["history_messages"].append(log_message)
+                            await self._log_pipeline_message(
+                                f"Completed processing file {current_file_number}/{total_files}: {file_path}",
+                                pipeline_status,
+                                pipeline_status_lock,
+                            )
 
                         except Exception as e:
-                            # Log error and update pipeline status
-                            logger.error(traceback.format_exc())
-                            error_msg = f"Merging stage failed in document {current_file_number}/{total_files}: {file_path}"
-                            logger.error(error_msg)
-                            async with pipeline_status_lock:
-                                pipeline_status["latest_message"] = error_msg
-                                pipeline_status["history_messages"].append(
-                                    traceback.format_exc()
-                                )
-                                pipeline_status["history_messages"].append(error_msg)
-
-                            # Persistent llm cache
-                            if self.llm_response_cache:
-                                await self.llm_response_cache.index_done_callback()
-
-                            # Update document status to failed
-                            await self.doc_status.upsert(
-                                {
-                                    doc_id: {
-                                        "status": DocStatus.FAILED,
-                                        "error": str(e),
-                                        "content": status_doc.content,
-                                        "content_summary": status_doc.content_summary,
-                                        "content_length": status_doc.content_length,
-                                        "created_at": status_doc.created_at,
-                                        "updated_at": datetime.now().isoformat(),
-                                        "file_path": file_path,
-                                    }
-                                }
+                            await self._record_document_failure(
+                                doc_id,
+                                status_doc,
+                                e,
+                                f"Merging stage failed in document {current_file_number}/{total_files}: {file_path}",
+                                pipeline_status,
+                                pipeline_status_lock,
+                                chunk_checkpoints,
+                                chunks,
                             )
 
-                # Create processing tasks for all documents
-                doc_tasks = []
-                for doc_id, status_doc in to_process_docs.items():
-                    doc_tasks.append(
-                        process_document(
-                            doc_id,
-                            status_doc,
-                            split_by_character,
-                            split_by_character_only,
-                            pipeline_status,
-                            pipeline_status_lock,
-                            semaphore,
-                        )
+                if self.enable_staged_pipeline:
+                    await self._process_documents_staged(
+                        to_process_docs,
+                        split_by_character,
+                        split_by_character_only,
+                        pipeline_status,
+                        pipeline_status_lock,
+                        chunk_batcher,
+                        persist_per_document,
                     )
+                else:
+                    # Create processing tasks for all documents
+                    doc_tasks = []
+                    for doc_id, status_doc in to_process_docs.items():
+                        doc_tasks.append(
+                            process_document(
+                                doc_id,
+                                status_doc,
+                                split_by_character,
+                                split_by_character_only,
+                                pipeline_status,
+                                pipeline_status_lock,
+                                semaphore,
+                            )
+                        )
+
+                    # Wait for all document processing to complete
+                    await asyncio.gather(*doc_tasks)
 
-                # Wait for all document processing to complete
-                await asyncio.gather(*doc_tasks)
+                if not persist_per_document:
+                    await self._insert_done()
 
                 # Check if there's a pending request to process more documents (with lock)
                 has_pending_request = False
@@ -1171,6 +1445,9 @@ class LightRAG:
                 to_process_docs.update(pending_docs)
 
         finally:
+            gleaning_stats = self._gleaning_policy.stats()
+            if gleaning_stats.get("calls_saved"):
+                logger.info(f"Gleaning stats: {gleaning_stats}")
             log_message = "Document processing pipeline completed"
             logger.info(log_message)
             # Always reset busy status when done or if an exception occurs (with lock)
@@ -1179,17 +1456,613 @@ class LightRAG:
                 pipeline_status["latest_message"] = log_message
                 pipeline_status["history_messages"].append(log_message)
 
+    async def _process_documents_staged(
+        self,
+        to_process_docs: dict[str, DocProcessingStatus],
+        split_by_character: str | None,
+        split_by_character_only: bool,
+        pipeline_status: dict,
+        pipeline_status_lock: asyncio.Lock,
+        chunk_batcher: MicroBatcher | None = None,
+        persist_per_document: bool = True,
+    ) -> None:
+        """Process documents through a streaming pipeline of stages
+
+        chunking -> embedding -> extraction -> merging -> persisting
+
+        Stages are connected by queues of at most pipeline_queue_size documents
+        and run their own number of workers (pipeline_stage_concurrency), so the
+        embedding of a document overlaps the extraction of the previous ones
+        while a slow stage throttles the stages feeding it.
+        """
+        total_files = len(to_process_docs)
+        processed_count = 0
+        stage_concurrency = {
+            "chunking": 1,
+            "embedding": 2,
+            "extraction": self.max_parallel_insert,
+            "merging": self.max_parallel_insert,
+            "persisting": 1,
+            **self.pipeline_stage_concurrency,
+        }
+
+        async def _log(message: str) -> None:
+            await self._log_pipeline_message(
+                message, pipeline_status, pipeline_status_lock
+            )
+
+        async def _chunk(doc: dict[str, Any]) -> dict[str, Any]:
+            nonlocal processed_count
+            status_doc = doc["status_doc"]
+            async with pipeline_status_lock:
+                processed_count += 1
+                doc["current_file_number"] = processed_count
+                pipeline_status["cur_batch"] = processed_count
+            await _log(
+                f"Chunking stage {doc['current_file_number']}/{total_files}: {doc['file_path']}"
+            )
+            doc["chunks"] = await self._chunk_document(
+                doc["doc_id"], status_doc, split_by_character, split_by_character_only
+            )
+            doc["chunk_checkpoints"] = self._resumable_chunk_extractions(
+                status_doc, doc["chunks"]
+            )
+            return doc
+
+        async def _embed(doc: dict[str, Any]) -> dict[str, Any]:
+            chunks = doc["chunks"]
+            await asyncio.gather(
+                self.doc_status.upsert(
+                    self._doc_status_record(
+                        doc["doc_id"],
+                        doc["status_doc"],
+                        DocStatus.PROCESSING,
+                        chunks,
+                        chunk_extractions=dict(doc["chunk_checkpoints"]),
+                    )
+                ),
+                self.chunks_vdb.upsert(chunks),
+                self.full_docs.upsert(
+                    {doc["doc_id"]: {"content": doc["status_doc"].content}}
+                ),
+                self.text_chunks.upsert(chunks),
+            )
+            return doc
+
+        async def _extract(doc: dict[str, Any]) -> dict[str, Any]:
+            await _log(
+                f"Extracting stage {doc['current_file_number']}/{total_files}: {doc['file_path']}"
+            )
+            doc["chunk_results"] = await self._process_entity_relation_graph(
+                doc["chunks"],
+                pipeline_status,
+                pipeline_status_lock,
+                chunk_batcher,
+                doc["chunk_checkpoints"],
+                self._chunk_checkpoint_saver(
+                    doc["doc_id"],
+                    doc["status_doc"],
+                    doc["chunks"],
+                    doc["chunk_checkpoints"],
+                ),
+            )
+            return doc
+
+        async def _merge(doc: dict[str, Any]) -> dict[str, Any]:
+            await merge_nodes_and_edges(
+                chunk_results=doc.pop("chunk_results"),
+                knowledge_graph_inst=self.chunk_entity_relation_graph,
+                entity_vdb=self.entities_vdb,
+                relationships_vdb=self.relationships_vdb,
+                global_config=asdict(self),
+                pipeline_status=pipeline_status,
+                pipeline_status_lock=pipeline_status_lock,
+                llm_response_cache=self.llm_response_cache,
+                current_file_number=doc["current_file_number"],
+                total_files=total_files,
+                file_path=doc["file_path"],
+            )
+            return doc
+
+        async def _persist(doc: dict[str, Any]) -> None:
+            await self.doc_status.upsert(
+                self._doc_status_record(
+                    doc["doc_id"], doc["status_doc"], DocStatus.PROCESSED, doc["chunks"]
+                )
+            )
+            if persist_per_document:
+                await self._insert_done()
+            await _log(
+                f"Completed processing file {doc['current_file_number']}/{total_files}: {doc['file_path']}"
+            )
+
+        async def _on_error(doc: dict[str, Any], stage: str, e: Exception) -> None:
+            await self._record_document_failure(
+                doc["doc_id"],
+                doc["status_doc"],
+                e,
+                f"{stage.capitalize()} stage failed in document {doc.get('current_file_number', 0)}/{total_files}: {doc['file_path']}",
+                pipeline_status,
+                pipeline_status_lock,
+                doc.get(
+                    "chunk_checkpoints",
+                    dict(doc["status_doc"].chunk_extractions or {}),
+                ),
+                doc.get("chunks"),
+            )
+
+        await run_pipeline_stages(
+            (
+                {
+                    "doc_id": doc_id,
+                    "status_doc": status_doc,
+                    "file_path": getattr(status_doc, "file_path", "unknown_source"),
+                }
+                for doc_id, status_doc in to_process_docs.items()
+            ),
+            [
+                PipelineStage("chunking", _chunk, stage_concurrency["chunking"]),
+                PipelineStage("embedding", _embed, stage_concurrency["embedding"]),
+                PipelineStage("extraction", _extract, stage_concurrency["extraction"]),
+                PipelineStage("merging", _merge, stage_concurrency["merging"]),
+                PipelineStage("persisting", _persist, stage_concurrency["persisting"]),
+            ],
+            queue_size=self.pipeline_queue_size,
+            on_error=_on_error,
+        )
+
+    def _get_chunking_executor(self) -> ProcessPoolExecutor | None:
+        """Process pool running chunking_func, None to chunk on the event loop"""
+        if self.chunking_max_workers <= 0:
+            return None
+        if self._chunking_executor is None:
+            try:
+                pickle.dumps((self.tokenizer, self.chunking_func))
+            except Exception as e:
+                logger.warning(
+                    f"Chunking on the event loop, tokenizer or chunking_func cannot be sent to worker processes: {e}"
+                )
+                self.chunking_max_workers = 0
+                return None
+            self._chunking_executor = ProcessPoolExecutor(
+                max_workers=self.chunking_max_workers,
+                initializer=init_chunking_worker,
+                initargs=(self.tokenizer, self.chunking_func),
+            )
+        return self._chunking_executor
+
+    async def _chunk_content(
+        self,
+        content: str,
+        split_by_character: str | None,
+        split_by_character_only: bool,
+    ) -> list[dict[str, Any]]:
+        """Split document content with chunking_func, in a worker process if configured"""
+        args = (
+            split_by_character,
+            split_by_character_only,
+            self.chunk_overlap_token_size,
+            self.chunk_token_size,
+        )
+        executor = self._get_chunking_executor()
+        if executor is None:
+            return self.chunking_func(self.tokenizer, content, *args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, run_chunking_in_worker, content, *args
+        )
+
+    async def _chunk_document(
+        self,
+        doc_id: str,
+        status_doc: DocProcessingStatus,
+        split_by_character: str | None,
+        split_by_character_only: bool,
+    ) -> dict[str, Any]:
+        """Split a document into chunks keyed by chunk id
+
+        Every chunk carries the document id, file path and the document
+        metadata fields (published_at, source, url).
+        """
+        doc_metadata = getattr(status_doc, "metadata", None) or {}
+        chunk_metadata = {
+            k: doc_metadata[k]
+            for k in DOC_METADATA_FIELDS
+            if doc_metadata.get(k) is not None
+        }
+        return {
+            compute_mdhash_id(dp["content"], prefix="chunk-"): {
+                **dp,
+                "full_doc_id": doc_id,
+                "file_path": getattr(status_doc, "file_path", "unknown_source"),
+                **chunk_metadata,
+            }
+            for dp in await self._chunk_content(
+                status_doc.content, split_by_character, split_by_character_only
+            )
+        }
+
+    @staticmethod
+    def _resumable_chunk_extractions(
+        status_doc: DocProcessingStatus, chunks: dict[str, Any]
+    ) -> dict[str, dict]:
+        """Extraction results of a previous failed run still matching a chunk"""
+        return {
+            k: v
+            for k, v in (getattr(status_doc, "chunk_extractions", None) or {}).items()
+            if k in chunks
+        }
+
+    def _chunk_checkpoint_saver(
+        self,
+        doc_id: str,
+        status_doc: DocProcessingStatus,
+        chunks: dict[str, Any],
+        chunk_checkpoints: dict[str, dict],
+    ) -> Callable[[], Awaitable[None]]:
+        """Callback saving chunk_checkpoints on the PROCESSING doc status record
+
+        extract_entities calls it whenever a chunk is done. Calls made while a
+        save is running wait for it and are then covered by it, so the chunks of
+        an extraction batch finishing together cost a single save. Saves are
+        at most one per chunk_checkpoint_interval seconds; the failure handler
+        saves whatever is left when a chunk fails.
+        """
+        lock = asyncio.Lock()
+        saved_count = len(chunk_checkpoints)
+        saved_at = time.monotonic()
+
+        async def save() -> None:
+            nonlocal saved_count, saved_at
+            async with lock:
+                if len(chunk_checkpoints) == saved_count:
+                    return
+                if time.monotonic() - saved_at < self.chunk_checkpoint_interval:
+                    return
+                saved_count = len(chunk_checkpoints)
+                saved_at = time.monotonic()
+                try:
+                    await self.doc_status.upsert(
+                        self._doc_status_record(
+                            doc_id,
+                            status_doc,
+                            DocStatus.PROCESSING,
+                            chunks,
+                            chunk_extractions=dict(chunk_checkpoints),
+                        )
+                    )
+                    # Local storages only write to disk on index_done_callback
+                    await self.doc_status.index_done_callback()
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to save extraction checkpoints of {doc_id}: {e}"
+                    )
+
+        return save
+
+    @staticmethod
+    def _doc_status_record(
+        doc_id: str,
+        status_doc: DocProcessingStatus,
+        status: DocStatus,
+        chunks: dict[str, Any] | None = None,
+        **fields: Any,
+    ) -> dict[str, dict[str, Any]]:
+        """Doc status upsert moving status_doc to status, updated_at in UTC"""
+        record = {
+            "status": status,
+            "content": status_doc.content,
+            "content_summary": status_doc.content_summary,
+            "content_length": status_doc.content_length,
+            "created_at": status_doc.created_at,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "file_path": getattr(status_doc, "file_path", "unknown_source"),
+            "metadata": getattr(status_doc, "metadata", None) or {},
+            **fields,
+        }
+        if chunks is not None:
+            record["chunks_count"] = len(chunks)
+        return {doc_id: record}
+
+    @staticmethod
+    async def _log_pipeline_message(
+        message: str, pipeline_status: dict, pipeline_status_lock: asyncio.Lock
+    ) -> None:
+        logger.info(message)
+        async with pipeline_status_lock:
+            pipeline_status["latest_message"] = message
+            pipeline_status["history_messages"].append(message)
+
+    async def _record_document_failure(
+        self,
+        doc_id: str,
+        status_doc: DocProcessingStatus,
+        error: Exception,
+        error_msg: str,
+        pipeline_status: dict,
+        pipeline_status_lock: asyncio.Lock,
+        chunk_checkpoints: dict[str, dict],
+        chunks: dict[str, Any] | None = None,
+    ) -> None:
+        """Log a document failure and mark the document FAILED
+
+        Must be called while handling the exception, the traceback is logged.
+        The extraction results of finished chunks are kept so a retry only
+        extracts the remaining chunks.
+        """
+        logger.error(traceback.format_exc())
+        logger.error(error_msg)
+        async with pipeline_status_lock:
+            pipeline_status["latest_message"] = error_msg
+            pipeline_status["history_messages"].append(traceback.format_exc())
+            pipeline_status["history_messages"].append(error_msg)
+
+        # Persistent llm cache
+        if self.llm_response_cache:
+            await self.llm_response_cache.index_done_callback()
+
+        await self.doc_status.upsert(
+            self._doc_status_record(
+                doc_id,
+                status_doc,
+                DocStatus.FAILED,
+                chunks,
+                error=str(error),
+                chunk_extractions=chunk_checkpoints,
+            )
+        )
+
+    async def _get_chunk_dedup_index(self) -> SimHashIndex:
+        """Fingerprints of extracted chunks
+
+        Read from the fingerprint file on first use, then extended in memory as
+        chunks are extracted. The fingerprints saved by other processes are
+        merged in when their update flag is set.
+        """
+        async with self._chunk_dedup_lock:
+            if self._chunk_dedup_updated is None:
+                self._chunk_dedup_updated = await get_update_flag(
+                    f"{self.text_chunks.namespace}_simhash"
+                )
+            if self._chunk_dedup_index is None:
+                self._chunk_dedup_updated.value = False
+                self._chunk_dedup_index = SimHashIndex()
+                async with get_storage_lock():
+                    fingerprints = load_json(self._chunk_dedup_file)
+                if fingerprints is None:
+                    fingerprints = await self._fingerprints_from_text_chunks()
+                    self._chunk_dedup_dirty = bool(fingerprints)
+                self._add_chunk_fingerprints(fingerprints)
+            elif self._chunk_dedup_updated.value:
+                self._chunk_dedup_updated.value = False
+                async with get_storage_lock():
+                    self._add_chunk_fingerprints(load_json(self._chunk_dedup_file))
+            return self._chunk_dedup_index
+
+    def _add_chunk_fingerprints(self, fingerprints: dict[str, str] | None) -> None:
+        for chunk_id, fingerprint in (fingerprints or {}).items():
+            self._chunk_dedup_index.add(chunk_id, int(fingerprint, 16))
+
+    async def _fingerprints_from_text_chunks(self) -> dict[str, str]:
+        """Fingerprints stored on chunk records by versions without the fingerprint
+        file, read once to create it"""
+        try:
+            chunks = await self.text_chunks.get_all()
+        except NotImplementedError:
+            logger.warning(
+                f"{type(self.text_chunks).__name__} cannot list its chunks, "
+                "near-duplicates are only detected among chunks extracted from now on"
+            )
+            return {}
+        return {
+            chunk_id: chunk["simhash"]
+            for chunk_id, chunk in chunks.items()
+            if chunk.get("simhash") and chunk.get("extracted")
+        }
+
+    async def _save_chunk_dedup_index(self) -> None:
+        """Write the fingerprint file and tell the other processes to reload it"""
+        if not self._chunk_dedup_dirty:
+            return
+        async with self._chunk_dedup_lock:
+            async with get_storage_lock():
+                # Keep the fingerprints other processes saved since our last read
+                self._add_chunk_fingerprints(load_json(self._chunk_dedup_file))
+                write_json(
+                    {
+                        chunk_id: format(fingerprint, "016x")
+                        for chunk_id, fingerprint in (
+                            self._chunk_dedup_index.fingerprints().items()
+                        )
+                    },
+                    self._chunk_dedup_file,
+                )
+            self._chunk_dedup_dirty = False
+            await set_all_update_flags(f"{self.text_chunks.namespace}_simhash")
+            self._chunk_dedup_updated.value = False
+
+    async def _find_duplicate_chunks(
+        self, chunks: dict[str, Any]
+    ) -> tuple[dict[str, dict], dict[str, dict]]:
+        """Fingerprint chunks and find the near-duplicates of extracted chunks
+
+        The chunk records are left untouched, their text_chunks upsert may still
+        be running; the fields to store are returned instead.
+
+        Returns:
+            tuple: chunk id -> fields to store on the chunk record ("simhash",
+            and "duplicate_of" for duplicates), and duplicate chunk id ->
+            "extracted" record of the already extracted chunk (see
+            _record_chunk_extractions)
+        """
+        index = await self._get_chunk_dedup_index()
+        fingerprints = {}
+        candidates = {}
+        for chunk_id, chunk in chunks.items():
+            fingerprint = simhash(chunk["content"])
+            if fingerprint is None:
+                continue
+            fingerprints[chunk_id] = {"simhash": format(fingerprint, "016x")}
+            original_id = index.find(
+                fingerprint, self.chunk_dedup_max_distance, exclude=set(chunks)
+            )
+            if original_id is not None:
+                candidates[chunk_id] = original_id
+
+        # The extraction of the original chunk must still be available
+        original_ids = list(set(candidates.values()))
+        extracted = {
+            original_id: original["extracted"]
+            for original_id, original in zip(
+                original_ids, await self.text_chunks.get_by_ids(original_ids)
+            )
+            if original and original.get("extracted")
+        }
+        duplicates = {}
+        for chunk_id, original_id in candidates.items():
+            if original_id in extracted:
+                fingerprints[chunk_id]["duplicate_of"] = original_id
+                duplicates[chunk_id] = extracted[original_id]
+            else:
+                index.remove(original_id)
+        if duplicates:
+            logger.info(
+                f"Skipping extraction of {len(duplicates)} near-duplicate chunk(s)"
+            )
+        return fingerprints, duplicates
+
+    async def _record_chunk_extractions(
+        self,
+        chunks: dict[str, Any],
+        fingerprints: dict[str, dict],
+        chunk_results: list,
+    ) -> None:
+        """Store which entities and relations were extracted from each chunk
+
+        Lets near-duplicates of these chunks reuse the extraction later on.
+        """
+        index = await self._get_chunk_dedup_index()
+        recorded = {}
+        for (chunk_id, chunk), (maybe_nodes, maybe_edges) in zip(
+            chunks.items(), chunk_results
+        ):
+            if chunk_id not in fingerprints:
+                continue
+            # New records: the text_chunks upsert of the document may still be
+            # serializing the original chunk dicts
+            recorded[chunk_id] = {
+                **chunk,
+                **fingerprints[chunk_id],
+                "extracted": {
+                    "entities": list(maybe_nodes),
+                    "relations": [
+                        [src_id, tgt_id, sum(edge["weight"] for edge in edges)]
+                        for (src_id, tgt_id), edges in maybe_edges.items()
+                    ],
+                },
+            }
+            index.add(chunk_id, int(fingerprints[chunk_id]["simhash"], 16))
+            self._chunk_dedup_dirty = True
+        if recorded:
+            await self.text_chunks.upsert(recorded)
+
+    async def _reuse_duplicate_extractions(
+        self, duplicates: dict[str, dict], chunks: dict[str, Any]
+    ) -> list:
+        """Build extraction results of duplicate chunks from their originals
+
+        The entities and relations extracted from the original chunk are linked
+        to the duplicate with their current graph description, so merging only
+        adds the duplicate's source_id, file_path and publication time.
+        """
+        if not duplicates:
+            return []
+        entity_names = {
+            name for extracted in duplicates.values() for name in extracted["entities"]
+        }
+        edge_pairs = {
+            (src_id, tgt_id)
+            for extracted in duplicates.values()
+            for src_id, tgt_id, _ in extracted["relations"]
+        }
+        graph = self.chunk_entity_relation_graph
+        nodes, edges = await asyncio.gather(
+            graph.get_nodes_batch(list(entity_names)),
+            graph.get_edges_batch(
+                [{"src": src_id, "tgt": tgt_id} for src_id, tgt_id in edge_pairs]
+            ),
+        )
+
+        chunk_results = []
+        for chunk_id, extracted in duplicates.items():
+            chunk = chunks[chunk_id]
+            source = dict(
+                source_id=chunk_id,
+                file_path=chunk.get("file_path", "unknown_source"),
+                published_at=chunk.get("published_at"),
+            )
+            maybe_nodes = defaultdict(list)
+            maybe_edges = defaultdict(list)
+            for name in extracted["entities"]:
+                if name in nodes:
+                    maybe_nodes[name].append(
+                        dict(
+                            entity_name=name,
+                            entity_type=nodes[name]["entity_type"],
+                            description=nodes[name]["description"],
+                            **source,
+                        )
+                    )
+            for src_id, tgt_id, weight in extracted["relations"]:
+                edge = edges.get((src_id, tgt_id))
+                if edge:
+                    maybe_edges[(src_id, tgt_id)].append(
+                        dict(
+                            src_id=src_id,
+                            tgt_id=tgt_id,
+                            weight=weight,
+                            description=edge.get("description", ""),
+                            keywords=edge.get("keywords", ""),
+                            **source,
+                        )
+                    )
+            chunk_results.append((maybe_nodes, maybe_edges))
+        return chunk_results
+
     async def _process_entity_relation_graph(
-        self, chunk: dict[str, Any], pipeline_status=None, pipeline_status_lock=None
+        self,
+        chunk: dict[str, Any],
+        pipeline_status=None,
+        pipeline_status_lock=None,
+        chunk_batcher: MicroBatcher | None = None,
+        chunk_checkpoints: dict[str, dict] | None = None,
+        on_chunk_checkpoint: Callable[[], Awaitable[None]] | None = None,
     ) -> list:
         try:
+            fingerprints, duplicates = {}, {}
+            if self.enable_chunk_dedup:
+                fingerprints, duplicates = await self._find_duplicate_chunks(chunk)
+            to_extract = {k: v for k, v in chunk.items() if k not in duplicates}
             chunk_results = await extract_entities(
-                chunk,
+                to_extract,
                 global_config=asdict(self),
                 pipeline_status=pipeline_status,
                 pipeline_status_lock=pipeline_status_lock,
                 llm_response_cache=self.llm_response_cache,
+                chunk_batcher=chunk_batcher,
+                gleaning_policy=self._gleaning_policy,
+                chunk_checkpoints=chunk_checkpoints,
+                on_chunk_checkpoint=on_chunk_checkpoint,
             )
+            if self.enable_chunk_dedup:
+                chunk_results += await self._reuse_duplicate_extractions(
+                    duplicates, chunk
+                )
+                await self._record_chunk_extractions(
+                    {**to_extract, **{k: chunk[k] for k in duplicates}},
+                    fingerprints,
+                    chunk_results,
+                )
             return chunk_results
         except Exception as e:
             error_msg = f"Failed to extract entities and relationships: {str(e)}"
@@ -1216,6 +2089,8 @@ class LightRAG:
             if storage_inst is not None
         ]
         await asyncio.gather(*tasks)
+        if self.enable_chunk_dedup:
+            await self._save_chunk_dedup_index()
 
         log_message = "In memory DB persist to disk"
         logger.info(log_message)
@@ -1724,6 +2599,8 @@ class LightRAG:
             if chunk_ids:
                 await self.chunks_vdb.delete(chunk_ids)
                 await self.text_chunks.delete(chunk_ids)
+                if self.text_chunks.read_cache is not None:
+                    self.text_chunks.read_cache.invalidate(chunk_ids)
 
             # 5. Find and process entities and relationships that have these chunks as source
             # Get all nodes and edges from the graph storage using storage-agnostic methods
@@ -1789,16 +2666,33 @@ class LightRAG:
                 logger.debug(f"Deleted {len(entities_to_delete)} entities from graph")
 
             # Update entities
+            entities_for_vdb = {}
             for entity, new_source_id in entities_to_update.items():
                 node_data = await self.chunk_entity_relation_graph.get_node(entity)
                 if node_data:
                     node_data["source_id"] = new_source_id
+                    # Drop observations made by the deleted chunks
+                    prune_observations(
+                        node_data, set(new_source_id.split(GRAPH_FIELD_SEP))
+                    )
                     await self.chunk_entity_relation_graph.upsert_node(
                         entity, node_data
                     )
+                    entities_for_vdb[compute_mdhash_id(entity, prefix="ent-")] = {
+                        "entity_name": entity,
+                        "entity_type": node_data.get("entity_type", "UNKNOWN"),
+                        "content": f"{entity}\n{node_data.get('description', '')}",
+                        "source_id": new_source_id,
+                        "file_path": node_data.get("file_path", "unknown_source"),
+                        "published_at": node_data.get("published_at"),
+                        "published_ats": list(element_timestamps(node_data)),
+                    }
                     logger.debug(
                         f"Updated entity {entity} with new source_id: {new_source_id}"
                     )
+            # Keep the time metadata of the vector records in step with the graph
+            if entities_for_vdb:
+                await self.entities_vdb.upsert(entities_for_vdb)
 
             # Delete relationships
             if relationships_to_delete:
@@ -1815,16 +2709,43 @@ class LightRAG:
                 )
 
             # Update relationships
+            relationships_for_vdb = {}
             for (src, tgt), new_source_id in relationships_to_update.items():
                 edge_data = await self.chunk_entity_relation_graph.get_edge(src, tgt)
                 if edge_data:
                     edge_data["source_id"] = new_source_id
+                    # Drop observations made by the deleted chunks
+                    prune_observations(
+                        edge_data, set(new_source_id.split(GRAPH_FIELD_SEP))
+                    )
                     await self.chunk_entity_relation_graph.upsert_edge(
                         src, tgt, edge_data
                     )
+                    # Keep the vector record under the orientation it was stored with
+                    rel_id = compute_mdhash_id(src + tgt, prefix="rel-")
+                    reverse_id = compute_mdhash_id(tgt + src, prefix="rel-")
+                    if reverse_id in relationships_for_vdb:
+                        continue
+                    if await self.relationships_vdb.get_by_id(rel_id) is None:
+                        if await self.relationships_vdb.get_by_id(reverse_id):
+                            src, tgt = tgt, src
+                            rel_id = reverse_id
+                    keywords = edge_data.get("keywords", "")
+                    relationships_for_vdb[rel_id] = {
+                        "src_id": src,
+                        "tgt_id": tgt,
+                        "keywords": keywords,
+                        "content": f"{src}\t{tgt}\n{keywords}\n{edge_data.get('description', '')}",
+                        "source_id": new_source_id,
+                        "file_path": edge_data.get("file_path", "unknown_source"),
+                        "published_at": edge_data.get("published_at"),
+                        "published_ats": list(element_timestamps(edge_data)),
+                    }
                     logger.debug(
                         f"Updated relationship {src}-{tgt} with new source_id: {new_source_id}"
                     )
+            if relationships_for_vdb:
+                await self.relationships_vdb.upsert(relationships_for_vdb)
 
             # 6. Delete original document and status
             await self.full_docs.delete([doc_id])
@@ -1969,6 +2890,15 @@ class LightRAG:
         """
         return await self.doc_status.get_status_counts()
 
+    def get_gleaning_stats(self) -> dict[str, int]:
+        """Get counters of the adaptive gleaning policy
+
+        Returns:
+            Dict with the number of extraction prompts, gleaned and skipped
+            prompts per skip reason, and the LLM calls saved by skipping
+        """
+        return self._gleaning_policy.stats()
+
     async def get_entity_info(
         self, entity_name: str, include_vector_data: bool = False
     ) -> dict[str, str | None | dict[str, str]]:
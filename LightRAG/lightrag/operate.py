@@ -1,14 +1,19 @@
 from __future__ import annotations
 from functools import partial
+from dataclasses import replace
+from datetime import date, timedelta
 
 import asyncio
+import bisect
+import copy
 import json
 import re
 import os
-from typing import Any, AsyncIterator
+from typing import Any, AsyncIterator, Awaitable, Callable
 from collections import Counter, defaultdict
 
 from .utils import (
+    MicroBatcher,
     logger,
     clean_str,
     compute_mdhash_id,
@@ -18,13 +23,17 @@ from .utils import (
     pack_user_ass_to_openai_messages,
     split_string_by_multi_markers,
     truncate_list_by_token_size,
+    stored_token_count,
     process_combine_contexts,
+    pack_contexts_by_token_budget,
+    render_context_rows,
     compute_args_hash,
     handle_cache,
     save_to_cache,
     CacheData,
     get_conversation_turns,
     use_llm_func_with_cache,
+    prefetched_embeddings,
 )
 from .base import (
     BaseGraphStorage,
@@ -34,6 +43,18 @@ from .base import (
     QueryParam,
 )
 from .prompt import GRAPH_FIELD_SEP, PROMPTS
+from .temporal import (
+    find_date_ranges,
+    has_date_reference,
+    to_epoch,
+    in_time_range,
+    any_in_time_range,
+    record_timestamp,
+    element_observations,
+    element_timestamps,
+    rerank_by_recency,
+    encode_observations,
+)
 import time
 from dotenv import load_dotenv
 
@@ -51,7 +72,89 @@ def chunking_by_token_size(
     overlap_token_size: int = 128,
     max_token_size: int = 1024,
 ) -> list[dict[str, Any]]:
-    tokens = tokenizer.encode(content)
+    """Split content into chunks of at most max_token_size tokens
+
+    The document is tokenized once. When the tokenizer maps tokens to character
+    offsets, chunks and their token counts are sliced from that single token
+    stream and the original string; otherwise token windows are decoded.
+    """
+    tokens, offsets = tokenizer.encode_with_offsets(content)
+    if offsets is None:
+        return _chunking_by_token_decoding(
+            tokenizer,
+            content,
+            tokens,
+            split_by_character,
+            split_by_character_only,
+            overlap_token_size,
+            max_token_size,
+        )
+
+    def _token_windows(first: int, last: int, char_start: int, char_end: int):
+        """(token count, text) windows over tokens [first, last) clipped to the span"""
+        windows = []
+        for start in range(first, last, max_token_size - overlap_token_size):
+            end = min(start + max_token_size, last)
+            start_char = max(offsets[start], char_start)
+            end_char = offsets[end] if end < last else char_end
+            windows.append((end - start, content[start_char:end_char]))
+        return windows
+
+    new_chunks: list[tuple[int, str]] = []
+    if split_by_character:
+        char_start = 0
+        for chunk in content.split(split_by_character):
+            char_end = char_start + len(chunk)
+            # Tokens overlapping the piece, including tokens that straddle the
+            # separator (encoding the piece alone would yield a partial token)
+            first = max(bisect.bisect_right(offsets, char_start) - 1, 0)
+            last = bisect.bisect_left(offsets, char_end) if chunk else first
+            if split_by_character_only or last - first <= max_token_size:
+                new_chunks.append((last - first, chunk))
+            else:
+                new_chunks.extend(_token_windows(first, last, char_start, char_end))
+            char_start = char_end + len(split_by_character)
+    else:
+        new_chunks = _token_windows(0, len(tokens), 0, len(content))
+
+    return [
+        {
+            "tokens": _len,
+            "content": chunk.strip(),
+            "chunk_order_index": index,
+        }
+        for index, (_len, chunk) in enumerate(new_chunks)
+    ]
+
+
+# Tokenizer and chunking function of a chunking worker process, set once by
+# init_chunking_worker so that they are not pickled with every document
+_chunking_worker_state: dict[str, Any] = {}
+
+
+def init_chunking_worker(tokenizer: Tokenizer, chunking_func: Callable) -> None:
+    """ProcessPoolExecutor initializer of the chunking worker processes"""
+    _chunking_worker_state["tokenizer"] = tokenizer
+    _chunking_worker_state["chunking_func"] = chunking_func
+
+
+def run_chunking_in_worker(content: str, *args) -> list[dict[str, Any]]:
+    """Chunk content in a worker process set up by init_chunking_worker"""
+    return _chunking_worker_state["chunking_func"](
+        _chunking_worker_state["tokenizer"], content, *args
+    )
+
+
+def _chunking_by_token_decoding(
+    tokenizer: Tokenizer,
+    content: str,
+    tokens: list[int],
+    split_by_character: str | None = None,
+    split_by_character_only: bool = False,
+    overlap_token_size: int = 128,
+    max_token_size: int = 1024,
+) -> list[dict[str, Any]]:
+    """Chunking for tokenizers without character offsets, decoding token windows"""
     results: list[dict[str, Any]] = []
     if split_by_character:
         raw_chunks = content.split(split_by_character)
@@ -153,6 +256,7 @@ async def _handle_single_entity_extraction(
     record_attributes: list[str],
     chunk_key: str,
     file_path: str = "unknown_source",
+    published_at: int | None = None,
 ):
     if len(record_attributes) < 4 or '"entity"' not in record_attributes[0]:
         return None
@@ -192,6 +296,7 @@ async def _handle_single_entity_extraction(
         description=entity_description,
         source_id=chunk_key,
         file_path=file_path,
+        published_at=published_at,
     )
 
 
@@ -199,6 +304,7 @@ async def _handle_single_relationship_extraction(
     record_attributes: list[str],
     chunk_key: str,
     file_path: str = "unknown_source",
+    published_at: int | None = None,
 ):
     if len(record_attributes) < 5 or '"relationship"' not in record_attributes[0]:
         return None
@@ -237,25 +343,27 @@ async def _handle_single_relationship_extraction(
         keywords=edge_keywords,
         source_id=edge_source_id,
         file_path=file_path,
+        published_at=published_at,
     )
 
 
-async def _merge_nodes_then_upsert(
+async def _merge_node_data(
     entity_name: str,
     nodes_data: list[dict],
-    knowledge_graph_inst: BaseGraphStorage,
+    already_node: dict | None,
     global_config: dict,
     pipeline_status: dict = None,
     pipeline_status_lock=None,
     llm_response_cache: BaseKVStorage | None = None,
-):
-    """Get existing nodes from knowledge graph use name,if exists, merge data, else create, then upsert."""
+) -> dict:
+    """Merge extracted node data into the existing node (if any), return the node data to upsert."""
     already_entity_types = []
     already_source_ids = []
     already_description = []
     already_file_paths = []
+    already_published_ats = []
+    already_observations = []
 
-    already_node = await knowledge_graph_inst.get_node(entity_name)
     if already_node is not None:
         already_entity_types.append(already_node["entity_type"])
         already_source_ids.extend(
@@ -265,6 +373,10 @@ async def _merge_nodes_then_upsert(
             split_string_by_multi_markers(already_node["file_path"], [GRAPH_FIELD_SEP])
         )
         already_description.append(already_node["description"])
+        if already_node.get("published_at") is not None:
+            already_published_ats.append(to_epoch(already_node["published_at"]))
+        # Get (timestamp, chunk_id) observations
+        already_observations = element_observations(already_node)
 
     entity_type = sorted(
         Counter(
@@ -282,6 +394,21 @@ async def _merge_nodes_then_upsert(
     file_path = GRAPH_FIELD_SEP.join(
         set([dp["file_path"] for dp in nodes_data] + already_file_paths)
     )
+    # Most recent publication time among all source chunks (event time, not ingest time)
+    published_ats = [
+        dp["published_at"] for dp in nodes_data if dp.get("published_at") is not None
+    ] + already_published_ats
+    published_at = max(published_ats) if published_ats else None
+    # One observation per dated mention, so that the entity stays inside the
+    # windows of its earlier sources once later ones mention it
+    observations = encode_observations(
+        [
+            (dp["published_at"], dp["source_id"])
+            for dp in nodes_data
+            if dp.get("source_id") and dp.get("published_at") is not None
+        ]
+        + already_observations
+    )
 
     force_llm_summary_on_merge = global_config["force_llm_summary_on_merge"]
 
@@ -316,28 +443,32 @@ async def _merge_nodes_then_upsert(
         entity_id=entity_name,
         entity_type=entity_type,
         description=description,
+        description_tokens=len(global_config["tokenizer"].encode(description)),
         source_id=source_id,
         file_path=file_path,
         created_at=int(time.time()),
+        observations=observations,
     )
-    await knowledge_graph_inst.upsert_node(
-        entity_name,
-        node_data=node_data,
-    )
-    node_data["entity_name"] = entity_name
+    if published_at is not None:
+        node_data["published_at"] = published_at
     return node_data
 
 
-async def _merge_edges_then_upsert(
+async def _merge_edge_data(
     src_id: str,
     tgt_id: str,
     edges_data: list[dict],
-    knowledge_graph_inst: BaseGraphStorage,
+    already_edge: dict | None,
     global_config: dict,
     pipeline_status: dict = None,
     pipeline_status_lock=None,
     llm_response_cache: BaseKVStorage | None = None,
-):
+) -> tuple[dict, dict] | None:
+    """Merge extracted edge data into the existing edge (if any).
+
+    Returns the edge data to upsert into the graph and the edge data for the
+    vector database, or None for self loops.
+    """
     if src_id == tgt_id:
         return None
 
@@ -346,41 +477,48 @@ async def _merge_edges_then_upsert(
     already_description = []
     already_keywords = []
     already_file_paths = []
-
-    if await knowledge_graph_inst.has_edge(src_id, tgt_id):
-        already_edge = await knowledge_graph_inst.get_edge(src_id, tgt_id)
-        # Handle the case where get_edge returns None or missing fields
-        if already_edge:
-            # Get weight with default 0.0 if missing
-            already_weights.append(already_edge.get("weight", 0.0))
-
-            # Get source_id with empty string default if missing or None
-            if already_edge.get("source_id") is not None:
-                already_source_ids.extend(
-                    split_string_by_multi_markers(
-                        already_edge["source_id"], [GRAPH_FIELD_SEP]
-                    )
+    already_published_ats = []
+    already_observations = []
+
+    # Handle the case where get_edge returns None or missing fields
+    if already_edge:
+        # Get weight with default 0.0 if missing
+        already_weights.append(already_edge.get("weight", 0.0))
+
+        # Get source_id with empty string default if missing or None
+        if already_edge.get("source_id") is not None:
+            already_source_ids.extend(
+                split_string_by_multi_markers(
+                    already_edge["source_id"], [GRAPH_FIELD_SEP]
                 )
+            )
 
-            # Get file_path with empty string default if missing or None
-            if already_edge.get("file_path") is not None:
-                already_file_paths.extend(
-                    split_string_by_multi_markers(
-                        already_edge["file_path"], [GRAPH_FIELD_SEP]
-                    )
+        # Get file_path with empty string default if missing or None
+        if already_edge.get("file_path") is not None:
+            already_file_paths.extend(
+                split_string_by_multi_markers(
+                    already_edge["file_path"], [GRAPH_FIELD_SEP]
                 )
+            )
 
-            # Get description with empty string default if missing or None
-            if already_edge.get("description") is not None:
-                already_description.append(already_edge["description"])
+        # Get description with empty string default if missing or None
+        if already_edge.get("description") is not None:
+            already_description.append(already_edge["description"])
 
-            # Get keywords with empty string default if missing or None
-            if already_edge.get("keywords") is not None:
-                already_keywords.extend(
-                    split_string_by_multi_markers(
-                        already_edge["keywords"], [GRAPH_FIELD_SEP]
-                    )
+        # Get keywords with empty string default if missing or None
+        if already_edge.get("keywords") is not None:
+            already_keywords.extend(
+                split_string_by_multi_markers(
+                    already_edge["keywords"], [GRAPH_FIELD_SEP]
                 )
+            )
+
+        # Get publication time if the edge has been seen in dated documents
+        if already_edge.get("published_at") is not None:
+            already_published_ats.append(to_epoch(already_edge["published_at"]))
+
+        # Get (timestamp, chunk_id) observations
+        already_observations = element_observations(already_edge)
 
     # Process edges_data with None checks
     weight = sum([dp["weight"] for dp in edges_data] + already_weights)
@@ -420,30 +558,21 @@ async def _merge_edges_then_upsert(
             + already_file_paths
         )
     )
-
-    for need_insert_id in [src_id, tgt_id]:
-        if not (await knowledge_graph_inst.has_node(need_insert_id)):
-            # # Discard this edge if the node does not exist
-            # if need_insert_id == src_id:
-            #     logger.warning(
-            #         f"Discard edge: {src_id} - {tgt_id} | Source node missing"
-            #     )
-            # else:
-            #     logger.warning(
-            #         f"Discard edge: {src_id} - {tgt_id} | Target node missing"
-            #     )
-            # return None
-            await knowledge_graph_inst.upsert_node(
-                need_insert_id,
-                node_data={
-                    "entity_id": need_insert_id,
-                    "source_id": source_id,
-                    "description": description,
-                    "entity_type": "UNKNOWN",
-                    "file_path": file_path,
-                    "created_at": int(time.time()),
-                },
-            )
+    published_ats = [
+        dp["published_at"] for dp in edges_data if dp.get("published_at") is not None
+    ] + already_published_ats
+    published_at = max(published_ats) if published_ats else None
+    # One observation per dated mention; undated mentions carry no event time
+    # and must not place the edge inside a time window
+    ingest_time = int(time.time())
+    observations = encode_observations(
+        [
+            (dp["published_at"], dp["source_id"])
+            for dp in edges_data
+            if dp.get("source_id") and dp.get("published_at") is not None
+        ]
+        + already_observations
+    )
 
     force_llm_summary_on_merge = global_config["force_llm_summary_on_merge"]
 
@@ -476,18 +605,18 @@ async def _merge_edges_then_upsert(
                     pipeline_status["latest_message"] = status_message
                     pipeline_status["history_messages"].append(status_message)
 
-    await knowledge_graph_inst.upsert_edge(
-        src_id,
-        tgt_id,
-        edge_data=dict(
-            weight=weight,
-            description=description,
-            keywords=keywords,
-            source_id=source_id,
-            file_path=file_path,
-            created_at=int(time.time()),
-        ),
+    graph_edge_data = dict(
+        weight=weight,
+        description=description,
+        description_tokens=len(global_config["tokenizer"].encode(description)),
+        keywords=keywords,
+        source_id=source_id,
+        file_path=file_path,
+        created_at=ingest_time,
+        observations=observations,
     )
+    if published_at is not None:
+        graph_edge_data["published_at"] = published_at
 
     edge_data = dict(
         src_id=src_id,
@@ -496,9 +625,115 @@ async def _merge_edges_then_upsert(
         keywords=keywords,
         source_id=source_id,
         file_path=file_path,
+        published_at=published_at,
+        observations=observations,
     )
 
-    return edge_data
+    return graph_edge_data, edge_data
+
+
+# Attempts at merging graph elements against fresh data before the last merge
+# is done while holding their key locks
+_GRAPH_MERGE_RETRIES = 2
+
+
+async def _gather_or_cancel(coros: list) -> list:
+    """Run coroutines concurrently, cancelling the others on the first failure"""
+    tasks = [asyncio.create_task(coro) for coro in coros]
+    if not tasks:
+        return []
+    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    for task in done:
+        if task.exception():
+            for pending_task in pending:
+                pending_task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+            raise task.exception()
+    return [task.result() for task in tasks]
+
+
+def _snapshot_graph_data(data: dict) -> dict:
+    """Copy graph elements, some storages return their live attribute dicts"""
+    return {key: dict(value) if value else value for key, value in data.items()}
+
+
+async def _merge_graph_elements(
+    keys: list,
+    lock_keys: list[str],
+    read: Callable[[list], Any],
+    merge: Callable[[Any, dict | None], Any],
+    write: Callable[[dict], Any],
+) -> dict:
+    """Merge graph elements without holding their key locks during LLM summaries
+
+    Merges (and their LLM summaries) run on a snapshot of the elements read
+    without locks. The key locks are then only held to re-read the elements
+    and write the results; elements another writer changed in between are
+    merged again from their new state, under the locks on the last attempt.
+
+    Args:
+        keys: Node names or (src, tgt) edge keys to merge
+        lock_keys: Graph key locks covering the keys
+        read: Returns the current data of the keys as {key: data}
+        merge: Merges the new data of one key into its current data (or None)
+        write: Stores {key: merged data}, called while holding the locks
+
+    Returns:
+        The merged data written, as {key: merged data}
+    """
+    from .kg.shared_storage import get_graph_key_lock
+
+    async def _merge_all(keys: list, current: dict) -> dict:
+        results = await _gather_or_cancel(
+            [merge(key, current.get(key)) for key in keys]
+        )
+        return dict(zip(keys, results))
+
+    base = _snapshot_graph_data(await read(keys))
+    merged = await _merge_all(keys, base)
+    for attempt in range(_GRAPH_MERGE_RETRIES + 1):
+        async with get_graph_key_lock(*lock_keys):
+            current = _snapshot_graph_data(await read(keys))
+            stale = [key for key in keys if current.get(key) != base.get(key)]
+            if stale and attempt == _GRAPH_MERGE_RETRIES:
+                merged.update(await _merge_all(stale, current))
+                stale = []
+            if not stale:
+                await write(merged)
+                return merged
+        logger.debug(f"Re-merging {len(stale)} graph elements changed meanwhile")
+        base.update({key: current.get(key) for key in stale})
+        merged.update(await _merge_all(stale, base))
+
+
+async def _refresh_merged_data(
+    knowledge_graph_inst: BaseGraphStorage,
+    entities_data: list[dict],
+    relationships_data: list[dict],
+) -> tuple[list[dict], list[dict]]:
+    """Reload merged nodes and edges from the graph to get their latest state"""
+    nodes, edges = await asyncio.gather(
+        knowledge_graph_inst.get_nodes_batch(
+            [dp["entity_name"] for dp in entities_data]
+        ),
+        knowledge_graph_inst.get_edges_batch(
+            [{"src": dp["src_id"], "tgt": dp["tgt_id"]} for dp in relationships_data]
+        ),
+    )
+    entities_data = [
+        {**dp, **nodes[dp["entity_name"]], "entity_name": dp["entity_name"]}
+        if nodes.get(dp["entity_name"])
+        else dp
+        for dp in entities_data
+    ]
+    relationships_data = [
+        {**dp, **edges[(dp["src_id"], dp["tgt_id"])]}
+        if edges.get((dp["src_id"], dp["tgt_id"]))
+        else dp
+        for dp in relationships_data
+    ]
+    return entities_data, relationships_data
 
 
 async def merge_nodes_and_edges(
@@ -527,7 +762,11 @@ async def merge_nodes_and_edges(
         llm_response_cache: LLM response cache
     """
     # Get lock manager from shared storage
-    from .kg.shared_storage import get_graph_db_lock
+    from .kg.shared_storage import (
+        get_graph_db_lock,
+        graph_edge_lock_key,
+        graph_node_lock_key,
+    )
 
     # Collect all nodes and edges from all chunks
     all_nodes = defaultdict(list)
@@ -543,49 +782,123 @@ async def merge_nodes_and_edges(
             sorted_edge_key = tuple(sorted(edge_key))
             all_edges[sorted_edge_key].extend(edges)
 
-    # Centralized processing of all nodes and edges
-    entities_data = []
-    relationships_data = []
+    # Merge nodes and edges outside the graph database lock. Existing graph data
+    # is prefetched in one batch read and LLM summaries run in parallel bounded
+    # by llm_model_max_async before any lock is taken; per node/edge key locks
+    # (shared by all worker processes) are only held to re-read the elements
+    # and write the results back in one batch write.
+    async with pipeline_status_lock:
+        log_message = f"Merging stage {current_file_number}/{total_files}: {file_path}"
+        logger.info(log_message)
+        pipeline_status["latest_message"] = log_message
+        pipeline_status["history_messages"].append(log_message)
 
-    # Merge nodes and edges
-    # Use graph database lock to ensure atomic merges and updates
-    graph_db_lock = get_graph_db_lock(enable_logging=False)
-    async with graph_db_lock:
-        async with pipeline_status_lock:
-            log_message = (
-                f"Merging stage {current_file_number}/{total_files}: {file_path}"
-            )
-            logger.info(log_message)
-            pipeline_status["latest_message"] = log_message
-            pipeline_status["history_messages"].append(log_message)
+    semaphore = asyncio.Semaphore(global_config.get("llm_model_max_async", 4))
+
+    async def _bounded(coro):
+        async with semaphore:
+            return await coro
 
-        # Process and update all entities at once
-        for entity_name, entities in all_nodes.items():
-            entity_data = await _merge_nodes_then_upsert(
+    # Nodes go first so that edges of this document find their entities in place
+    async def _merge_node(entity_name, already_node):
+        return await _bounded(
+            _merge_node_data(
                 entity_name,
-                entities,
-                knowledge_graph_inst,
+                all_nodes[entity_name],
+                already_node,
                 global_config,
                 pipeline_status,
                 pipeline_status_lock,
                 llm_response_cache,
             )
-            entities_data.append(entity_data)
-
-        # Process and update all relationships at once
-        for edge_key, edges in all_edges.items():
-            edge_data = await _merge_edges_then_upsert(
-                edge_key[0],
-                edge_key[1],
-                edges,
-                knowledge_graph_inst,
+        )
+
+    merged_nodes = await _merge_graph_elements(
+        list(all_nodes),
+        [graph_node_lock_key(name) for name in all_nodes],
+        knowledge_graph_inst.get_nodes_batch,
+        _merge_node,
+        knowledge_graph_inst.upsert_nodes_batch,
+    )
+    entities_data = [
+        {**merged_nodes[entity_name], "entity_name": entity_name}
+        for entity_name in all_nodes
+    ]
+
+    edge_keys = [key for key in all_edges if key[0] != key[1]]
+    endpoints = list(dict.fromkeys(name for key in edge_keys for name in key))
+
+    async def _read_edges(keys):
+        return await knowledge_graph_inst.get_edges_batch(
+            [{"src": src, "tgt": tgt} for src, tgt in keys]
+        )
+
+    async def _merge_edge(edge_key, already_edge):
+        src, tgt = edge_key
+        return await _bounded(
+            _merge_edge_data(
+                src,
+                tgt,
+                all_edges[edge_key],
+                already_edge,
                 global_config,
                 pipeline_status,
                 pipeline_status_lock,
                 llm_response_cache,
             )
-            if edge_data is not None:
-                relationships_data.append(edge_data)
+        )
+
+    async def _write_edges(merged_edges):
+        # Entities only seen as relationship endpoints get a placeholder node,
+        # filled from the first edge referencing them
+        existing_endpoints = await knowledge_graph_inst.get_nodes_batch(endpoints)
+        placeholder_nodes = {}
+        for (src, tgt), (graph_edge_data, _) in merged_edges.items():
+            for need_insert_id in (src, tgt):
+                if (
+                    need_insert_id in existing_endpoints
+                    or need_insert_id in placeholder_nodes
+                ):
+                    continue
+                node_data = {
+                    "entity_id": need_insert_id,
+                    "source_id": graph_edge_data["source_id"],
+                    "description": graph_edge_data["description"],
+                    "description_tokens": graph_edge_data["description_tokens"],
+                    "entity_type": "UNKNOWN",
+                    "file_path": graph_edge_data["file_path"],
+                    "created_at": int(time.time()),
+                    "observations": graph_edge_data["observations"],
+                }
+                if graph_edge_data.get("published_at") is not None:
+                    node_data["published_at"] = graph_edge_data["published_at"]
+                placeholder_nodes[need_insert_id] = node_data
+        await knowledge_graph_inst.upsert_nodes_batch(placeholder_nodes)
+        await knowledge_graph_inst.upsert_edges_batch(
+            [
+                (src, tgt, graph_edge_data)
+                for (src, tgt), (graph_edge_data, _) in merged_edges.items()
+            ]
+        )
+
+    merged_edges = await _merge_graph_elements(
+        edge_keys,
+        [graph_edge_lock_key(src, tgt) for src, tgt in edge_keys]
+        + [graph_node_lock_key(name) for name in endpoints],
+        _read_edges,
+        _merge_edge,
+        _write_edges,
+    )
+    relationships_data = [merged_edges[key][1] for key in edge_keys]
+
+    # Vector database updates stay serialized: each document re-reads the merged
+    # graph data under the lock, so the last upsert always carries the latest
+    # merge even when another document merged the same keys in between
+    graph_db_lock = get_graph_db_lock(enable_logging=False)
+    async with graph_db_lock:
+        entities_data, relationships_data = await _refresh_merged_data(
+            knowledge_graph_inst, entities_data, relationships_data
+        )
 
         # Update total counts
         total_entities_count = len(entities_data)
@@ -607,6 +920,8 @@ async def merge_nodes_and_edges(
                     "content": f"{dp['entity_name']}\n{dp['description']}",
                     "source_id": dp["source_id"],
                     "file_path": dp.get("file_path", "unknown_source"),
+                    "published_at": dp.get("published_at"),
+                    "published_ats": list(element_timestamps(dp)),
                 }
                 for dp in entities_data
             }
@@ -628,23 +943,16 @@ async def merge_nodes_and_edges(
                     "content": f"{dp['src_id']}\t{dp['tgt_id']}\n{dp['keywords']}\n{dp['description']}",
                     "source_id": dp["source_id"],
                     "file_path": dp.get("file_path", "unknown_source"),
+                    "published_at": dp.get("published_at"),
+                    "published_ats": list(element_timestamps(dp)),
                 }
                 for dp in relationships_data
             }
             await relationships_vdb.upsert(data_for_vdb)
 
 
-async def extract_entities(
-    chunks: dict[str, TextChunkSchema],
-    global_config: dict[str, str],
-    pipeline_status: dict = None,
-    pipeline_status_lock=None,
-    llm_response_cache: BaseKVStorage | None = None,
-) -> list:
-    use_llm_func: callable = global_config["llm_model_func"]
-    entity_extract_max_gleaning = global_config["entity_extract_max_gleaning"]
-
-    ordered_chunks = list(chunks.items())
+def _get_extraction_context(global_config: dict) -> dict:
+    """Build the prompt parameters shared by all entity extraction prompts"""
     # add language and example number params to prompt
     language = global_config["addon_params"].get(
         "language", PROMPTS["DEFAULT_LANGUAGE"]
@@ -670,8 +978,7 @@ async def extract_entities(
     # add example's format
     examples = examples.format(**example_context_base)
 
-    entity_extract_prompt = PROMPTS["entity_extraction"]
-    context_base = dict(
+    return dict(
         tuple_delimiter=PROMPTS["DEFAULT_TUPLE_DELIMITER"],
         record_delimiter=PROMPTS["DEFAULT_RECORD_DELIMITER"],
         completion_delimiter=PROMPTS["DEFAULT_COMPLETION_DELIMITER"],
@@ -680,132 +987,488 @@ async def extract_entities(
         language=language,
     )
 
-    continue_prompt = PROMPTS["entity_continue_extraction"].format(**context_base)
-    if_loop_prompt = PROMPTS["entity_if_loop_extraction"]
 
-    processed_chunks = 0
-    total_chunks = len(ordered_chunks)
+async def _process_extraction_result(
+    result: str,
+    context_base: dict,
+    chunk_key: str,
+    file_path: str = "unknown_source",
+    published_at: int | None = None,
+):
+    """Process a single extraction result (either initial or gleaning)
+    Args:
+        result (str): The extraction result to process
+        context_base (dict): Prompt parameters holding the record delimiters
+        chunk_key (str): The chunk key for source tracking
+        file_path (str): The file path for citation
+        published_at (int | None): Publication time of the source document
+    Returns:
+        tuple: (nodes_dict, edges_dict) containing the extracted entities and relationships
+    """
+    maybe_nodes = defaultdict(list)
+    maybe_edges = defaultdict(list)
+
+    records = split_string_by_multi_markers(
+        result,
+        [context_base["record_delimiter"], context_base["completion_delimiter"]],
+    )
 
-    async def _process_extraction_result(
-        result: str, chunk_key: str, file_path: str = "unknown_source"
+    for record in records:
+        record = re.search(r"\((.*)\)", record)
+        if record is None:
+            continue
+        record = record.group(1)
+        record_attributes = split_string_by_multi_markers(
+            record, [context_base["tuple_delimiter"]]
+        )
+
+        if_entities = await _handle_single_entity_extraction(
+            record_attributes, chunk_key, file_path, published_at
+        )
+        if if_entities is not None:
+            maybe_nodes[if_entities["entity_name"]].append(if_entities)
+            continue
+
+        if_relation = await _handle_single_relationship_extraction(
+            record_attributes, chunk_key, file_path, published_at
+        )
+        if if_relation is not None:
+            maybe_edges[(if_relation["src_id"], if_relation["tgt_id"])].append(
+                if_relation
+            )
+
+    return maybe_nodes, maybe_edges
+
+
+def _add_gleaned_records(
+    maybe_nodes: dict, maybe_edges: dict, glean_nodes: dict, glean_edges: dict
+) -> int:
+    """Merge gleaning results, only accepting entities and edges with new names
+
+    Returns:
+        int: Number of new entities and edges
+    """
+    added = 0
+    for entity_name, entities in glean_nodes.items():
+        if entity_name not in maybe_nodes:
+            maybe_nodes[entity_name].extend(entities)
+            added += 1
+    for edge_key, edges in glean_edges.items():
+        if edge_key not in maybe_edges:
+            maybe_edges[edge_key].extend(edges)
+            added += 1
+    return added
+
+
+class GleaningPolicy:
+    """Decide per extraction prompt whether gleaning rounds are worth their LLM calls
+
+    Gleaning is skipped for text shorter than min_tokens, for text whose first
+    pass already found at least max_density entities per 100 tokens, and for
+    sources whose gleaning rounds added fewer than min_yield new entities and
+    edges on average. Source yields are learned after `warmup` rounds; one in
+    `explore_every` skipped prompts of a low yield source is still gleaned to
+    keep its statistics current. A threshold of 0 disables its rule.
+
+    Counters (see stats) track the decisions and the LLM calls saved.
+    """
+
+    def __init__(
+        self,
+        min_tokens: int = 0,
+        max_density: float = 0.0,
+        min_yield: float = 0.0,
+        warmup: int = 20,
+        explore_every: int = 10,
     ):
-        """Process a single extraction result (either initial or gleaning)
+        self.min_tokens = min_tokens
+        self.max_density = max_density
+        self.min_yield = min_yield
+        self.warmup = warmup
+        self.explore_every = explore_every
+        # source -> [gleaning rounds, new records]
+        self._source_yields: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+        self._low_yield_skips: Counter = Counter()
+        self.counters: Counter = Counter()
+
+    @staticmethod
+    def _source(chunk_dp: dict) -> str:
+        return chunk_dp.get("source") or "unknown_source"
+
+    def _skip_reason(self, chunk_dp: dict, first_pass_entities: int) -> str | None:
+        tokens = chunk_dp.get("tokens") or 0
+        if self.min_tokens and tokens < self.min_tokens:
+            return "skipped_short"
+        if (
+            self.max_density
+            and tokens
+            and first_pass_entities * 100 / tokens >= self.max_density
+        ):
+            return "skipped_dense"
+        if self.min_yield:
+            source = self._source(chunk_dp)
+            rounds, records = self._source_yields[source]
+            if rounds >= self.warmup and records / rounds < self.min_yield:
+                self._low_yield_skips[source] += 1
+                if self._low_yield_skips[source] % self.explore_every:
+                    return "skipped_low_yield"
+        return None
+
+    def should_glean(
+        self, chunk_dp: dict, first_pass_entities: int, max_gleaning: int
+    ) -> bool:
+        """Whether to run the gleaning loop after the first extraction pass
+
         Args:
-            result (str): The extraction result to process
-            chunk_key (str): The chunk key for source tracking
-            file_path (str): The file path for citation
-        Returns:
-            tuple: (nodes_dict, edges_dict) containing the extracted entities and relationships
+            chunk_dp: Chunk data with "tokens" and optionally "source"
+            first_pass_entities: Number of entities found by the first pass
+            max_gleaning: entity_extract_max_gleaning
         """
-        maybe_nodes = defaultdict(list)
-        maybe_edges = defaultdict(list)
+        if max_gleaning <= 0:
+            return False
+        self.counters["prompts"] += 1
+        reason = self._skip_reason(chunk_dp, first_pass_entities)
+        if reason is None:
+            self.counters["gleaned"] += 1
+            return True
+        self.counters[reason] += 1
+        # The loop makes at least one continuation call, plus one if_loop call
+        # when more than one round is allowed
+        self.counters["calls_saved"] += 2 if max_gleaning > 1 else 1
+        return False
+
+    def record_round(self, chunk_dp: dict, new_records: int) -> None:
+        """Record the yield of a gleaning round"""
+        source_yield = self._source_yields[self._source(chunk_dp)]
+        source_yield[0] += 1
+        source_yield[1] += new_records
+        self.counters["glean_rounds"] += 1
+        self.counters["gleaned_records"] += new_records
+
+    def stats(self) -> dict[str, int]:
+        return dict(self.counters)
+
+
+def serialize_chunk_extraction(maybe_nodes: dict, maybe_edges: dict) -> dict:
+    """JSON-serializable form of the extraction result of one chunk"""
+    return {
+        "entities": [node for nodes in maybe_nodes.values() for node in nodes],
+        "relationships": [edge for edges in maybe_edges.values() for edge in edges],
+    }
+
+
+def deserialize_chunk_extraction(data: dict) -> tuple[dict, dict]:
+    """Rebuild (maybe_nodes, maybe_edges) from serialize_chunk_extraction output"""
+    maybe_nodes = defaultdict(list)
+    maybe_edges = defaultdict(list)
+    for node in data.get("entities", []):
+        maybe_nodes[node["entity_name"]].append(node)
+    for edge in data.get("relationships", []):
+        maybe_edges[(edge["src_id"], edge["tgt_id"])].append(edge)
+    return maybe_nodes, maybe_edges
+
+
+async def _extract_single_chunk(
+    chunk_key_dp: tuple[str, TextChunkSchema],
+    context_base: dict,
+    global_config: dict,
+    llm_response_cache: BaseKVStorage | None = None,
+    gleaning_policy: GleaningPolicy | None = None,
+):
+    """Extract entities and relationships from a single chunk
+    Args:
+        chunk_key_dp (tuple[str, TextChunkSchema]):
+            ("chunk-xxxxxx", {"tokens": int, "content": str, "full_doc_id": str, "chunk_order_index": int})
+    Returns:
+        tuple: (maybe_nodes, maybe_edges) containing extracted entities and relationships
+    """
+    use_llm_func: callable = global_config["llm_model_func"]
+    entity_extract_max_gleaning = global_config["entity_extract_max_gleaning"]
+    continue_prompt = PROMPTS["entity_continue_extraction"].format(**context_base)
+    if_loop_prompt = PROMPTS["entity_if_loop_extraction"]
+
+    chunk_key = chunk_key_dp[0]
+    chunk_dp = chunk_key_dp[1]
+    content = chunk_dp["content"]
+    # Get file path from chunk data or use default
+    file_path = chunk_dp.get("file_path", "unknown_source")
+    # Publication time of the source document, None for undated documents
+    published_at = chunk_dp.get("published_at")
+
+    # Get initial extraction
+    hint_prompt = PROMPTS["entity_extraction"].format(
+        **{**context_base, "input_text": content}
+    )
+
+    final_result = await use_llm_func_with_cache(
+        hint_prompt,
+        use_llm_func,
+        llm_response_cache=llm_response_cache,
+        cache_type="extract",
+    )
+    history = pack_user_ass_to_openai_messages(hint_prompt, final_result)
+
+    # Process initial extraction with file path
+    maybe_nodes, maybe_edges = await _process_extraction_result(
+        final_result, context_base, chunk_key, file_path, published_at
+    )
 
-        records = split_string_by_multi_markers(
-            result,
-            [context_base["record_delimiter"], context_base["completion_delimiter"]],
+    if gleaning_policy is not None and not gleaning_policy.should_glean(
+        chunk_dp, len(maybe_nodes), entity_extract_max_gleaning
+    ):
+        entity_extract_max_gleaning = 0
+
+    # Process additional gleaning results
+    for now_glean_index in range(entity_extract_max_gleaning):
+        glean_result = await use_llm_func_with_cache(
+            continue_prompt,
+            use_llm_func,
+            llm_response_cache=llm_response_cache,
+            history_messages=history,
+            cache_type="extract",
         )
 
-        for record in records:
-            record = re.search(r"\((.*)\)", record)
-            if record is None:
-                continue
-            record = record.group(1)
-            record_attributes = split_string_by_multi_markers(
-                record, [context_base["tuple_delimiter"]]
-            )
+        history += pack_user_ass_to_openai_messages(continue_prompt, glean_result)
 
-            if_entities = await _handle_single_entity_extraction(
-                record_attributes, chunk_key, file_path
+        # Process gleaning result separately with file path
+        glean_nodes, glean_edges = await _process_extraction_result(
+            glean_result, context_base, chunk_key, file_path, published_at
+        )
+        added = _add_gleaned_records(maybe_nodes, maybe_edges, glean_nodes, glean_edges)
+        if gleaning_policy is not None:
+            gleaning_policy.record_round(chunk_dp, added)
+
+        if now_glean_index == entity_extract_max_gleaning - 1:
+            break
+
+        if_loop_result: str = await use_llm_func_with_cache(
+            if_loop_prompt,
+            use_llm_func,
+            llm_response_cache=llm_response_cache,
+            history_messages=history,
+            cache_type="extract",
+        )
+        if_loop_result = if_loop_result.strip().strip('"').strip("'").lower()
+        if if_loop_result != "yes":
+            break
+
+    return maybe_nodes, maybe_edges
+
+
+_BATCH_SECTION_MARKER = re.compile(r"\[\[SECTION (\d+)\]\]")
+
+
+def _split_batch_extraction_result(result: str, section_count: int) -> dict[int, str]:
+    """Split a batched extraction result into per section outputs (0-based)"""
+    parts = _BATCH_SECTION_MARKER.split(result)
+    sections: dict[int, str] = {}
+    # parts = [text before first marker, number, text, number, text, ...]
+    for number, text in zip(parts[1::2], parts[2::2]):
+        index = int(number) - 1
+        if 0 <= index < section_count:
+            sections[index] = sections.get(index, "") + text
+    return sections
+
+
+async def extract_entities_batch(
+    chunk_batch: list[tuple[str, TextChunkSchema]],
+    global_config: dict,
+    llm_response_cache: BaseKVStorage | None = None,
+    gleaning_policy: GleaningPolicy | None = None,
+) -> list:
+    """Extract entities and relationships from several chunks with one prompt
+
+    The chunks (usually from different documents) are packed into a single
+    extraction prompt as numbered sections, and the LLM output is split back by
+    section marker. Gleaning rounds run on the batched conversation as well,
+    the gleaning policy judges the batch as a whole. Chunks whose section is
+    missing from the output are extracted on their own.
+
+    Returns:
+        list: (maybe_nodes, maybe_edges) for every chunk, in input order
+    """
+    context_base = _get_extraction_context(global_config)
+    if len(chunk_batch) == 1:
+        return [
+            await _extract_single_chunk(
+                chunk_batch[0],
+                context_base,
+                global_config,
+                llm_response_cache,
+                gleaning_policy,
             )
-            if if_entities is not None:
-                maybe_nodes[if_entities["entity_name"]].append(if_entities)
-                continue
+        ]
 
-            if_relation = await _handle_single_relationship_extraction(
-                record_attributes, chunk_key, file_path
+    use_llm_func: callable = global_config["llm_model_func"]
+    entity_extract_max_gleaning = global_config["entity_extract_max_gleaning"]
+    continue_prompt = (
+        PROMPTS["entity_continue_extraction"].format(**context_base)
+        + PROMPTS["entity_extraction_batch_continue"]
+    )
+    if_loop_prompt = PROMPTS["entity_if_loop_extraction"]
+
+    input_text = PROMPTS["entity_extraction_batch_input"].format(
+        section_count=len(chunk_batch),
+        sections="\n\n".join(
+            f"[[SECTION {i}]]\n{chunk_dp['content']}"
+            for i, (_, chunk_dp) in enumerate(chunk_batch, start=1)
+        ),
+    )
+    hint_prompt = PROMPTS["entity_extraction"].format(
+        **{**context_base, "input_text": input_text}
+    )
+
+    async def _process_batch_result(result: str) -> dict[int, tuple[dict, dict]]:
+        sections = _split_batch_extraction_result(result, len(chunk_batch))
+        processed = {}
+        for index, section_result in sections.items():
+            chunk_key, chunk_dp = chunk_batch[index]
+            processed[index] = await _process_extraction_result(
+                section_result,
+                context_base,
+                chunk_key,
+                chunk_dp.get("file_path", "unknown_source"),
+                chunk_dp.get("published_at"),
             )
-            if if_relation is not None:
-                maybe_edges[(if_relation["src_id"], if_relation["tgt_id"])].append(
-                    if_relation
-                )
+        return processed
 
-        return maybe_nodes, maybe_edges
+    final_result = await use_llm_func_with_cache(
+        hint_prompt,
+        use_llm_func,
+        llm_response_cache=llm_response_cache,
+        cache_type="extract",
+    )
+    history = pack_user_ass_to_openai_messages(hint_prompt, final_result)
+    chunk_results = await _process_batch_result(final_result)
 
-    async def _process_single_content(chunk_key_dp: tuple[str, TextChunkSchema]):
-        """Process a single chunk
-        Args:
-            chunk_key_dp (tuple[str, TextChunkSchema]):
-                ("chunk-xxxxxx", {"tokens": int, "content": str, "full_doc_id": str, "chunk_order_index": int})
-        Returns:
-            tuple: (maybe_nodes, maybe_edges) containing extracted entities and relationships
-        """
-        nonlocal processed_chunks
-        chunk_key = chunk_key_dp[0]
-        chunk_dp = chunk_key_dp[1]
-        content = chunk_dp["content"]
-        # Get file path from chunk data or use default
-        file_path = chunk_dp.get("file_path", "unknown_source")
-
-        # Get initial extraction
-        hint_prompt = entity_extract_prompt.format(
-            **{**context_base, "input_text": content}
+    sources = {chunk_dp.get("source") for _, chunk_dp in chunk_batch}
+    batch_dp = {
+        "tokens": sum(chunk_dp.get("tokens") or 0 for _, chunk_dp in chunk_batch),
+        "source": sources.pop() if len(sources) == 1 else None,
+    }
+    if gleaning_policy is not None and not gleaning_policy.should_glean(
+        batch_dp,
+        sum(len(maybe_nodes) for maybe_nodes, _ in chunk_results.values()),
+        entity_extract_max_gleaning,
+    ):
+        entity_extract_max_gleaning = 0
+
+    for now_glean_index in range(entity_extract_max_gleaning):
+        glean_result = await use_llm_func_with_cache(
+            continue_prompt,
+            use_llm_func,
+            llm_response_cache=llm_response_cache,
+            history_messages=history,
+            cache_type="extract",
         )
 
-        final_result = await use_llm_func_with_cache(
-            hint_prompt,
+        history += pack_user_ass_to_openai_messages(continue_prompt, glean_result)
+
+        added = 0
+        for index, (glean_nodes, glean_edges) in (
+            await _process_batch_result(glean_result)
+        ).items():
+            if index in chunk_results:
+                added += _add_gleaned_records(
+                    *chunk_results[index], glean_nodes, glean_edges
+                )
+            else:
+                chunk_results[index] = (glean_nodes, glean_edges)
+                added += len(glean_nodes) + len(glean_edges)
+        if gleaning_policy is not None:
+            gleaning_policy.record_round(batch_dp, added)
+
+        if now_glean_index == entity_extract_max_gleaning - 1:
+            break
+
+        if_loop_result: str = await use_llm_func_with_cache(
+            if_loop_prompt,
             use_llm_func,
             llm_response_cache=llm_response_cache,
+            history_messages=history,
             cache_type="extract",
         )
-        history = pack_user_ass_to_openai_messages(hint_prompt, final_result)
+        if_loop_result = if_loop_result.strip().strip('"').strip("'").lower()
+        if if_loop_result != "yes":
+            break
 
-        # Process initial extraction with file path
-        maybe_nodes, maybe_edges = await _process_extraction_result(
-            final_result, chunk_key, file_path
+    missing = [i for i in range(len(chunk_batch)) if i not in chunk_results]
+    if missing:
+        logger.warning(
+            f"Batched extraction missed {len(missing)} of {len(chunk_batch)} chunks, extracting them separately"
         )
+        for index, result in zip(
+            missing,
+            await asyncio.gather(
+                *[
+                    _extract_single_chunk(
+                        chunk_batch[i],
+                        context_base,
+                        global_config,
+                        llm_response_cache,
+                        gleaning_policy,
+                    )
+                    for i in missing
+                ]
+            ),
+        ):
+            chunk_results[index] = result
 
-        # Process additional gleaning results
-        for now_glean_index in range(entity_extract_max_gleaning):
-            glean_result = await use_llm_func_with_cache(
-                continue_prompt,
-                use_llm_func,
-                llm_response_cache=llm_response_cache,
-                history_messages=history,
-                cache_type="extract",
-            )
+    return [chunk_results[i] for i in range(len(chunk_batch))]
 
-            history += pack_user_ass_to_openai_messages(continue_prompt, glean_result)
 
-            # Process gleaning result separately with file path
-            glean_nodes, glean_edges = await _process_extraction_result(
-                glean_result, chunk_key, file_path
-            )
+async def extract_entities(
+    chunks: dict[str, TextChunkSchema],
+    global_config: dict[str, str],
+    pipeline_status: dict = None,
+    pipeline_status_lock=None,
+    llm_response_cache: BaseKVStorage | None = None,
+    chunk_batcher: MicroBatcher | None = None,
+    gleaning_policy: GleaningPolicy | None = None,
+    chunk_checkpoints: dict[str, dict] | None = None,
+    on_chunk_checkpoint: Callable[[], Awaitable[None]] | None = None,
+) -> list:
+    """Extract entities and relationships from the chunks of a document
 
-            # Merge results - only add entities and edges with new names
-            for entity_name, entities in glean_nodes.items():
-                if (
-                    entity_name not in maybe_nodes
-                ):  # Only accetp entities with new name in gleaning stage
-                    maybe_nodes[entity_name].extend(entities)
-            for edge_key, edges in glean_edges.items():
-                if (
-                    edge_key not in maybe_edges
-                ):  # Only accetp edges with new name in gleaning stage
-                    maybe_edges[edge_key].extend(edges)
-
-            if now_glean_index == entity_extract_max_gleaning - 1:
-                break
-
-            if_loop_result: str = await use_llm_func_with_cache(
-                if_loop_prompt,
-                use_llm_func,
-                llm_response_cache=llm_response_cache,
-                history_messages=history,
-                cache_type="extract",
+    When chunk_batcher is given, chunks are submitted to it instead of being
+    extracted one prompt per chunk, so they can share extraction prompts with
+    chunks of other documents (see extract_entities_batch).
+
+    When chunk_checkpoints is given, chunks found in it are restored instead of
+    extracted, and the result of every chunk extracted is added to it as soon as
+    the chunk is done, so the caller keeps the finished chunks if another chunk
+    fails. on_chunk_checkpoint is then awaited to let the caller persist them.
+    """
+    ordered_chunks = list(chunks.items())
+    if not ordered_chunks:
+        return []
+    context_base = _get_extraction_context(global_config)
+
+    processed_chunks = 0
+    total_chunks = len(ordered_chunks)
+
+    async def _process_single_content(chunk_key_dp: tuple[str, TextChunkSchema]):
+        nonlocal processed_chunks
+        chunk_key = chunk_key_dp[0]
+        if chunk_checkpoints is not None and chunk_key in chunk_checkpoints:
+            processed_chunks += 1
+            return deserialize_chunk_extraction(chunk_checkpoints[chunk_key])
+        if chunk_batcher is not None:
+            maybe_nodes, maybe_edges = await chunk_batcher.submit(chunk_key_dp)
+        else:
+            maybe_nodes, maybe_edges = await _extract_single_chunk(
+                chunk_key_dp,
+                context_base,
+                global_config,
+                llm_response_cache,
+                gleaning_policy,
             )
-            if_loop_result = if_loop_result.strip().strip('"').strip("'").lower()
-            if if_loop_result != "yes":
-                break
+        if chunk_checkpoints is not None:
+            chunk_checkpoints[chunk_key] = serialize_chunk_extraction(
+                maybe_nodes, maybe_edges
+            )
+            if on_chunk_checkpoint is not None:
+                await on_chunk_checkpoint()
 
         processed_chunks += 1
         entities_count = len(maybe_nodes)
@@ -825,9 +1488,23 @@ async def extract_entities(
     semaphore = asyncio.Semaphore(llm_model_max_async)
 
     async def _process_with_semaphore(chunk):
+        # The batcher bounds its own concurrency, submitting all chunks at once
+        # lets it fill batches
+        if chunk_batcher is not None:
+            return await _process_single_content(chunk)
         async with semaphore:
             return await _process_single_content(chunk)
 
+    if chunk_checkpoints:
+        restored = sum(1 for key, _ in ordered_chunks if key in chunk_checkpoints)
+        if restored:
+            log_message = f"Restored {restored} of {total_chunks} chunks from extraction checkpoints"
+            logger.info(log_message)
+            if pipeline_status is not None:
+                async with pipeline_status_lock:
+                    pipeline_status["latest_message"] = log_message
+                    pipeline_status["history_messages"].append(log_message)
+
     tasks = []
     for c in ordered_chunks:
         task = asyncio.create_task(_process_with_semaphore(c))
@@ -879,15 +1556,21 @@ async def kg_query(
         use_model_func = partial(use_model_func, _priority=5)
 
     # Handle cache
-    args_hash = compute_args_hash(query_param.mode, query, cache_type="query")
+    args_hash = compute_args_hash(
+        query_param.mode,
+        query,
+        *_query_cache_args(query_param),
+        cache_type="query",
+    )
     cached_response, quantized, min_val, max_val = await handle_cache(
         hashing_kv, args_hash, query, query_param.mode, cache_type="query"
     )
     if cached_response is not None:
         return cached_response
 
-    hl_keywords, ll_keywords = await get_keywords_from_query(
-        query, query_param, global_config, hashing_kv
+    (hl_keywords, ll_keywords), time_windows = await asyncio.gather(
+        get_keywords_from_query(query, query_param, global_config, hashing_kv),
+        get_time_windows_from_query(query, query_param, global_config, hashing_kv),
     )
 
     logger.debug(f"High-level keywords: {hl_keywords}")
@@ -913,17 +1596,30 @@ async def kg_query(
     ll_keywords_str = ", ".join(ll_keywords) if ll_keywords else ""
     hl_keywords_str = ", ".join(hl_keywords) if hl_keywords else ""
 
-    # Build context
-    context = await _build_query_context(
-        ll_keywords_str,
-        hl_keywords_str,
-        knowledge_graph_inst,
-        entities_vdb,
-        relationships_vdb,
-        text_chunks_db,
-        query_param,
-        chunks_vdb,
-    )
+    # Build context, one retrieval per planned time window if any
+    if time_windows:
+        context = await _build_time_window_context(
+            time_windows,
+            ll_keywords_str,
+            hl_keywords_str,
+            knowledge_graph_inst,
+            entities_vdb,
+            relationships_vdb,
+            text_chunks_db,
+            query_param,
+            chunks_vdb,
+        )
+    else:
+        context = await _build_query_context(
+            ll_keywords_str,
+            hl_keywords_str,
+            knowledge_graph_inst,
+            entities_vdb,
+            relationships_vdb,
+            text_chunks_db,
+            query_param,
+            chunks_vdb,
+        )
 
     if query_param.only_need_context:
         return context
@@ -1129,6 +1825,288 @@ async def extract_keywords_only(
     return hl_keywords, ll_keywords
 
 
+async def get_time_windows_from_query(
+    query: str,
+    query_param: QueryParam,
+    global_config: dict[str, str],
+    hashing_kv: BaseKVStorage | None = None,
+) -> list[tuple[int, int]]:
+    """
+    Plans the time windows of a query that compares two or more dates.
+
+    Dates are parsed with regular expressions first, then with dateparser when it
+    is installed. The LLM is only asked when the query mentions months or years
+    that neither parser could resolve.
+
+    Args:
+        query: The user's query text
+        query_param: Query parameters (planning switch and window margin)
+        global_config: Global configuration dictionary
+        hashing_kv: Optional key-value storage for caching LLM results
+
+    Returns:
+        A list of (time_from, time_to) epoch windows, or an empty list when the
+        query should be answered from a single retrieval
+    """
+    if not query_param.temporal_planning:
+        return []
+    if query_param.time_from is not None or query_param.time_to is not None:
+        return []
+
+    date_ranges = find_date_ranges(query)
+    if len(date_ranges) < 2:
+        date_ranges = _merge_date_ranges(date_ranges, _search_date_ranges(query))
+    if len(date_ranges) < 2 and has_date_reference(query):
+        date_ranges = _merge_date_ranges(
+            date_ranges,
+            await _extract_date_ranges_with_llm(
+                query, query_param, global_config, hashing_kv
+            ),
+        )
+    if len(date_ranges) < 2:
+        return []
+
+    margin = timedelta(days=max(query_param.temporal_window_days, 0))
+    time_windows = [
+        (to_epoch(first - margin), to_epoch(last + margin, end_of_day=True))
+        for first, last in date_ranges
+    ]
+    logger.info(f"Temporal plan: {len(time_windows)} windows {date_ranges}")
+    return time_windows
+
+
+def _merge_date_ranges(
+    date_ranges: list[tuple[date, date]], extra: list[tuple[date, date]]
+) -> list[tuple[date, date]]:
+    """Append ranges from a secondary parser that are not covered yet"""
+    merged = list(date_ranges)
+    for first, last in extra:
+        if not any(lo <= first and last <= hi for lo, hi in merged):
+            merged.append((first, last))
+    return merged
+
+
+def _search_date_ranges(query: str) -> list[tuple[date, date]]:
+    """Find full dates with dateparser, if the optional package is installed"""
+    try:
+        from dateparser.search import search_dates
+    except ImportError:
+        return []
+    found = search_dates(query, settings={"REQUIRE_PARTS": ["day", "month", "year"]})
+    return [(dt.date(), dt.date()) for _, dt in found or []]
+
+
+async def _extract_date_ranges_with_llm(
+    query: str,
+    query_param: QueryParam,
+    global_config: dict[str, str],
+    hashing_kv: BaseKVStorage | None = None,
+) -> list[tuple[date, date]]:
+    """Ask the LLM to resolve the periods a query refers to (planner fallback)"""
+    args_hash = compute_args_hash(query_param.mode, query, cache_type="temporal")
+    cached_response, quantized, min_val, max_val = await handle_cache(
+        hashing_kv, args_hash, query, query_param.mode, cache_type="temporal"
+    )
+    if cached_response is not None:
+        result = cached_response
+    else:
+        if query_param.model_func:
+            use_model_func = query_param.model_func
+        else:
+            use_model_func = global_config["llm_model_func"]
+            # Apply higher priority (5) to query relation LLM function
+            use_model_func = partial(use_model_func, _priority=5)
+        prompt = PROMPTS["temporal_anchor_extraction"].format(query=query)
+        result = await use_model_func(prompt)
+
+    match = re.search(r"\{.*\}", result or "", re.DOTALL)
+    if not match:
+        logger.warning("No JSON-like structure found in the temporal plan response.")
+        return []
+    try:
+        periods = json.loads(match.group(0)).get("periods", [])
+        date_ranges = [
+            (date.fromisoformat(first), date.fromisoformat(last))
+            for first, last in periods
+        ]
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError) as e:
+        logger.warning(f"Invalid temporal plan response: {e}")
+        return []
+
+    if (
+        cached_response is None
+        and hashing_kv is not None
+        and hashing_kv.global_config.get("enable_llm_cache")
+    ):
+        await save_to_cache(
+            hashing_kv,
+            CacheData(
+                args_hash=args_hash,
+                content=match.group(0),
+                prompt=query,
+                quantized=quantized,
+                min_val=min_val,
+                max_val=max_val,
+                mode=query_param.mode,
+                cache_type="temporal",
+            ),
+        )
+    return [(first, last) for first, last in date_ranges if first <= last]
+
+
+async def _build_time_window_context(
+    time_windows: list[tuple[int, int]],
+    ll_keywords: str,
+    hl_keywords: str,
+    knowledge_graph_inst: BaseGraphStorage,
+    entities_vdb: BaseVectorStorage,
+    relationships_vdb: BaseVectorStorage,
+    text_chunks_db: BaseKVStorage,
+    query_param: QueryParam,
+    chunks_vdb: BaseVectorStorage = None,
+):
+    """Build one context per time window concurrently and label each with its dates
+
+    The token budgets of query_param are shared between the windows so the merged
+    context stays within the size of a single retrieval. When no window matches
+    anything (e.g. the corpus carries no publication dates) the query is answered
+    from a single unwindowed retrieval instead.
+    """
+    num_windows = len(time_windows)
+    window_params = []
+    for time_from, time_to in time_windows:
+        window_param = replace(
+            query_param,
+            time_from=time_from,
+            time_to=time_to,
+            max_token_for_text_unit=query_param.max_token_for_text_unit // num_windows,
+            max_token_for_global_context=query_param.max_token_for_global_context
+            // num_windows,
+            max_token_for_local_context=query_param.max_token_for_local_context
+            // num_windows,
+            max_total_tokens=query_param.max_total_tokens // num_windows,
+        )
+        # original_query is not a dataclass field, needed by mix mode
+        if hasattr(query_param, "original_query"):
+            window_param.original_query = query_param.original_query
+        window_params.append(window_param)
+
+    contexts = await asyncio.gather(
+        *[
+            _build_query_context(
+                ll_keywords,
+                hl_keywords,
+                knowledge_graph_inst,
+                entities_vdb,
+                relationships_vdb,
+                text_chunks_db,
+                window_param,
+                chunks_vdb,
+            )
+            for window_param in window_params
+        ]
+    )
+    if all(context is None for context in contexts):
+        logger.info(
+            "No context in any time window, falling back to unwindowed retrieval"
+        )
+        return await _build_query_context(
+            ll_keywords,
+            hl_keywords,
+            knowledge_graph_inst,
+            entities_vdb,
+            relationships_vdb,
+            text_chunks_db,
+            query_param,
+            chunks_vdb,
+        )
+
+    sections = []
+    for i, ((time_from, time_to), context) in enumerate(
+        zip(time_windows, contexts), start=1
+    ):
+        start = time.strftime("%Y-%m-%d", time.gmtime(time_from))
+        end = time.strftime("%Y-%m-%d", time.gmtime(time_to))
+        sections.append(
+            f"=====Time Window {i}: {start} to {end}=====\n\n"
+            f"{context or 'No information found in this time window.'}"
+        )
+    return "\n".join(sections)
+
+
+def _get_time_window(query_param: QueryParam) -> tuple[int | None, int | None]:
+    """Resolve the query time window to inclusive epoch-second bounds"""
+    return (
+        to_epoch(query_param.time_from),
+        to_epoch(query_param.time_to, end_of_day=True),
+    )
+
+
+def _query_cache_args(query_param: QueryParam) -> list[int | float | str | None]:
+    """Extra cache-key arguments for windowed, planned, recency-ranked, budget-packed
+    or non-default context format queries (none for plain ones, so existing cache
+    entries remain valid)"""
+    args = []
+    time_from, time_to = _get_time_window(query_param)
+    if time_from is not None or time_to is not None:
+        args += [time_from, time_to]
+    if query_param.recency_half_life_days > 0:
+        args.append(query_param.recency_half_life_days)
+    if query_param.temporal_planning:
+        args += [query_param.temporal_planning, query_param.temporal_window_days]
+    if query_param.max_total_tokens > 0:
+        args.append(f"max_total_tokens={query_param.max_total_tokens}")
+    if query_param.context_format != "json":
+        args.append(f"context_format={query_param.context_format}")
+    if query_param.context_fields is not None:
+        args.append(f"context_fields={','.join(query_param.context_fields)}")
+    return args
+
+
+def _chunk_in_time_window(
+    chunk: dict, time_from: int | None, time_to: int | None
+) -> bool:
+    """Time filter for chunks reached through the graph; undated chunks are kept
+    since text chunk records carry no ingest time to fall back on"""
+    if chunk.get("published_at") is None:
+        return True
+    return in_time_range(to_epoch(chunk["published_at"]), time_from, time_to)
+
+
+def _apply_recency_decay(
+    items: list[dict],
+    query_param: QueryParam,
+    timestamp=record_timestamp,
+) -> list[dict]:
+    """Scoring stage run on ranked candidates right before token truncation"""
+    if query_param.recency_half_life_days <= 0:
+        return items
+    return rerank_by_recency(
+        items,
+        query_param.recency_half_life_days,
+        timestamp=timestamp,
+        reference=_get_time_window(query_param)[1],
+    )
+
+
+def _text_unit_timestamp(text_unit: dict) -> int | None:
+    return record_timestamp(text_unit["data"])
+
+
+async def _query_vdb(
+    vdb: BaseVectorStorage, query: str, query_param: QueryParam
+) -> list[dict]:
+    """Vector lookup honoring query_param.top_k, ids and the time window"""
+    time_from, time_to = _get_time_window(query_param)
+    return await vdb.query_in_time_range(
+        query,
+        top_k=query_param.top_k,
+        time_from=time_from,
+        time_to=time_to,
+        ids=query_param.ids,
+    )
+
+
 async def _get_vector_context(
     query: str,
     chunks_vdb: BaseVectorStorage,
@@ -1152,9 +2130,7 @@ async def _get_vector_context(
         compatible with _get_edge_data and _get_node_data format
     """
     try:
-        results = await chunks_vdb.query(
-            query, top_k=query_param.top_k, ids=query_param.ids
-        )
+        results = await _query_vdb(chunks_vdb, query, query_param)
         if not results:
             return [], [], []
 
@@ -1165,18 +2141,23 @@ async def _get_vector_context(
                 chunk_with_time = {
                     "content": result["content"],
                     "created_at": result.get("created_at", None),
+                    "published_at": result.get("published_at", None),
                     "file_path": result.get("file_path", "unknown_source"),
+                    "tokens": result.get("tokens"),
                 }
                 valid_chunks.append(chunk_with_time)
 
         if not valid_chunks:
             return [], [], []
 
+        valid_chunks = _apply_recency_decay(valid_chunks, query_param)
+
         maybe_trun_chunks = truncate_list_by_token_size(
             valid_chunks,
             key=lambda x: x["content"],
             max_token_size=query_param.max_token_for_text_unit,
             tokenizer=tokenizer,
+            token_count=lambda x: stored_token_count(x, "tokens"),
         )
 
         logger.debug(
@@ -1201,6 +2182,7 @@ async def _get_vector_context(
                     "id": i + 1,
                     "content": chunk["content"],
                     "file_path": chunk["file_path"],
+                    "_tokens": stored_token_count(chunk, "tokens"),
                 }
             )
 
@@ -1222,57 +2204,54 @@ async def _build_query_context(
 ):
     logger.info(f"Process {os.getpid()} building query context...")
 
+    # With a total token budget the sections are packed jointly below, so each
+    # branch may bring candidates up to the whole budget per section
+    max_total_tokens = query_param.max_total_tokens
+    if max_total_tokens > 0:
+        query_param = copy.copy(query_param)
+        query_param.max_token_for_text_unit = max_total_tokens
+        query_param.max_token_for_global_context = max_total_tokens
+        query_param.max_token_for_local_context = max_total_tokens
+
     # Handle local and global modes as before
     if query_param.mode == "local":
-        entities_context, relations_context, text_units_context = await _get_node_data(
-            ll_keywords,
-            knowledge_graph_inst,
-            entities_vdb,
-            text_chunks_db,
-            query_param,
-        )
+        branches = [
+            await _get_node_data(
+                ll_keywords,
+                knowledge_graph_inst,
+                entities_vdb,
+                text_chunks_db,
+                query_param,
+            )
+        ]
     elif query_param.mode == "global":
-        entities_context, relations_context, text_units_context = await _get_edge_data(
-            hl_keywords,
-            knowledge_graph_inst,
-            relationships_vdb,
-            text_chunks_db,
-            query_param,
-        )
+        branches = [
+            await _get_edge_data(
+                hl_keywords,
+                knowledge_graph_inst,
+                relationships_vdb,
+                text_chunks_db,
+                query_param,
+            )
+        ]
     else:  # hybrid or mix mode
-        ll_data = await _get_node_data(
-            ll_keywords,
-            knowledge_graph_inst,
-            entities_vdb,
-            text_chunks_db,
-            query_param,
-        )
-        hl_data = await _get_edge_data(
-            hl_keywords,
-            knowledge_graph_inst,
-            relationships_vdb,
-            text_chunks_db,
-            query_param,
-        )
-
-        (
-            ll_entities_context,
-            ll_relations_context,
-            ll_text_units_context,
-        ) = ll_data
-
-        (
-            hl_entities_context,
-            hl_relations_context,
-            hl_text_units_context,
-        ) = hl_data
-
-        # Initialize vector data with empty lists
-        vector_entities_context, vector_relations_context, vector_text_units_context = (
-            [],
-            [],
-            [],
-        )
+        retrievals = [
+            _get_node_data(
+                ll_keywords,
+                knowledge_graph_inst,
+                entities_vdb,
+                text_chunks_db,
+                query_param,
+            ),
+            _get_edge_data(
+                hl_keywords,
+                knowledge_graph_inst,
+                relationships_vdb,
+                text_chunks_db,
+                query_param,
+            ),
+        ]
+        query_texts = [ll_keywords, hl_keywords]
 
         # Only get vector data if in mix mode
         if query_param.mode == "mix" and hasattr(query_param, "original_query"):
@@ -1280,55 +2259,93 @@ async def _build_query_context(
             tokenizer = text_chunks_db.global_config.get("tokenizer")
 
             # Get vector context in triple format
-            vector_data = await _get_vector_context(
-                query_param.original_query,  # We need to pass the original query
-                chunks_vdb,
-                query_param,
-                tokenizer,
+            retrievals.append(
+                _get_vector_context(
+                    query_param.original_query,  # We need to pass the original query
+                    chunks_vdb,
+                    query_param,
+                    tokenizer,
+                )
             )
-
-            # If vector_data is not None, unpack it
-            if vector_data is not None:
-                (
-                    vector_entities_context,
-                    vector_relations_context,
-                    vector_text_units_context,
-                ) = vector_data
-
-        # Combine and deduplicate the entities, relationships, and sources
-        entities_context = process_combine_contexts(
-            hl_entities_context, ll_entities_context, vector_entities_context
+            query_texts.append(query_param.original_query)
+
+        # Embed all search texts in one request, then run the searches concurrently
+        query_texts = list(dict.fromkeys(text for text in query_texts if text))
+        embeddings = (
+            await entities_vdb.embedding_func(query_texts, _priority=5)
+            if query_texts
+            else []
         )
+        with prefetched_embeddings(dict(zip(query_texts, embeddings))):
+            ll_data, hl_data, *vector_results = await asyncio.gather(*retrievals)
+
+        # vector_data is None if the vector search failed
+        branches = [
+            hl_data,
+            ll_data,
+            *[vector_data for vector_data in vector_results if vector_data is not None],
+        ]
+
+    if max_total_tokens > 0:
+        packed = pack_contexts_by_token_budget(
+            {
+                "entities": [branch[0] for branch in branches],
+                "relationships": [branch[1] for branch in branches],
+                "chunks": [branch[2] for branch in branches],
+            },
+            keys={
+                "entities": lambda x: x["entity"],
+                "relationships": lambda x: (x["entity1"], x["entity2"]),
+                "chunks": lambda x: x["content"],
+            },
+            max_token_size=max_total_tokens,
+            tokenizer=text_chunks_db.global_config.get("tokenizer"),
+        )
+        entities_context = packed["entities"]
+        relations_context = packed["relationships"]
+        text_units_context = packed["chunks"]
+    elif len(branches) == 1:
+        entities_context, relations_context, text_units_context = branches[0]
+    else:
+        # Combine and deduplicate the entities, relationships, and sources
+        entities_context = process_combine_contexts(*[branch[0] for branch in branches])
         relations_context = process_combine_contexts(
-            hl_relations_context, ll_relations_context, vector_relations_context
+            *[branch[1] for branch in branches]
         )
         text_units_context = process_combine_contexts(
-            hl_text_units_context, ll_text_units_context, vector_text_units_context
+            *[branch[2] for branch in branches]
         )
     # not necessary to use LLM to generate a response
     if not entities_context and not relations_context:
         return None
 
     # 转换为 JSON 字符串
-    entities_str = json.dumps(entities_context, ensure_ascii=False)
-    relations_str = json.dumps(relations_context, ensure_ascii=False)
-    text_units_str = json.dumps(text_units_context, ensure_ascii=False)
+    context_format = query_param.context_format
+    entities_str = render_context_rows(
+        entities_context, context_format, query_param.context_fields
+    )
+    relations_str = render_context_rows(
+        relations_context, context_format, query_param.context_fields
+    )
+    text_units_str = render_context_rows(
+        text_units_context, context_format, query_param.context_fields
+    )
 
     result = f"""-----Entities(KG)-----
 
-```json
+```{context_format}
 {entities_str}
 ```
 
 -----Relationships(KG)-----
 
-```json
+```{context_format}
 {relations_str}
 ```
 
 -----Document Chunks(DC)-----
 
-```json
+```{context_format}
 {text_units_str}
 ```
 
@@ -1348,9 +2365,7 @@ async def _get_node_data(
         f"Query nodes: {query}, top_k: {query_param.top_k}, cosine: {entities_vdb.cosine_better_than_threshold}"
     )
 
-    results = await entities_vdb.query(
-        query, top_k=query_param.top_k, ids=query_param.ids
-    )
+    results = await _query_vdb(entities_vdb, query, query_param)
 
     if not len(results):
         return "", "", ""
@@ -1371,6 +2386,8 @@ async def _get_node_data(
     if not all([n is not None for n in node_datas]):
         logger.warning("Some nodes are missing, maybe the storage is damaged")
 
+    # Vector meta may lag behind the graph, judge the window on the graph data
+    time_from, time_to = _get_time_window(query_param)
     node_datas = [
         {
             **n,
@@ -1380,6 +2397,7 @@ async def _get_node_data(
         }
         for k, n, d in zip(results, node_datas, node_degrees)
         if n is not None
+        and any_in_time_range(element_timestamps(n), time_from, time_to)
     ]  # what is this text_chunks_db doing.  dont remember it in airvx.  check the diagram.
     # get entitytext chunk
     use_text_units = await _find_most_related_text_unit_from_entities(
@@ -1396,11 +2414,13 @@ async def _get_node_data(
 
     tokenizer: Tokenizer = text_chunks_db.global_config.get("tokenizer")
     len_node_datas = len(node_datas)
+    node_datas = _apply_recency_decay(node_datas, query_param)
     node_datas = truncate_list_by_token_size(
         node_datas,
         key=lambda x: x["description"] if x["description"] is not None else "",
         max_token_size=query_param.max_token_for_local_context,
         tokenizer=tokenizer,
+        token_count=lambda x: stored_token_count(x, "description_tokens"),
     )
     logger.debug(
         f"Truncate entities from {len_node_datas} to {len(node_datas)} (max tokens:{query_param.max_token_for_local_context})"
@@ -1429,6 +2449,7 @@ async def _get_node_data(
                 "rank": n["rank"],
                 "created_at": created_at,
                 "file_path": file_path,
+                "_tokens": stored_token_count(n, "description_tokens"),
             }
         )
 
@@ -1453,6 +2474,7 @@ async def _get_node_data(
                 "rank": e["rank"],
                 "created_at": created_at,
                 "file_path": file_path,
+                "_tokens": stored_token_count(e, "description_tokens"),
             }
         )
 
@@ -1463,6 +2485,7 @@ async def _get_node_data(
                 "id": i + 1,
                 "content": t["content"],
                 "file_path": t.get("file_path", "unknown_source"),
+                "_tokens": stored_token_count(t, "tokens"),
             }
         )
     return entities_context, relations_context, text_units_context
@@ -1517,20 +2540,14 @@ async def _find_most_related_text_unit_from_entities(
                 all_text_units_lookup[c_id] = index
                 tasks.append((c_id, index, this_edges))
 
-    # Process in batches tasks at a time to avoid overwhelming resources
-    batch_size = 5
-    results = []
-
-    for i in range(0, len(tasks), batch_size):
-        batch_tasks = tasks[i : i + batch_size]
-        batch_results = await asyncio.gather(
-            *[text_chunks_db.get_by_id(c_id) for c_id, _, _ in batch_tasks]
-        )
-        results.extend(batch_results)
+    # Fetch all chunks in bulk
+    chunks_by_id = await text_chunks_db.get_by_ids_cached(
+        [c_id for c_id, _, _ in tasks]
+    )
 
-    for (c_id, index, this_edges), data in zip(tasks, results):
+    for c_id, index, this_edges in tasks:
         all_text_units_lookup[c_id] = {
-            "data": data,
+            "data": chunks_by_id.get(c_id),
             "order": index,
             "relation_counts": 0,
         }
@@ -1544,10 +2561,14 @@ async def _find_most_related_text_unit_from_entities(
                     all_text_units_lookup[c_id]["relation_counts"] += 1
 
     # Filter out None values and ensure data has content
+    time_from, time_to = _get_time_window(query_param)
     all_text_units = [
         {"id": k, **v}
         for k, v in all_text_units_lookup.items()
-        if v is not None and v.get("data") is not None and "content" in v["data"]
+        if v is not None
+        and v.get("data") is not None
+        and "content" in v["data"]
+        and _chunk_in_time_window(v["data"], time_from, time_to)
     ]
 
     if not all_text_units:
@@ -1558,11 +2579,15 @@ async def _find_most_related_text_unit_from_entities(
     all_text_units = sorted(
         all_text_units, key=lambda x: (x["order"], -x["relation_counts"])
     )
+    all_text_units = _apply_recency_decay(
+        all_text_units, query_param, timestamp=_text_unit_timestamp
+    )
     all_text_units = truncate_list_by_token_size(
         all_text_units,
         key=lambda x: x["data"]["content"],
         max_token_size=query_param.max_token_for_text_unit,
         tokenizer=tokenizer,
+        token_count=lambda x: stored_token_count(x["data"], "tokens"),
     )
 
     logger.debug(
@@ -1605,10 +2630,16 @@ async def _find_most_related_edges_from_entities(
     )
 
     # Reconstruct edge_datas list in the same order as the deduplicated results.
+    time_from, time_to = _get_time_window(query_param)
     all_edges_data = []
     for pair in all_edges:
         edge_props = edge_data_dict.get(pair)
         if edge_props is not None:
+            # Neighbour edges are not vector hits, apply the time window here
+            if not any_in_time_range(
+                element_timestamps(edge_props), time_from, time_to
+            ):
+                continue
             if "weight" not in edge_props:
                 logger.warning(
                     f"Edge {pair} missing 'weight' attribute, using default value 0.0"
@@ -1626,11 +2657,13 @@ async def _find_most_related_edges_from_entities(
     all_edges_data = sorted(
         all_edges_data, key=lambda x: (x["rank"], x["weight"]), reverse=True
     )
+    all_edges_data = _apply_recency_decay(all_edges_data, query_param)
     all_edges_data = truncate_list_by_token_size(
         all_edges_data,
         key=lambda x: x["description"] if x["description"] is not None else "",
         max_token_size=query_param.max_token_for_global_context,
         tokenizer=tokenizer,
+        token_count=lambda x: stored_token_count(x, "description_tokens"),
     )
 
     logger.debug(
@@ -1651,9 +2684,7 @@ async def _get_edge_data(
         f"Query edges: {keywords}, top_k: {query_param.top_k}, cosine: {relationships_vdb.cosine_better_than_threshold}"
     )
 
-    results = await relationships_vdb.query(
-        keywords, top_k=query_param.top_k, ids=query_param.ids
-    )
+    results = await _query_vdb(relationships_vdb, keywords, query_param)
 
     if not len(results):
         return "", "", ""
@@ -1671,11 +2702,17 @@ async def _get_edge_data(
     )
 
     # Reconstruct edge_datas list in the same order as results.
+    # Hits are kept on the edge observations, like the neighbour edges
+    time_from, time_to = _get_time_window(query_param)
     edge_datas = []
     for k in results:
         pair = (k["src_id"], k["tgt_id"])
         edge_props = edge_data_dict.get(pair)
         if edge_props is not None:
+            if not any_in_time_range(
+                element_timestamps(edge_props), time_from, time_to
+            ):
+                continue
             if "weight" not in edge_props:
                 logger.warning(
                     f"Edge {pair} missing 'weight' attribute, using default value 0.0"
@@ -1696,11 +2733,13 @@ async def _get_edge_data(
     edge_datas = sorted(
         edge_datas, key=lambda x: (x["rank"], x["weight"]), reverse=True
     )
+    edge_datas = _apply_recency_decay(edge_datas, query_param)
     edge_datas = truncate_list_by_token_size(
         edge_datas,
         key=lambda x: x["description"] if x["description"] is not None else "",
         max_token_size=query_param.max_token_for_global_context,
         tokenizer=tokenizer,
+        token_count=lambda x: stored_token_count(x, "description_tokens"),
     )
     use_entities, use_text_units = await asyncio.gather(
         _find_most_related_entities_from_relationships(
@@ -1740,6 +2779,7 @@ async def _get_edge_data(
                 "rank": e["rank"],
                 "created_at": created_at,
                 "file_path": file_path,
+                "_tokens": stored_token_count(e, "description_tokens"),
             }
         )
 
@@ -1762,6 +2802,7 @@ async def _get_edge_data(
                 "rank": n["rank"],
                 "created_at": created_at,
                 "file_path": file_path,
+                "_tokens": stored_token_count(n, "description_tokens"),
             }
         )
 
@@ -1772,6 +2813,7 @@ async def _get_edge_data(
                 "id": i + 1,
                 "content": t["content"],
                 "file_path": t.get("file_path", "unknown"),
+                "_tokens": stored_token_count(t, "tokens"),
             }
         )
     return entities_context, relations_context, text_units_context
@@ -1813,11 +2855,13 @@ async def _find_most_related_entities_from_relationships(
 
     tokenizer: Tokenizer = knowledge_graph_inst.global_config.get("tokenizer")
     len_node_datas = len(node_datas)
+    node_datas = _apply_recency_decay(node_datas, query_param)
     node_datas = truncate_list_by_token_size(
         node_datas,
         key=lambda x: x["description"] if x["description"] is not None else "",
         max_token_size=query_param.max_token_for_local_context,
         tokenizer=tokenizer,
+        token_count=lambda x: stored_token_count(x, "description_tokens"),
     )
     logger.debug(
         f"Truncate entities from {len_node_datas} to {len(node_datas)} (max tokens:{query_param.max_token_for_local_context})"
@@ -1839,23 +2883,23 @@ async def _find_related_text_unit_from_relationships(
     ]
     all_text_units_lookup = {}
 
-    async def fetch_chunk_data(c_id, index):
-        if c_id not in all_text_units_lookup:
-            chunk_data = await text_chunks_db.get_by_id(c_id)
+    chunks_by_id = await text_chunks_db.get_by_ids_cached(
+        [c_id for unit_list in text_units for c_id in unit_list]
+    )
+    for index, unit_list in enumerate(text_units):
+        for c_id in unit_list:
+            chunk_data = chunks_by_id.get(c_id)
             # Only store valid data
-            if chunk_data is not None and "content" in chunk_data:
+            if (
+                c_id not in all_text_units_lookup
+                and chunk_data is not None
+                and "content" in chunk_data
+            ):
                 all_text_units_lookup[c_id] = {
                     "data": chunk_data,
                     "order": index,
                 }
 
-    tasks = []
-    for index, unit_list in enumerate(text_units):
-        for c_id in unit_list:
-            tasks.append(fetch_chunk_data(c_id, index))
-
-    await asyncio.gather(*tasks)
-
     if not all_text_units_lookup:
         logger.warning("No valid text chunks found")
         return []
@@ -1864,20 +2908,30 @@ async def _find_related_text_unit_from_relationships(
     all_text_units = sorted(all_text_units, key=lambda x: x["order"])
 
     # Ensure all text chunks have content
+    time_from, time_to = _get_time_window(query_param)
     valid_text_units = [
-        t for t in all_text_units if t["data"] is not None and "content" in t["data"]
+        t
+        for t in all_text_units
+        if t["data"] is not None
+        and "content" in t["data"]
+        and _chunk_in_time_window(t["data"], time_from, time_to)
     ]
 
     if not valid_text_units:
         logger.warning("No valid text chunks after filtering")
         return []
 
+    valid_text_units = _apply_recency_decay(
+        valid_text_units, query_param, timestamp=_text_unit_timestamp
+    )
+
     tokenizer: Tokenizer = text_chunks_db.global_config.get("tokenizer")
     truncated_text_units = truncate_list_by_token_size(
         valid_text_units,
         key=lambda x: x["data"]["content"],
         max_token_size=query_param.max_token_for_text_unit,
         tokenizer=tokenizer,
+        token_count=lambda x: stored_token_count(x["data"], "tokens"),
     )
 
     logger.debug(
@@ -1905,7 +2959,12 @@ async def naive_query(
         use_model_func = partial(use_model_func, _priority=5)
 
     # Handle cache
-    args_hash = compute_args_hash(query_param.mode, query, cache_type="query")
+    args_hash = compute_args_hash(
+        query_param.mode,
+        query,
+        *_query_cache_args(query_param),
+        cache_type="query",
+    )
     cached_response, quantized, min_val, max_val = await handle_cache(
         hashing_kv, args_hash, query, query_param.mode, cache_type="query"
     )
@@ -1921,12 +2980,14 @@ async def naive_query(
     if text_units_context is None or len(text_units_context) == 0:
         return PROMPTS["fail_response"]
 
-    text_units_str = json.dumps(text_units_context, ensure_ascii=False)
+    text_units_str = render_context_rows(
+        text_units_context, query_param.context_format, query_param.context_fields
+    )
     if query_param.only_need_context:
         return f"""
 ---Document Chunks---
 
-```json
+```{query_param.context_format}
 {text_units_str}
 ```
 
@@ -2021,7 +3082,12 @@ async def kg_query_with_keywords(
         # Apply higher priority (5) to query relation LLM function
         use_model_func = partial(use_model_func, _priority=5)
 
-    args_hash = compute_args_hash(query_param.mode, query, cache_type="query")
+    args_hash = compute_args_hash(
+        query_param.mode,
+        query,
+        *_query_cache_args(query_param),
+        cache_type="query",
+    )
     cached_response, quantized, min_val, max_val = await handle_cache(
         hashing_kv, args_hash, query, query_param.mode, cache_type="query"
     )
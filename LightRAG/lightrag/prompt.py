@@ -233,6 +233,15 @@ It appears some entities may have still been missed.
 Answer ONLY by `YES` OR `NO` if there are still entities that need to be added.
 """.strip()
 
+PROMPTS["entity_extraction_batch_input"] = """The text below consists of {section_count} independent sections, each starting with a marker line [[SECTION <number>]].
+Process every section separately and never relate entities from different sections.
+Before the records of a section, output the marker line of that section exactly as given, then the records extracted from it.
+
+{sections}"""
+
+PROMPTS["entity_extraction_batch_continue"] = """
+Keep the section marker lines: output the marker line [[SECTION <number>]] of a section before the new records extracted from it."""
+
 PROMPTS["fail_response"] = (
     "Sorry, I'm not able to provide an answer to that question.[no-context]"
 )
@@ -383,6 +392,35 @@ Output:
 #############################""",
 ]
 
+PROMPTS["temporal_anchor_extraction"] = """---Role---
+
+You are a helpful assistant tasked with identifying the time periods a user's query refers to.
+
+---Goal---
+
+Given the query, list every distinct date or period the query explicitly or implicitly refers to, in the order they appear.
+
+---Instructions---
+
+- Resolve each reference to an inclusive range of calendar days in ISO format (YYYY-MM-DD)
+- Use the same start and end day for a single date, and the first and last day for a month or a year
+- Only list periods that can be resolved from the query itself, do not guess missing years
+- Output JSON only, it will be parsed by a JSON parser, do not add any extra content in output
+- The JSON should have a single key "periods" holding a list of [start, end] pairs
+
+Example:
+Query: "Did the coverage change between the report of 5 March 2023 and the follow-up in April of that year?"
+Output:
+{{
+  "periods": [["2023-03-05", "2023-03-05"], ["2023-04-01", "2023-04-30"]]
+}}
+
+---Real Data---
+Query: {query}
+Output:
+
+"""
+
 PROMPTS["naive_rag_response"] = """---Role---
 
 You are a helpful assistant responding to user queries about Document Chunks provided in JSON format below, with special attention to temporal relationships, chronological context, and the evolution of information over time.
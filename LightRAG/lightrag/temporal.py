@@ -0,0 +1,465 @@
+"""
+Temporal helpers for LightRAG.
+
+This module keeps the time-aware pieces of retrieval in one place: epoch
+normalization for user supplied dates and a sorted-array index that lets
+storages restrict lookups to a time window before scoring.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time as dt_time, timezone
+from functools import lru_cache
+from typing import Any, Callable, Hashable, Iterable, Sequence
+
+import numpy as np
+
+from .prompt import GRAPH_FIELD_SEP
+
+
+def to_epoch(value: Any, end_of_day: bool = False) -> int | None:
+    """Convert a date-like value into integer epoch seconds (UTC)
+
+    Accepts epoch numbers, datetime/date objects and ISO 8601 strings. Naive
+    values are interpreted as UTC. Date-only values resolve to the start of the
+    day, or to its last second when end_of_day is True (useful for inclusive
+    upper bounds such as `time_to="2023-12-01"`).
+
+    Args:
+        value: Value to convert
+        end_of_day: Resolve date-only values to 23:59:59 instead of 00:00:00
+
+    Returns:
+        Epoch seconds, or None if value is None or cannot be parsed
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+
+    if isinstance(value, str):
+        text = value.strip()
+        if text.lstrip("-").isdigit():
+            return int(text)
+        date_only = len(text) == 10
+        try:
+            value = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if date_only:
+            value = value.date()
+
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    if isinstance(value, date):
+        day_time = dt_time(23, 59, 59) if end_of_day else dt_time(0, 0, 0)
+        return int(datetime.combine(value, day_time, tzinfo=timezone.utc).timestamp())
+    return None
+
+
+DOC_METADATA_FIELDS = ("published_at", "source", "url")
+"""Document metadata fields propagated to chunks, graph data and vector meta"""
+
+
+def normalize_doc_metadata(metadata: dict[str, Any] | None) -> dict[str, Any]:
+    """Return a copy of document metadata with published_at as epoch seconds
+
+    Unparseable or missing published_at values are dropped so that downstream
+    storages only ever see integer timestamps.
+    """
+    if not metadata:
+        return {}
+    normalized = dict(metadata)
+    published_at = to_epoch(normalized.pop("published_at", None))
+    if published_at is not None:
+        normalized["published_at"] = published_at
+    return normalized
+
+
+_MONTHS = {
+    name: i + 1
+    for i, names in enumerate(
+        [
+            ("january", "jan"),
+            ("february", "feb"),
+            ("march", "mar"),
+            ("april", "apr"),
+            ("may",),
+            ("june", "jun"),
+            ("july", "jul"),
+            ("august", "aug"),
+            ("september", "sep", "sept"),
+            ("october", "oct"),
+            ("november", "nov"),
+            ("december", "dec"),
+        ]
+    )
+    for name in names
+}
+_MONTH_RE = "|".join(sorted(_MONTHS, key=len, reverse=True))
+_DAY_RE = r"(\d{1,2})(?:st|nd|rd|th)?"
+_DATE_PATTERNS = [
+    # 2023-12-01, 2023/12/01
+    (re.compile(r"\b(\d{4})[-/](\d{1,2})[-/](\d{1,2})\b"), ("y", "m", "d")),
+    # December 1, 2023 / Dec. 1st 2023
+    (
+        re.compile(rf"\b({_MONTH_RE})\.?\s+{_DAY_RE},?\s+(\d{{4}})\b", re.IGNORECASE),
+        ("m", "d", "y"),
+    ),
+    # 1 December 2023 / 1st of December, 2023
+    (
+        re.compile(
+            rf"\b{_DAY_RE}\s+(?:of\s+)?({_MONTH_RE})\.?,?\s+(\d{{4}})\b",
+            re.IGNORECASE,
+        ),
+        ("d", "m", "y"),
+    ),
+    # December 2023 (whole month)
+    (re.compile(rf"\b({_MONTH_RE})\.?,?\s+(\d{{4}})\b", re.IGNORECASE), ("m", "y")),
+    # October 1st (year taken from the other dates of the text)
+    (
+        re.compile(rf"\b({_MONTH_RE})\.?\s+{_DAY_RE}\b(?!,?\s+\d{{4}})", re.IGNORECASE),
+        ("m", "d"),
+    ),
+]
+_YEAR_RE = re.compile(r"\b(19\d{2}|20\d{2})\b")
+
+
+def find_date_ranges(text: str) -> list[tuple[date, date]]:
+    """Extract explicit calendar references from text, in order of appearance
+
+    Full dates resolve to a single day and "Month YYYY" to the whole month.
+    A day without year ("October 1st") borrows the closest year mentioned in
+    the text and is skipped when there is none. Vague references such as
+    "last week" are left to the caller.
+
+    Returns:
+        De-duplicated list of inclusive (first_day, last_day) ranges
+    """
+    years = [(m.start(), int(m.group(1))) for m in _YEAR_RE.finditer(text)]
+    found = []
+    covered: list[tuple[int, int]] = []
+    for pattern, order in _DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            # Skip matches inside a longer, more specific match
+            if any(lo <= match.start() < hi for lo, hi in covered):
+                continue
+            parts = dict(zip(order, match.groups()))
+            month = parts["m"]
+            month = int(month) if month.isdigit() else _MONTHS.get(month.lower())
+            if "y" in parts:
+                year = int(parts["y"])
+            elif not parts["m"][0].isupper():
+                # Lowercase "may 5" is far more likely a verb than a date
+                continue
+            elif years:
+                year = min(years, key=lambda y: abs(y[0] - match.start()))[1]
+            else:
+                continue
+            try:
+                if "d" in parts:
+                    first = last = date(year, month, int(parts["d"]))
+                else:
+                    first = date(year, month, 1)
+                    next_month = date(year + month // 12, month % 12 + 1, 1)
+                    last = date.fromordinal(next_month.toordinal() - 1)
+            except (TypeError, ValueError):
+                continue
+            covered.append(match.span())
+            found.append((match.start(), (first, last)))
+    ranges = []
+    for _, day_range in sorted(found, key=lambda x: x[0]):
+        if day_range not in ranges:
+            ranges.append(day_range)
+    return ranges
+
+
+def has_date_reference(text: str) -> bool:
+    """Check whether text mentions a year or a (capitalized) month name"""
+    if _YEAR_RE.search(text):
+        return True
+    return any(
+        m.group(1)[0].isupper()
+        for m in re.finditer(rf"\b({_MONTH_RE})\b", text, re.IGNORECASE)
+    )
+
+
+def record_timestamp(record: dict[str, Any] | None) -> int | None:
+    """Return the event time of a stored record
+
+    Prefers the article `published_at`, and falls back to the ingest time
+    (`created_at` for graph data, `__created_at__` for vector data).
+    """
+    if not record:
+        return None
+    for key in ("published_at", "created_at", "__created_at__"):
+        ts = to_epoch(record.get(key))
+        if ts is not None:
+            return ts
+    return None
+
+
+def publication_timestamp(record: dict[str, Any] | None) -> int | None:
+    """Return the publication time of a stored record, used for window filtering
+
+    Unlike record_timestamp there is no ingest time fallback: a document loaded
+    today says nothing about the period it covers, so undated records never
+    match a bounded time window.
+    """
+    if not record:
+        return None
+    return to_epoch(record.get("published_at"))
+
+
+def in_time_range(ts: int | None, time_from: int | None, time_to: int | None) -> bool:
+    """Check whether ts falls inside the closed interval [time_from, time_to]
+
+    Records without a timestamp never match a bounded window.
+    """
+    if time_from is None and time_to is None:
+        return True
+    if ts is None:
+        return False
+    if time_from is not None and ts < time_from:
+        return False
+    if time_to is not None and ts > time_to:
+        return False
+    return True
+
+
+def encode_observations(observations: Iterable[tuple[int, str]]) -> str:
+    """Serialize edge observations as a sorted, de-duplicated `ts:chunk_id` list
+
+    The string form keeps the attribute scalar so that it survives GraphML and
+    the other graph backends unchanged.
+    """
+    return GRAPH_FIELD_SEP.join(
+        f"{ts}:{chunk_id}" for ts, chunk_id in sorted(set(observations))
+    )
+
+
+def decode_observations(encoded: str | None) -> list[tuple[int, str]]:
+    """Parse the output of encode_observations, skipping malformed entries"""
+    if not encoded:
+        return []
+    observations = []
+    for item in encoded.split(GRAPH_FIELD_SEP):
+        ts, _, chunk_id = item.partition(":")
+        if chunk_id and ts.lstrip("-").isdigit():
+            observations.append((int(ts), chunk_id))
+    return observations
+
+
+@lru_cache(maxsize=1 << 18)
+def observation_timestamps(encoded: str) -> tuple[int, ...]:
+    """Sorted observation timestamps of an encoded list, memoized per string"""
+    return tuple(ts for ts, _ in decode_observations(encoded))
+
+
+def element_observations(element: dict[str, Any] | None) -> list[tuple[int, str]]:
+    """Return the (timestamp, chunk_id) observations of a graph node or edge
+
+    Elements written before observations were tracked get one observation per
+    source chunk at their publication time.
+    """
+    if not element:
+        return []
+    if element.get("observations") is not None:
+        return decode_observations(element["observations"])
+    ts = publication_timestamp(element)
+    if ts is None or not element.get("source_id"):
+        return []
+    return [(ts, chunk_id) for chunk_id in element["source_id"].split(GRAPH_FIELD_SEP)]
+
+
+def element_timestamps(element: dict[str, Any] | None) -> tuple[int, ...]:
+    """Return the sorted observation times of a graph node or edge
+
+    Elements written before observations were tracked fall back to their
+    publication time; an empty observation list means only undated mentions.
+    """
+    if not element:
+        return ()
+    encoded = element.get("observations")
+    if encoded is not None:
+        return observation_timestamps(encoded)
+    ts = publication_timestamp(element)
+    return () if ts is None else (ts,)
+
+
+def record_publication_times(record: dict[str, Any] | None) -> tuple[int, ...]:
+    """Return the sorted publication times of a stored vector record
+
+    Entity and relation records list the time of every dated mention in
+    `published_ats`, other records only have their `published_at`.
+    """
+    if not record:
+        return ()
+    published_ats = record.get("published_ats")
+    if published_ats is not None:
+        return tuple(sorted({int(ts) for ts in published_ats}))
+    ts = publication_timestamp(record)
+    return () if ts is None else (ts,)
+
+
+def prune_observations(element: dict[str, Any], chunk_ids: set[str]) -> None:
+    """Keep only the observations made by chunk_ids, in place
+
+    published_at follows the remaining observations so that a deleted document
+    no longer decides the recency of the element. It is left as is when no
+    dated observation remains: graph backends merge properties on upsert and
+    cannot drop it, and the empty observation list already keeps the element
+    out of every bounded window.
+    """
+    if element.get("observations") is None:
+        return
+    observations = [
+        (ts, chunk_id)
+        for ts, chunk_id in decode_observations(element["observations"])
+        if chunk_id in chunk_ids
+    ]
+    element["observations"] = encode_observations(observations)
+    if observations:
+        element["published_at"] = max(ts for ts, _ in observations)
+
+
+def any_in_time_range(
+    timestamps: tuple[int, ...], time_from: int | None, time_to: int | None
+) -> bool:
+    """Check whether any of the sorted timestamps lies in [time_from, time_to]"""
+    if time_from is None and time_to is None:
+        return True
+    lo = 0 if time_from is None else bisect_left(timestamps, time_from)
+    if time_to is None:
+        return lo < len(timestamps)
+    return lo < len(timestamps) and timestamps[lo] <= time_to
+
+
+def recency_decay(
+    timestamps: Sequence[int | None],
+    half_life_days: float,
+    reference: int | None = None,
+) -> np.ndarray:
+    """Exponential decay factor 0.5 ** (age / half_life) for each timestamp
+
+    Ages are measured against `reference`, by default the newest timestamp of the
+    batch, so the factors lie in (0, 1] whatever the age of the corpus. Items
+    without timestamp get a factor of 1.
+    """
+    ts = np.array([np.nan if t is None else t for t in timestamps], dtype=np.float64)
+    if not len(ts) or np.isnan(ts).all():
+        return np.ones(len(ts))
+    if reference is None:
+        reference = np.nanmax(ts)
+    age_days = np.clip((reference - ts) / 86400.0, 0.0, None)
+    return np.nan_to_num(np.exp2(-age_days / half_life_days), nan=1.0)
+
+
+def rerank_by_recency(
+    items: list[Any],
+    half_life_days: float,
+    timestamp: Callable[[Any], int | None] = record_timestamp,
+    reference: int | None = None,
+) -> list[Any]:
+    """Reorder ranked items by relevance weighted with a recency decay
+
+    The incoming order is the relevance ranking; item i gets a base score of
+    1 / (i + 1) which is multiplied by its recency_decay factor. Ties keep the
+    incoming order.
+    """
+    if half_life_days <= 0 or len(items) < 2:
+        return items
+    base = 1.0 / np.arange(1, len(items) + 1)
+    decay = recency_decay(
+        [timestamp(item) for item in items], half_life_days, reference
+    )
+    order = np.argsort(-(base * decay), kind="stable")
+    return [items[i] for i in order]
+
+
+def _as_timestamps(ts: int | Iterable[int] | None) -> tuple[int, ...]:
+    if ts is None:
+        return ()
+    if isinstance(ts, (int, np.integer)):
+        return (int(ts),)
+    return tuple(sorted({int(t) for t in ts}))
+
+
+class TemporalIndex:
+    """Sorted (timestamp, key) arrays for O(log n) time-window lookups.
+
+    Storages keep one of these next to their records so that time-filtered
+    queries can restrict the candidate set before any similarity scoring.
+    A key may carry several timestamps (one per dated mention of an entity or
+    relation) and matches every window containing at least one of them.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[tuple[Hashable, int | Iterable[int] | None]] | None = None,
+    ):
+        self._timestamps: list[int] = []
+        self._keys: list[Hashable] = []
+        self._ts_by_key: dict[Hashable, tuple[int, ...]] = {}
+        if items is not None:
+            self.rebuild(items)
+
+    def __len__(self) -> int:
+        return len(self._ts_by_key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._ts_by_key
+
+    def rebuild(
+        self, items: Iterable[tuple[Hashable, int | Iterable[int] | None]]
+    ) -> None:
+        """Replace the index content, sorting once instead of inserting one by one"""
+        self._ts_by_key = {}
+        for key, ts in items:
+            timestamps = _as_timestamps(ts)
+            if timestamps:
+                self._ts_by_key[key] = timestamps
+        ordered = sorted(
+            ((ts, key) for key, tss in self._ts_by_key.items() for ts in tss),
+            key=lambda x: x[0],
+        )
+        self._timestamps = [ts for ts, _ in ordered]
+        self._keys = [key for _, key in ordered]
+
+    def add(self, key: Hashable, ts: int | Iterable[int] | None) -> None:
+        """Insert or move a key; keys without timestamp are not indexed"""
+        self.remove(key)
+        timestamps = _as_timestamps(ts)
+        if not timestamps:
+            return
+        for t in timestamps:
+            pos = bisect_right(self._timestamps, t)
+            self._timestamps.insert(pos, t)
+            self._keys.insert(pos, key)
+        self._ts_by_key[key] = timestamps
+
+    def remove(self, key: Hashable) -> None:
+        for ts in self._ts_by_key.pop(key, ()):
+            lo = bisect_left(self._timestamps, ts)
+            hi = bisect_right(self._timestamps, ts)
+            for pos in range(lo, hi):
+                if self._keys[pos] == key:
+                    del self._timestamps[pos]
+                    del self._keys[pos]
+                    break
+
+    def window(self, time_from: int | None, time_to: int | None) -> list[Hashable]:
+        """Return keys with a timestamp in [time_from, time_to], by earliest match"""
+        lo = 0 if time_from is None else bisect_left(self._timestamps, time_from)
+        hi = (
+            len(self._timestamps)
+            if time_to is None
+            else bisect_right(self._timestamps, time_to)
+        )
+        return list(dict.fromkeys(self._keys[lo:hi]))
@@ -4,15 +4,28 @@ import weakref
 import asyncio
 import html
 import csv
+import io
 import json
 import logging
 import logging.handlers
 import os
 import re
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
 from functools import wraps
 from hashlib import md5
-from typing import Any, Protocol, Callable, TYPE_CHECKING, List
+from typing import (
+    Any,
+    Awaitable,
+    Iterable,
+    Iterator,
+    Protocol,
+    Callable,
+    TYPE_CHECKING,
+    List,
+)
 import numpy as np
 from lightrag.prompt import PROMPTS
 from dotenv import load_dotenv
@@ -230,6 +243,230 @@ class UnlimitedSemaphore:
         pass
 
 
+class KeyedLock:
+    """Async locks created on demand per key and dropped once unused.
+
+    Several keys can be locked at once; they are acquired in sorted order so
+    that overlapping key sets cannot deadlock.
+    """
+
+    def __init__(self):
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._waiters: dict[str, int] = {}
+
+    @asynccontextmanager
+    async def __call__(self, *keys: str):
+        keys = sorted(set(keys))
+        for key in keys:
+            if key not in self._locks:
+                self._locks[key] = asyncio.Lock()
+                self._waiters[key] = 0
+            self._waiters[key] += 1
+        acquired = []
+        try:
+            for key in keys:
+                await self._locks[key].acquire()
+                acquired.append(key)
+            yield
+        finally:
+            for key in reversed(acquired):
+                self._locks[key].release()
+            for key in keys:
+                self._waiters[key] -= 1
+                if not self._waiters[key]:
+                    del self._waiters[key]
+                    del self._locks[key]
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used keys"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: OrderedDict[str, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """Cached values of the keys found, marking them as recently used"""
+        found = {}
+        for key in keys:
+            if key in self._data:
+                self._data.move_to_end(key)
+                found[key] = self._data[key]
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found
+
+    def put_many(self, items: dict[str, Any]) -> None:
+        for key, value in items.items():
+            self._data[key] = value
+            self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+
+class MicroBatcher:
+    """Group items submitted by concurrent callers into batches.
+
+    Pending items are handed to process_batch together once max_batch_size items
+    are waiting or max_wait seconds after the first of them arrived, and each
+    caller gets back the result for its own item. At most max_concurrency
+    batches are processed at a time; items keep accumulating meanwhile, so
+    batches fill up under load. When a batch raises, its items are retried one
+    by one, so an error only reaches the callers whose own item fails.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[list[Any]], Awaitable[list[Any]]],
+        max_batch_size: int,
+        max_wait: float = 0.1,
+        max_concurrency: int = 4,
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[Any, asyncio.Future]]) -> None:
+        try:
+            async with self._semaphore:
+                # Callers cancelled while waiting for a free slot drop out of the batch
+                batch = [(item, future) for item, future in batch if not future.done()]
+                if not batch:
+                    return
+                try:
+                    results = await self.process_batch([item for item, _ in batch])
+                except Exception as e:
+                    if len(batch) == 1:
+                        raise
+                    logger.warning(
+                        f"Batch of {len(batch)} items failed ({e}), retrying the items one by one"
+                    )
+                    results = await asyncio.gather(
+                        *[self._process_alone(item) for item, _ in batch],
+                        return_exceptions=True,
+                    )
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _process_alone(self, item: Any) -> Any:
+        return (await self.process_batch([item]))[0]
+
+
+@dataclass
+class PipelineStage:
+    """A step of run_pipeline_stages, processed by `concurrency` parallel workers"""
+
+    name: str
+    func: Callable[[Any], Awaitable[Any]]
+    concurrency: int = 1
+
+
+async def run_pipeline_stages(
+    items: Iterable[Any],
+    stages: list[PipelineStage],
+    queue_size: int = 2,
+    on_error: Callable[[Any, str, Exception], Awaitable[None]] | None = None,
+) -> None:
+    """Stream items through stages connected by bounded queues.
+
+    Each stage passes what its func returns to the next stage, so different
+    items are in different stages at the same time. A full queue blocks the
+    upstream workers (backpressure), bounding the number of items in flight.
+    An item whose stage func raises is reported to on_error and dropped; an
+    exception raised by on_error aborts the whole pipeline.
+    """
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+    done_marker = object()
+    running = [stage.concurrency for stage in stages]
+
+    async def _feed():
+        for item in items:
+            await queues[0].put(item)
+        for _ in range(stages[0].concurrency):
+            await queues[0].put(done_marker)
+
+    async def _work(index: int, stage: PipelineStage):
+        while True:
+            item = await queues[index].get()
+            if item is done_marker:
+                break
+            try:
+                result = await stage.func(item)
+            except Exception as e:
+                if on_error is not None:
+                    await on_error(item, stage.name, e)
+                continue
+            if index + 1 < len(stages):
+                await queues[index + 1].put(result)
+        running[index] -= 1
+        # The last worker of a stage tells every worker of the next stage to stop
+        if not running[index] and index + 1 < len(stages):
+            for _ in range(stages[index + 1].concurrency):
+                await queues[index + 1].put(done_marker)
+
+    tasks = [asyncio.create_task(_feed())] + [
+        asyncio.create_task(_work(index, stage))
+        for index, stage in enumerate(stages)
+        for _ in range(stage.concurrency)
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
 @dataclass
 class EmbeddingFunc:
     embedding_dim: int
@@ -595,6 +832,45 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
     return final_decro
 
 
+# Embeddings computed ahead of the vector searches of the current query
+_prefetched_embeddings: ContextVar[dict[str, np.ndarray] | None] = ContextVar(
+    "prefetched_embeddings", default=None
+)
+
+
+@contextmanager
+def prefetched_embeddings(embeddings: dict[str, np.ndarray]):
+    """Serve embedding requests for the given texts from precomputed vectors
+
+    Applies to the current task and to the tasks it creates inside the block,
+    for embedding functions wrapped with use_prefetched_embeddings.
+    """
+    token = _prefetched_embeddings.set(
+        {**(_prefetched_embeddings.get() or {}), **embeddings}
+    )
+    try:
+        yield
+    finally:
+        _prefetched_embeddings.reset(token)
+
+
+def use_prefetched_embeddings(func):
+    """Let an embedding function answer from prefetched_embeddings
+
+    Requests are answered without calling func only if every text was
+    prefetched, otherwise func is called as usual.
+    """
+
+    @wraps(func)
+    async def wrapper(texts, *args, **kwargs):
+        prefetched = _prefetched_embeddings.get()
+        if prefetched and all(text in prefetched for text in texts):
+            return np.array([prefetched[text] for text in texts])
+        return await func(texts, *args, **kwargs)
+
+    return wrapper
+
+
 def wrap_embedding_func_with_attrs(**kwargs):
     """Wrap a function with attributes"""
 
@@ -617,6 +893,24 @@ def write_json(json_obj, file_name):
         json.dump(json_obj, f, indent=2, ensure_ascii=False)
 
 
+def iter_json_records(file_name) -> Iterator[dict[str, Any]]:
+    """Yield the records of a JSON Lines file (.jsonl/.ndjson) or a JSON array file
+
+    JSON Lines files are read line by line; a JSON file is loaded at once and
+    must hold a list of records, or a dict whose values are records.
+    """
+    if str(file_name).endswith((".jsonl", ".ndjson")):
+        with open(file_name, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+    data = load_json(file_name)
+    if data is None:
+        raise FileNotFoundError(file_name)
+    yield from data.values() if isinstance(data, dict) else data
+
+
 class TokenizerInterface(Protocol):
     """
     Defines the interface for a tokenizer, requiring encode and decode methods.
@@ -671,6 +965,31 @@ class Tokenizer:
         """
         return self.tokenizer.decode(tokens)
 
+    def encode_with_offsets(self, content: str) -> tuple[List[int], List[int] | None]:
+        """
+        Encodes a string and maps every token to the character offset where it starts.
+
+        The offsets let callers slice token windows out of the original string
+        instead of decoding them. They are only available when the underlying
+        tokenizer provides `decode_with_offsets` (as tiktoken does) and decoding
+        reproduces the content exactly.
+
+        Args:
+            content: The string to encode.
+
+        Returns:
+            A tuple of the integer tokens and their start offsets, or None instead
+            of the offsets when they are not available.
+        """
+        tokens = self.encode(content)
+        decode_with_offsets = getattr(self.tokenizer, "decode_with_offsets", None)
+        if decode_with_offsets is None:
+            return tokens, None
+        text, offsets = decode_with_offsets(tokens)
+        if text != content:
+            return tokens, None
+        return tokens, offsets
+
 
 class TiktokenTokenizer(Tokenizer):
     """
@@ -740,18 +1059,40 @@ def truncate_list_by_token_size(
     key: Callable[[Any], str],
     max_token_size: int,
     tokenizer: Tokenizer,
+    token_count: Callable[[Any], int | None] | None = None,
 ) -> list[int]:
-    """Truncate a list of data by token size"""
+    """Truncate a list of data by token size
+
+    token_count returns the stored token count of an item, items without one
+    (None) are encoded. The list is cut where the running token sum first
+    exceeds max_token_size, so items past the cut are never encoded.
+    """
     if max_token_size <= 0:
         return []
     tokens = 0
     for i, data in enumerate(list_data):
-        tokens += len(tokenizer.encode(key(data)))
+        count = token_count(data) if token_count is not None else None
+        if count is None:
+            count = len(tokenizer.encode(key(data)))
+        tokens += count
         if tokens > max_token_size:
             return list_data[:i]
     return list_data
 
 
+def stored_token_count(data: dict[str, Any] | None, field: str) -> int | None:
+    """Token count stored in data[field], None if missing or unreadable
+
+    Graph backends may hand numeric properties back as strings.
+    """
+    if not data or data.get(field) is None:
+        return None
+    try:
+        return int(data[field])
+    except (TypeError, ValueError):
+        return None
+
+
 def process_combine_contexts(*context_lists):
     """
     Combine multiple context lists and remove duplicate content
@@ -783,6 +1124,139 @@ def process_combine_contexts(*context_lists):
     return combined_data
 
 
+def render_context_rows(
+    rows: list[dict[str, Any]],
+    context_format: str = "json",
+    fields: list[str] | None = None,
+) -> str:
+    """Render context rows (entities, relationships or chunks) for the prompt
+
+    Args:
+        rows: Context rows; tables get one column per key seen in any row.
+            Keys starting with "_" are packing hints and are never rendered
+        context_format: "json" for a JSON array of objects, "csv" or "tsv" for a
+            table with one header line, which avoids repeating keys on every row
+        fields: Keys to keep, in row order; keys missing from the rows are ignored.
+            None keeps every key
+
+    Returns:
+        The rendered rows
+    """
+    rows = [
+        {
+            k: v
+            for k, v in row.items()
+            if not k.startswith("_") and (fields is None or k in fields)
+        }
+        for row in rows or []
+    ]
+    if context_format == "json":
+        return json.dumps(rows, ensure_ascii=False)
+    if context_format not in ("csv", "tsv"):
+        raise ValueError(f"Unsupported context format: {context_format}")
+    if not rows:
+        return ""
+    output = io.StringIO()
+    writer = csv.writer(
+        output, delimiter="," if context_format == "csv" else "\t", lineterminator="\n"
+    )
+    columns = list(dict.fromkeys(k for row in rows for k in row))
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(["" if row.get(k) is None else row.get(k) for k in columns])
+    return output.getvalue().rstrip("\n")
+
+
+CONTEXT_ROW_OVERHEAD_TOKENS = 32
+"""Estimated tokens of the short fields of a context row (ids, names, dates, paths)"""
+
+
+def pack_contexts_by_token_budget(
+    context_lists: dict[str, list[list[dict]]],
+    keys: dict[str, Callable[[dict], Any]],
+    max_token_size: int,
+    tokenizer: Tokenizer,
+) -> dict[str, list[dict]]:
+    """Select context items of all sections jointly under one token budget
+
+    Args:
+        context_lists: Section name (entities, relationships, chunks) mapped to
+            the ranked candidate lists of each retrieval branch
+        keys: Section name mapped to the function giving the identity of an item,
+            used to deduplicate candidates across branches
+        max_token_size: Token budget shared by all sections
+        tokenizer: Tokenizer used for items without a stored token count
+
+    Returns:
+        Section name mapped to the selected items, in retrieval order and renumbered
+
+    A candidate scores 1 / (1 + position) in every list it appears in. Its cost
+    is the token count stored with it ("_tokens", the description or chunk
+    content) plus CONTEXT_ROW_OVERHEAD_TOKENS, and is only measured with the
+    tokenizer when no count is stored. Scores and costs are normalised per
+    section (by the best score and the mean cost of the section) so that
+    large items such as chunks compete on their rank within their own section
+    instead of being crowded out by short descriptions. Candidates are taken
+    greedily by normalised score per cost, skipping those that no longer fit,
+    until the budget is spent.
+    """
+    candidates: dict[tuple[str, Any], dict[str, Any]] = {}
+    for section, lists in context_lists.items():
+        key = keys[section]
+        for context_list in lists:
+            for position, item in enumerate(context_list or []):
+                item_key = (section, key(item))
+                candidate = candidates.get(item_key)
+                if candidate is None:
+                    candidates[item_key] = candidate = {
+                        "section": section,
+                        "item": item,
+                        "order": len(candidates),
+                        "score": 0.0,
+                    }
+                candidate["score"] += 1.0 / (1 + position)
+
+    sections: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for candidate in candidates.values():
+        item = candidate["item"]
+        tokens = stored_token_count(item, "_tokens")
+        if tokens is None:
+            content = {
+                k: v for k, v in item.items() if k != "id" and not k.startswith("_")
+            }
+            tokens = len(tokenizer.encode(json.dumps(content, ensure_ascii=False)))
+        else:
+            tokens += CONTEXT_ROW_OVERHEAD_TOKENS
+        candidate["tokens"] = max(1, tokens)
+        sections[candidate["section"]].append(candidate)
+
+    for section_candidates in sections.values():
+        best_score = max(c["score"] for c in section_candidates)
+        mean_tokens = sum(c["tokens"] for c in section_candidates) / len(
+            section_candidates
+        )
+        for candidate in section_candidates:
+            candidate["density"] = (candidate["score"] / best_score) / (
+                candidate["tokens"] / mean_tokens
+            )
+
+    remaining = max_token_size
+    selected = []
+    for candidate in sorted(
+        candidates.values(), key=lambda c: c["density"], reverse=True
+    ):
+        if candidate["tokens"] <= remaining:
+            remaining -= candidate["tokens"]
+            selected.append(candidate)
+
+    packed: dict[str, list[dict]] = {section: [] for section in context_lists}
+    for candidate in sorted(selected, key=lambda c: c["order"]):
+        packed[candidate["section"]].append(
+            {**candidate["item"], "id": len(packed[candidate["section"]]) + 1}
+        )
+    return packed
+
+
 async def get_best_cached_response(
     hashing_kv,
     current_embedding,
@@ -796,60 +1270,22 @@ async def get_best_cached_response(
     logger.debug(
         f"get_best_cached_response:  mode={mode} cache_type={cache_type} use_llm_check={use_llm_check}"
     )
-    mode_cache = await hashing_kv.get_by_id(mode)
-    if not mode_cache:
+    index = await _get_semantic_cache_index(hashing_kv, mode)
+    match = index.search(current_embedding, cache_type)
+    best_entry = None
+    if match is not None:
+        best_entry = await _get_cache_entry(hashing_kv, mode, match[0])
+        if best_entry is None:
+            # The entry was deleted or evicted behind the index's back, rebuild once
+            index = await _get_semantic_cache_index(hashing_kv, mode, rebuild=True)
+            match = index.search(current_embedding, cache_type)
+            if match is not None:
+                best_entry = await _get_cache_entry(hashing_kv, mode, match[0])
+    if best_entry is None:
         return None
-
-    best_similarity = -1
-    best_response = None
-    best_prompt = None
-    best_cache_id = None
-
-    # Only iterate through cache entries for this mode
-    for cache_id, cache_data in mode_cache.items():
-        # Skip if cache_type doesn't match
-        if cache_type and cache_data.get("cache_type") != cache_type:
-            continue
-
-        # Check if cache data is valid
-        if cache_data["embedding"] is None:
-            continue
-
-        try:
-            # Safely convert cached embedding
-            cached_quantized = np.frombuffer(
-                bytes.fromhex(cache_data["embedding"]), dtype=np.uint8
-            ).reshape(cache_data["embedding_shape"])
-
-            # Ensure min_val and max_val are valid float values
-            embedding_min = cache_data.get("embedding_min")
-            embedding_max = cache_data.get("embedding_max")
-
-            if (
-                embedding_min is None
-                or embedding_max is None
-                or embedding_min >= embedding_max
-            ):
-                logger.warning(
-                    f"Invalid embedding min/max values: min={embedding_min}, max={embedding_max}"
-                )
-                continue
-
-            cached_embedding = dequantize_embedding(
-                cached_quantized,
-                embedding_min,
-                embedding_max,
-            )
-        except Exception as e:
-            logger.warning(f"Error processing cached embedding: {str(e)}")
-            continue
-
-        similarity = cosine_similarity(current_embedding, cached_embedding)
-        if similarity > best_similarity:
-            best_similarity = similarity
-            best_response = cache_data["return"]
-            best_prompt = cache_data["original_prompt"]
-            best_cache_id = cache_id
+    best_cache_id, best_similarity = match
+    best_response = best_entry["return"]
+    best_prompt = best_entry["original_prompt"]
 
     if best_similarity > similarity_threshold:
         # If LLM check is enabled and all required parameters are provided
@@ -908,6 +1344,138 @@ async def get_best_cached_response(
     return None
 
 
+class SemanticCacheIndex:
+    """In-memory matrix of the cached query embeddings of one cache mode.
+
+    Rows are dequantized once and L2-normalized, so a lookup is a single
+    matrix-vector product instead of decoding every cache entry per query.
+    """
+
+    def __init__(self):
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self.size = 0
+        self.ids: list[str] = []
+        self.rows: dict[str, int] = {}
+        self.type_codes = np.empty(0, dtype=np.int32)
+        self.cache_types: dict[str | None, int] = {}
+
+    @classmethod
+    def from_mode_cache(cls, mode_cache: dict[str, Any]) -> "SemanticCacheIndex":
+        index = cls()
+        for cache_id, cache_data in mode_cache.items():
+            embedding = decode_cached_embedding(cache_data)
+            if embedding is not None:
+                index.add(cache_id, cache_data.get("cache_type"), embedding)
+        return index
+
+    def add(self, cache_id: str, cache_type: str | None, embedding: np.ndarray):
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return
+        if self.size and vector.shape[0] != self.matrix.shape[1]:
+            logger.warning(
+                f"Skipping cached embedding with dimension {vector.shape[0]}, expected {self.matrix.shape[1]}"
+            )
+            return
+        type_code = self.cache_types.setdefault(cache_type, len(self.cache_types))
+
+        row = self.rows.get(cache_id)
+        if row is None:
+            if self.size == self.matrix.shape[0]:
+                capacity = max(64, self.size * 2)
+                matrix = np.empty((capacity, vector.shape[0]), dtype=np.float32)
+                type_codes = np.empty(capacity, dtype=np.int32)
+                if self.size:
+                    matrix[: self.size] = self.matrix[: self.size]
+                    type_codes[: self.size] = self.type_codes[: self.size]
+                self.matrix, self.type_codes = matrix, type_codes
+            row = self.size
+            self.size += 1
+            self.ids.append(cache_id)
+            self.rows[cache_id] = row
+        self.matrix[row] = vector / norm
+        self.type_codes[row] = type_code
+
+    def search(
+        self, embedding: np.ndarray, cache_type: str | None = None
+    ) -> tuple[str, float] | None:
+        """Return (cache_id, cosine similarity) of the closest cached embedding"""
+        if not self.size:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        if norm == 0 or vector.shape[0] != self.matrix.shape[1]:
+            return None
+        similarities = self.matrix[: self.size] @ (vector / norm)
+        if cache_type:
+            type_code = self.cache_types.get(cache_type)
+            if type_code is None:
+                return None
+            similarities = np.where(
+                self.type_codes[: self.size] == type_code, similarities, -np.inf
+            )
+        row = int(np.argmax(similarities))
+        if similarities[row] == -np.inf:
+            return None
+        return self.ids[row], float(similarities[row])
+
+
+async def _get_semantic_cache_index(
+    hashing_kv, mode: str, rebuild: bool = False
+) -> SemanticCacheIndex:
+    """Return the embedding index of a cache mode
+
+    The index is built from the mode once, then kept up to date by save_to_cache,
+    so lookups never load the mode again unless a rebuild is requested.
+    """
+    index = hashing_kv.semantic_cache_indexes.get(mode)
+    if rebuild or index is None:
+        mode_cache = await hashing_kv.get_by_id(mode) or {}
+        index = SemanticCacheIndex.from_mode_cache(mode_cache)
+        hashing_kv.semantic_cache_indexes[mode] = index
+    return index
+
+
+async def _get_cache_entry(hashing_kv, mode: str, cache_id: str) -> dict | None:
+    """Fetch a single cache entry, without loading the mode when the storage can"""
+    if exists_func(hashing_kv, "get_by_mode_and_id"):
+        mode_cache = await hashing_kv.get_by_mode_and_id(mode, cache_id)
+    else:
+        mode_cache = await hashing_kv.get_by_id(mode)
+    return (mode_cache or {}).get(cache_id)
+
+
+def decode_cached_embedding(cache_data: dict[str, Any]) -> np.ndarray | None:
+    """Restore the float embedding of a cache entry, None if it has none or is invalid"""
+    if cache_data.get("embedding") is None:
+        return None
+    try:
+        # Safely convert cached embedding
+        cached_quantized = np.frombuffer(
+            bytes.fromhex(cache_data["embedding"]), dtype=np.uint8
+        ).reshape(cache_data["embedding_shape"])
+
+        # Ensure min_val and max_val are valid float values
+        embedding_min = cache_data.get("embedding_min")
+        embedding_max = cache_data.get("embedding_max")
+
+        if (
+            embedding_min is None
+            or embedding_max is None
+            or embedding_min >= embedding_max
+        ):
+            logger.warning(
+                f"Invalid embedding min/max values: min={embedding_min}, max={embedding_max}"
+            )
+            return None
+
+        return dequantize_embedding(cached_quantized, embedding_min, embedding_max)
+    except Exception as e:
+        logger.warning(f"Error processing cached embedding: {str(e)}")
+        return None
+
+
 def cosine_similarity(v1, v2):
     """Calculate cosine similarity between two vectors"""
     dot_product = np.dot(v1, v2)
@@ -977,7 +1545,31 @@ async def handle_cache(
         return mode_cache[args_hash]["return"], None, None, None
 
     logger.debug(f"Non-embedding cached missed(mode:{mode} type:{cache_type})")
-    return None, None, None, None
+
+    # Fall back to a similar cached query, extraction is only cached exactly
+    embedding_cache_config = hashing_kv.global_config.get("embedding_cache_config")
+    if mode == "default" or not (embedding_cache_config or {}).get("enabled"):
+        return None, None, None, None
+
+    current_embedding = (await hashing_kv.embedding_func([prompt]))[0]
+    quantized, min_val, max_val = quantize_embedding(current_embedding)
+    use_llm_check = embedding_cache_config.get("use_llm_check", False)
+    best_cached_response = await get_best_cached_response(
+        hashing_kv,
+        current_embedding,
+        similarity_threshold=embedding_cache_config.get("similarity_threshold", 0.95),
+        mode=mode,
+        use_llm_check=use_llm_check,
+        llm_func=hashing_kv.global_config.get("llm_model_func")
+        if use_llm_check
+        else None,
+        original_prompt=prompt,
+        cache_type=cache_type,
+    )
+    if best_cached_response is not None:
+        return best_cached_response, None, None, None
+    # Returned so that save_to_cache stores the embedding with the new entry
+    return None, quantized, min_val, max_val
 
 
 @dataclass
@@ -1036,13 +1628,29 @@ async def save_to_cache(hashing_kv, cache_data: CacheData):
         "embedding_shape": cache_data.quantized.shape
         if cache_data.quantized is not None
         else None,
-        "embedding_min": cache_data.min_val,
-        "embedding_max": cache_data.max_val,
+        # float() since numpy scalars such as float32 are not JSON serializable
+        "embedding_min": float(cache_data.min_val)
+        if cache_data.min_val is not None
+        else None,
+        "embedding_max": float(cache_data.max_val)
+        if cache_data.max_val is not None
+        else None,
         "original_prompt": cache_data.prompt,
     }
 
     logger.info(f" == LLM cache == saving {cache_data.mode}: {cache_data.args_hash}")
 
+    # Append to an already built embedding index instead of rebuilding it
+    index = hashing_kv.semantic_cache_indexes.get(cache_data.mode)
+    if index is not None and cache_data.quantized is not None:
+        index.add(
+            cache_data.args_hash,
+            cache_data.cache_type,
+            dequantize_embedding(
+                cache_data.quantized, cache_data.min_val, cache_data.max_val
+            ),
+        )
+
     # Only upsert if there's actual new content
     await hashing_kv.upsert({cache_data.mode: mode_cache})
 
@@ -3,9 +3,15 @@ from __future__ import annotations
 import asyncio
 from typing import Any, cast
 
-from .kg.shared_storage import get_graph_db_lock
+from .kg.shared_storage import (
+    get_graph_db_lock,
+    get_graph_key_lock,
+    graph_edge_lock_key,
+    graph_node_lock_key,
+)
 from .prompt import GRAPH_FIELD_SEP
-from .utils import compute_mdhash_id, logger
+from .utils import Tokenizer, compute_mdhash_id, logger
+from .temporal import element_observations, element_timestamps, encode_observations
 from .base import StorageNameSpace
 
 
@@ -21,8 +27,9 @@ async def adelete_by_entity(
         entity_name: Name of the entity to delete
     """
     graph_db_lock = get_graph_db_lock(enable_logging=False)
-    # Use graph database lock to ensure atomic graph and vector db operations
-    async with graph_db_lock:
+    # Use graph database lock to ensure atomic graph and vector db operations, and
+    # the key locks of the touched elements to exclude concurrent document merges
+    async with graph_db_lock, get_graph_key_lock(graph_node_lock_key(entity_name)):
         try:
             await entities_vdb.delete_entity(entity_name)
             await relationships_vdb.delete_entity_relation(entity_name)
@@ -69,8 +76,11 @@ async def adelete_by_relation(
         target_entity: Name of the target entity
     """
     graph_db_lock = get_graph_db_lock(enable_logging=False)
-    # Use graph database lock to ensure atomic graph and vector db operations
-    async with graph_db_lock:
+    # Use graph database lock to ensure atomic graph and vector db operations, and
+    # the key locks of the touched elements to exclude concurrent document merges
+    async with graph_db_lock, get_graph_key_lock(
+        graph_edge_lock_key(source_entity, target_entity)
+    ):
         try:
             # Check if the relation exists
             edge_exists = await chunk_entity_relation_graph.has_edge(
@@ -140,8 +150,12 @@ async def aedit_entity(
         Dictionary containing updated entity information
     """
     graph_db_lock = get_graph_db_lock(enable_logging=False)
-    # Use graph database lock to ensure atomic graph and vector db operations
-    async with graph_db_lock:
+    # Use graph database lock to ensure atomic graph and vector db operations, and
+    # the key locks of the touched elements to exclude concurrent document merges
+    async with graph_db_lock, get_graph_key_lock(
+        graph_node_lock_key(entity_name),
+        graph_node_lock_key(updated_data.get("entity_name", entity_name)),
+    ):
         try:
             # 1. Get current entity information
             node_exists = await chunk_entity_relation_graph.has_node(entity_name)
@@ -171,6 +185,13 @@ async def aedit_entity(
             # 2. Update entity information in the graph
             new_node_data = {**node_data, **updated_data}
             new_node_data["entity_id"] = new_entity_name
+            if "description" in updated_data:
+                tokenizer: Tokenizer = chunk_entity_relation_graph.global_config[
+                    "tokenizer"
+                ]
+                new_node_data["description_tokens"] = len(
+                    tokenizer.encode(new_node_data["description"])
+                )
 
             if "entity_name" in new_node_data:
                 del new_node_data[
@@ -258,6 +279,8 @@ async def aedit_entity(
                             "description": description,
                             "keywords": keywords,
                             "weight": weight,
+                            "published_at": edge_data.get("published_at"),
+                            "published_ats": list(element_timestamps(edge_data)),
                         }
                     }
 
@@ -289,6 +312,8 @@ async def aedit_entity(
                     "source_id": source_id,
                     "description": description,
                     "entity_type": entity_type,
+                    "published_at": new_node_data.get("published_at"),
+                    "published_ats": list(element_timestamps(new_node_data)),
                 }
             }
 
@@ -352,8 +377,11 @@ async def aedit_relation(
         Dictionary containing updated relation information
     """
     graph_db_lock = get_graph_db_lock(enable_logging=False)
-    # Use graph database lock to ensure atomic graph and vector db operations
-    async with graph_db_lock:
+    # Use graph database lock to ensure atomic graph and vector db operations, and
+    # the key locks of the touched elements to exclude concurrent document merges
+    async with graph_db_lock, get_graph_key_lock(
+        graph_edge_lock_key(source_entity, target_entity)
+    ):
         try:
             # 1. Get current relation information
             edge_exists = await chunk_entity_relation_graph.has_edge(
@@ -377,6 +405,13 @@ async def aedit_relation(
 
             # 2. Update relation information in the graph
             new_edge_data = {**edge_data, **updated_data}
+            if "description" in updated_data:
+                tokenizer: Tokenizer = chunk_entity_relation_graph.global_config[
+                    "tokenizer"
+                ]
+                new_edge_data["description_tokens"] = len(
+                    tokenizer.encode(new_edge_data["description"])
+                )
             await chunk_entity_relation_graph.upsert_edge(
                 source_entity, target_entity, new_edge_data
             )
@@ -405,6 +440,8 @@ async def aedit_relation(
                     "description": description,
                     "keywords": keywords,
                     "weight": weight,
+                    "published_at": new_edge_data.get("published_at"),
+                    "published_ats": list(element_timestamps(new_edge_data)),
                 }
             }
 
@@ -466,8 +503,9 @@ async def acreate_entity(
         Dictionary containing created entity information
     """
     graph_db_lock = get_graph_db_lock(enable_logging=False)
-    # Use graph database lock to ensure atomic graph and vector db operations
-    async with graph_db_lock:
+    # Use graph database lock to ensure atomic graph and vector db operations, and
+    # the key locks of the touched elements to exclude concurrent document merges
+    async with graph_db_lock, get_graph_key_lock(graph_node_lock_key(entity_name)):
         try:
             # Check if entity already exists
             existing_node = await chunk_entity_relation_graph.has_node(entity_name)
@@ -481,6 +519,12 @@ async def acreate_entity(
                 "description": entity_data.get("description", ""),
                 "source_id": entity_data.get("source_id", "manual"),
             }
+            tokenizer: Tokenizer = chunk_entity_relation_graph.global_config[
+                "tokenizer"
+            ]
+            node_data["description_tokens"] = len(
+                tokenizer.encode(node_data["description"])
+            )
 
             # Add entity to knowledge graph
             await chunk_entity_relation_graph.upsert_node(entity_name, node_data)
@@ -550,8 +594,11 @@ async def acreate_relation(
         Dictionary containing created relation information
     """
     graph_db_lock = get_graph_db_lock(enable_logging=False)
-    # Use graph database lock to ensure atomic graph and vector db operations
-    async with graph_db_lock:
+    # Use graph database lock to ensure atomic graph and vector db operations, and
+    # the key locks of the touched elements to exclude concurrent document merges
+    async with graph_db_lock, get_graph_key_lock(
+        graph_edge_lock_key(source_entity, target_entity)
+    ):
         try:
             # Check if both entities exist
             source_exists = await chunk_entity_relation_graph.has_node(source_entity)
@@ -578,6 +625,12 @@ async def acreate_relation(
                 "source_id": relation_data.get("source_id", "manual"),
                 "weight": float(relation_data.get("weight", 1.0)),
             }
+            tokenizer: Tokenizer = chunk_entity_relation_graph.global_config[
+                "tokenizer"
+            ]
+            edge_data["description_tokens"] = len(
+                tokenizer.encode(edge_data["description"])
+            )
 
             # Add relation to knowledge graph
             await chunk_entity_relation_graph.upsert_edge(
@@ -668,8 +721,11 @@ async def amerge_entities(
         Dictionary containing the merged entity information
     """
     graph_db_lock = get_graph_db_lock(enable_logging=False)
-    # Use graph database lock to ensure atomic graph and vector db operations
-    async with graph_db_lock:
+    # Use graph database lock to ensure atomic graph and vector db operations, and
+    # the key locks of the touched elements to exclude concurrent document merges
+    async with graph_db_lock, get_graph_key_lock(
+        *[graph_node_lock_key(name) for name in [*source_entities, target_entity]]
+    ):
         try:
             # Default merge strategy
             default_strategy = {
@@ -708,15 +764,23 @@ async def amerge_entities(
                 )
 
             # 3. Merge entity data
+            tokenizer: Tokenizer = chunk_entity_relation_graph.global_config[
+                "tokenizer"
+            ]
             merged_entity_data = _merge_entity_attributes(
                 list(source_entities_data.values())
                 + ([existing_target_entity_data] if target_exists else []),
                 merge_strategy,
+                tokenizer,
             )
 
             # Apply any explicitly provided target entity data (overrides merged data)
             for key, value in target_entity_data.items():
                 merged_entity_data[key] = value
+            if "description" in target_entity_data:
+                merged_entity_data["description_tokens"] = len(
+                    tokenizer.encode(merged_entity_data["description"])
+                )
 
             # 4. Get all relationships of the source entities
             all_relations = []
@@ -775,6 +839,7 @@ async def amerge_entities(
                             "source_id": "join_unique",
                             "weight": "max",
                         },
+                        tokenizer,
                     )
                     relation_updates[relation_key]["data"] = merged_relation
                     logger.info(
@@ -816,6 +881,8 @@ async def amerge_entities(
                     "source_id": source_id,
                     "description": description,
                     "entity_type": entity_type,
+                    "published_at": merged_entity_data.get("published_at"),
+                    "published_ats": list(element_timestamps(merged_entity_data)),
                 }
             }
 
@@ -844,6 +911,8 @@ async def amerge_entities(
                         "description": description,
                         "keywords": keywords,
                         "weight": weight,
+                        "published_at": edge_data.get("published_at"),
+                        "published_ats": list(element_timestamps(edge_data)),
                     }
                 }
 
@@ -889,23 +958,29 @@ async def amerge_entities(
 
 
 def _merge_entity_attributes(
-    entity_data_list: list[dict[str, Any]], merge_strategy: dict[str, str]
+    entity_data_list: list[dict[str, Any]],
+    merge_strategy: dict[str, str],
+    tokenizer: Tokenizer,
 ) -> dict[str, Any]:
     """Merge attributes from multiple entities.
 
     Args:
         entity_data_list: List of dictionaries containing entity data
         merge_strategy: Merge strategy for each field
+        tokenizer: Tokenizer used to count the tokens of the merged description
 
     Returns:
         Dictionary containing merged entity data
     """
     merged_data = {}
 
-    # Collect all possible keys
+    # Collect all possible keys, the token count is recomputed after the merge
     all_keys = set()
     for data in entity_data_list:
         all_keys.update(data.keys())
+    all_keys.discard("description_tokens")
+    # Time data is the union of the observations, merged below
+    all_keys.difference_update(("observations", "published_at"))
 
     # Merge values for each key
     for key in all_keys:
@@ -935,27 +1010,39 @@ def _merge_entity_attributes(
             # Default strategy
             merged_data[key] = values[0]
 
+    if "description" in merged_data:
+        merged_data["description_tokens"] = len(
+            tokenizer.encode(str(merged_data["description"]))
+        )
+    _merge_observations(merged_data, entity_data_list)
+
     return merged_data
 
 
 def _merge_relation_attributes(
-    relation_data_list: list[dict[str, Any]], merge_strategy: dict[str, str]
+    relation_data_list: list[dict[str, Any]],
+    merge_strategy: dict[str, str],
+    tokenizer: Tokenizer,
 ) -> dict[str, Any]:
     """Merge attributes from multiple relationships.
 
     Args:
         relation_data_list: List of dictionaries containing relationship data
         merge_strategy: Merge strategy for each field
+        tokenizer: Tokenizer used to count the tokens of the merged description
 
     Returns:
         Dictionary containing merged relationship data
     """
     merged_data = {}
 
-    # Collect all possible keys
+    # Collect all possible keys, the token count is recomputed after the merge
     all_keys = set()
     for data in relation_data_list:
         all_keys.update(data.keys())
+    all_keys.discard("description_tokens")
+    # Time data is the union of the observations, merged below
+    all_keys.difference_update(("observations", "published_at"))
 
     # Merge values for each key
     for key in all_keys:
@@ -993,9 +1080,27 @@ def _merge_relation_attributes(
             # Default strategy
             merged_data[key] = values[0]
 
+    if "description" in merged_data:
+        merged_data["description_tokens"] = len(
+            tokenizer.encode(str(merged_data["description"]))
+        )
+    _merge_observations(merged_data, relation_data_list)
+
     return merged_data
 
 
+def _merge_observations(
+    merged_data: dict[str, Any], data_list: list[dict[str, Any]]
+) -> None:
+    """Set the union of the observations of data_list on merged_data"""
+    observations = [obs for data in data_list for obs in element_observations(data)]
+    if not observations and not any("observations" in data for data in data_list):
+        return
+    merged_data["observations"] = encode_observations(observations)
+    if observations:
+        merged_data["published_at"] = max(ts for ts, _ in observations)
+
+
 async def _merge_entities_done(
     entities_vdb, relationships_vdb, chunk_entity_relation_graph
 ) -> None:
@@ -137,8 +137,14 @@ def main():
             records = [records_json[idx] for idx in chunk_indices]
             texts   = [chunk_to_string(rec) for rec in records]
 
-    for text in texts:
-        rag.insert(text)
+    for rec, text in zip(records, texts):
+        # keep the article date as structured metadata for time-range queries
+        metadata = {
+            "published_at": rec.get("published_at"),
+            "source": rec.get("source"),
+            "url": rec.get("url"),
+        }
+        rag.insert(text, metadata=metadata)
 
 if __name__ == "__main__":
     main()
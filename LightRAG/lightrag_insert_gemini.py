@@ -130,7 +130,13 @@ def main():
         for chunk in retrieved_chunks:
             chunk_str = chunk_to_string(chunk)
             print(chunk_str)
-            rag.insert(chunk_str)
+            # keep the article date as structured metadata for time-range queries
+            metadata = {
+                "published_at": chunk.get("published_at"),
+                "source": chunk.get("source"),
+                "url": chunk.get("url"),
+            }
+            rag.insert(chunk_str, metadata=metadata)
     else:
         print("No News Articles Found")
 
@@ -0,0 +1,142 @@
+import re
+
+from lightrag.operate import chunking_by_token_size
+from lightrag.utils import Tokenizer
+
+CONTENT = "Alpha beta gamma.\n\nDelta epsilon zeta eta.\n\nTheta iota kappa lambda mu."
+
+
+class WordTokenizer:
+    """Lossless tokenizer whose tokens carry their leading whitespace, like BPE"""
+
+    def __init__(self):
+        self.vocab: dict[str, int] = {}
+        self.words: list[str] = []
+
+    def encode(self, content: str) -> list[int]:
+        tokens = []
+        for word in re.findall(r"\s*\S+|\s+", content):
+            if word not in self.vocab:
+                self.vocab[word] = len(self.words)
+                self.words.append(word)
+            tokens.append(self.vocab[word])
+        return tokens
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(self.words[token] for token in tokens)
+
+
+class OffsetWordTokenizer(WordTokenizer):
+    def decode_with_offsets(self, tokens: list[int]) -> tuple[str, list[int]]:
+        offsets, position = [], 0
+        for token in tokens:
+            offsets.append(position)
+            position += len(self.words[token])
+        return self.decode(tokens), offsets
+
+
+class LossyWordTokenizer(OffsetWordTokenizer):
+    def decode_with_offsets(self, tokens: list[int]) -> tuple[str, list[int]]:
+        text, offsets = super().decode_with_offsets(tokens)
+        return text.lower(), offsets
+
+
+def test_encode_with_offsets_maps_tokens_to_their_start():
+    tokenizer = Tokenizer("words", OffsetWordTokenizer())
+    tokens, offsets = tokenizer.encode_with_offsets(CONTENT)
+
+    assert len(offsets) == len(tokens)
+    assert offsets[0] == 0
+    ends = offsets[1:] + [len(CONTENT)]
+    for token, start, end in zip(tokens, offsets, ends):
+        assert CONTENT[start:end] == tokenizer.decode([token])
+
+
+def test_encode_with_offsets_unavailable():
+    tokens, offsets = Tokenizer("words", WordTokenizer()).encode_with_offsets(CONTENT)
+    assert offsets is None and tokens
+
+    tokens, offsets = Tokenizer("words", LossyWordTokenizer()).encode_with_offsets(
+        CONTENT
+    )
+    assert offsets is None and tokens
+
+
+def _chunk_both_ways(**kwargs):
+    with_offsets = chunking_by_token_size(
+        Tokenizer("words", OffsetWordTokenizer()), CONTENT, **kwargs
+    )
+    decoded = chunking_by_token_size(
+        Tokenizer("words", WordTokenizer()), CONTENT, **kwargs
+    )
+    return with_offsets, decoded
+
+
+def test_token_windows_match_decoding():
+    with_offsets, decoded = _chunk_both_ways(overlap_token_size=1, max_token_size=4)
+
+    assert with_offsets == decoded
+    assert with_offsets[0]["content"] == "Alpha beta gamma.\n\nDelta"
+    # Windows overlap by one token
+    assert with_offsets[1]["content"].startswith("Delta")
+    assert (
+        sum(chunk["tokens"] for chunk in with_offsets)
+        == len(OffsetWordTokenizer().encode(CONTENT)) + len(with_offsets) - 1
+    )
+
+
+def test_split_by_character_counts_tokens_straddling_the_separator():
+    # "\n\nDelta" is a single token spanning the separator and the next piece
+    with_offsets, decoded = _chunk_both_ways(
+        split_by_character="\n\n", overlap_token_size=1, max_token_size=8
+    )
+
+    assert with_offsets == decoded
+    assert [chunk["content"] for chunk in with_offsets] == CONTENT.split("\n\n")
+    assert [chunk["tokens"] for chunk in with_offsets] == [3, 4, 5]
+
+
+def test_split_by_character_windows_are_clipped_to_the_piece():
+    with_offsets, decoded = _chunk_both_ways(
+        split_by_character="\n\n", overlap_token_size=1, max_token_size=2
+    )
+
+    assert with_offsets == decoded
+    pieces = CONTENT.split("\n\n")
+    assert with_offsets[3]["content"] == "Delta epsilon"
+    for chunk in with_offsets:
+        assert any(chunk["content"] in piece for piece in pieces)
+        assert chunk["tokens"] <= 2
+
+
+def test_split_by_character_only_keeps_pieces_whole():
+    with_offsets, decoded = _chunk_both_ways(
+        split_by_character="\n\n",
+        split_by_character_only=True,
+        overlap_token_size=1,
+        max_token_size=2,
+    )
+
+    assert with_offsets == decoded
+    assert [chunk["content"] for chunk in with_offsets] == CONTENT.split("\n\n")
+
+
+def test_windows_do_not_leak_across_a_separator_inside_a_token():
+    # " two|three" and " five|six" each straddle a separator
+    content = "one two|three four five|six"
+    with_offsets = chunking_by_token_size(
+        Tokenizer("words", OffsetWordTokenizer()),
+        content,
+        split_by_character="|",
+        overlap_token_size=1,
+        max_token_size=2,
+    )
+
+    assert [chunk["content"] for chunk in with_offsets] == [
+        "one two",
+        "three four",
+        "four five",
+        "five",
+        "six",
+    ]
+    assert [chunk["tokens"] for chunk in with_offsets] == [2, 2, 2, 1, 1]
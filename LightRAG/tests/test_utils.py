@@ -0,0 +1,267 @@
+import asyncio
+
+import pytest
+
+from lightrag.utils import (
+    CONTEXT_ROW_OVERHEAD_TOKENS,
+    MicroBatcher,
+    PipelineStage,
+    Tokenizer,
+    pack_contexts_by_token_budget,
+    run_pipeline_stages,
+)
+
+
+class SplitTokenizer:
+    def encode(self, content: str) -> list[str]:
+        return content.split()
+
+    def decode(self, tokens: list[str]) -> str:
+        return " ".join(tokens)
+
+
+# MicroBatcher
+
+
+def test_micro_batcher_groups_concurrent_items():
+    batches = []
+
+    async def process_batch(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    async def main():
+        batcher = MicroBatcher(process_batch, max_batch_size=3, max_wait=10)
+        return await asyncio.gather(*[batcher.submit(i) for i in range(3)])
+
+    assert asyncio.run(main()) == [0, 2, 4]
+    assert batches == [[0, 1, 2]]
+
+
+def test_micro_batcher_flushes_after_max_wait():
+    async def process_batch(items):
+        return items
+
+    async def main():
+        batcher = MicroBatcher(process_batch, max_batch_size=100, max_wait=0.01)
+        return await asyncio.wait_for(batcher.submit("a"), timeout=1)
+
+    assert asyncio.run(main()) == "a"
+
+
+def test_micro_batcher_retries_items_alone_after_a_batch_failure():
+    batches = []
+
+    async def process_batch(items):
+        batches.append(list(items))
+        if "bad" in items:
+            raise ValueError("bad item")
+        return [item.upper() for item in items]
+
+    async def main():
+        batcher = MicroBatcher(process_batch, max_batch_size=3, max_wait=10)
+        return await asyncio.gather(
+            *[batcher.submit(item) for item in ("a", "bad", "c")],
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(main())
+
+    assert results[0] == "A" and results[2] == "C"
+    assert isinstance(results[1], ValueError)
+    assert batches[0] == ["a", "bad", "c"]
+    assert sorted(batches[1:]) == [["a"], ["bad"], ["c"]]
+
+
+def test_micro_batcher_single_item_failure_is_not_retried():
+    calls = []
+
+    async def process_batch(items):
+        calls.append(list(items))
+        raise RuntimeError("down")
+
+    async def main():
+        batcher = MicroBatcher(process_batch, max_batch_size=1)
+        await batcher.submit("a")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main())
+    assert calls == [["a"]]
+
+
+# run_pipeline_stages
+
+
+def test_pipeline_passes_results_through_stages():
+    done = []
+
+    async def double(item):
+        await asyncio.sleep(0)
+        return item * 2
+
+    async def collect(item):
+        done.append(item)
+
+    asyncio.run(
+        run_pipeline_stages(
+            range(10),
+            [
+                PipelineStage("double", double, concurrency=3),
+                PipelineStage("collect", collect),
+            ],
+        )
+    )
+
+    assert sorted(done) == [item * 2 for item in range(10)]
+
+
+def test_pipeline_reports_and_drops_failed_items():
+    done, errors = [], []
+
+    async def check(item):
+        if item % 3 == 0:
+            raise ValueError(item)
+        return item
+
+    async def collect(item):
+        done.append(item)
+
+    async def on_error(item, stage_name, error):
+        errors.append((item, stage_name, type(error)))
+
+    asyncio.run(
+        run_pipeline_stages(
+            range(7),
+            [
+                PipelineStage("check", check, concurrency=2),
+                PipelineStage("collect", collect),
+            ],
+            on_error=on_error,
+        )
+    )
+
+    assert sorted(done) == [1, 2, 4, 5]
+    assert sorted(errors) == [(item, "check", ValueError) for item in (0, 3, 6)]
+
+
+def test_pipeline_aborts_when_on_error_raises():
+    started = []
+
+    async def check(item):
+        started.append(item)
+        raise ValueError(item)
+
+    async def on_error(item, stage_name, error):
+        raise RuntimeError("abort")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(
+            asyncio.wait_for(
+                run_pipeline_stages(
+                    range(100), [PipelineStage("check", check)], on_error=on_error
+                ),
+                timeout=5,
+            )
+        )
+    assert started == [0]
+
+
+def test_pipeline_applies_backpressure():
+    pulled = []
+
+    def items():
+        for item in range(100):
+            pulled.append(item)
+            yield item
+
+    async def main():
+        gate = asyncio.Event()
+        done = []
+
+        async def passthrough(item):
+            return item
+
+        async def slow(item):
+            await gate.wait()
+            done.append(item)
+
+        pipeline = asyncio.create_task(
+            run_pipeline_stages(
+                items(),
+                [PipelineStage("fast", passthrough), PipelineStage("slow", slow)],
+                queue_size=1,
+            )
+        )
+        for _ in range(50):
+            await asyncio.sleep(0)
+        in_flight = len(pulled)
+        gate.set()
+        await pipeline
+        return in_flight, done
+
+    in_flight, done = asyncio.run(main())
+
+    # One item in each queue, one in each worker and one waiting in the feeder
+    assert in_flight <= 5
+    assert done == list(range(100))
+
+
+# pack_contexts_by_token_budget
+
+
+def _entity(name, tokens=8):
+    return {"id": name, "entity": name, "description": name, "_tokens": tokens}
+
+
+ENTITY_KEYS = {"entities": lambda item: item["entity"]}
+ENTITY_COST = 8 + CONTEXT_ROW_OVERHEAD_TOKENS
+
+
+def test_pack_merges_branches_and_keeps_retrieval_order():
+    e1, e2, e3, e4 = (_entity(name) for name in ("e1", "e2", "e3", "e4"))
+
+    packed = pack_contexts_by_token_budget(
+        {"entities": [[e1, e2, e3], [e2, e4]]},
+        ENTITY_KEYS,
+        max_token_size=3 * ENTITY_COST,
+        tokenizer=Tokenizer("split", SplitTokenizer()),
+    )
+
+    # e2 is ranked by both branches, e3 is the weakest candidate
+    assert [item["entity"] for item in packed["entities"]] == ["e1", "e2", "e4"]
+    assert [item["id"] for item in packed["entities"]] == [1, 2, 3]
+
+
+def test_pack_skips_items_that_do_not_fit():
+    big, small = _entity("big", tokens=100), _entity("small")
+
+    packed = pack_contexts_by_token_budget(
+        {"entities": [[big, small]], "chunks": [[]]},
+        {**ENTITY_KEYS, "chunks": lambda item: item["content"]},
+        max_token_size=ENTITY_COST + 10,
+        tokenizer=Tokenizer("split", SplitTokenizer()),
+    )
+
+    assert packed == {"entities": [{**small, "id": 1}], "chunks": []}
+
+
+def test_pack_measures_items_without_stored_token_count():
+    chunk = {"id": "c1", "content": "one two three four", "file_path": "a.txt"}
+
+    packed = pack_contexts_by_token_budget(
+        {"chunks": [[chunk]]},
+        {"chunks": lambda item: item["content"]},
+        max_token_size=20,
+        tokenizer=Tokenizer("split", SplitTokenizer()),
+    )
+
+    assert packed["chunks"] == [{**chunk, "id": 1}]
+    assert (
+        pack_contexts_by_token_budget(
+            {"chunks": [[chunk]]},
+            {"chunks": lambda item: item["content"]},
+            max_token_size=2,
+            tokenizer=Tokenizer("split", SplitTokenizer()),
+        )["chunks"]
+        == []
+    )